@@ -0,0 +1,365 @@
+"""Offline performance benchmarks with a stand-in LLM and baseline regression checks."""
+
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from utils import read_policy_document, split_policy_sections
+from gap_analyzer import (load_nist_framework, clear_framework_cache, set_llm_backend,
+                          extract_gaps_structured, build_gap_analysis_prompt)
+from policy_reviser import build_revision_prompt
+from roadmap_generator import build_roadmap_prompt, build_executive_summary_prompt
+from incremental import build_section_state
+from pdf_generator import create_pdf_report, build_story, get_styles
+from report_model import parse_blocks
+from metrics import current_stage
+from validation import END_MARKERS
+
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+DEFAULT_TOLERANCE = 0.25  # 25% slower than baseline fails
+MIN_REGRESSION_SECONDS = 0.005  # ignore timer noise on very fast benchmarks
+
+CORPUS_SIZES = {'1kb': 1024, '100kb': 100 * 1024, '1mb': 1024 * 1024, '5mb': 5 * 1024 * 1024}
+QUICK_SIZES = ('1kb', '100kb')
+MARKUP_LINES = 20000  # lines of mixed report markup for the parser micro-benchmark
+
+SENTENCES = [
+    "All users must authenticate with unique credentials before accessing company systems.",
+    "Multi-factor authentication is required for remote and privileged access.",
+    "Security incidents must be reported to the security operations team within one hour.",
+    "Information assets are classified as public, internal, confidential or restricted.",
+    "Backups of critical systems are performed daily and tested quarterly.",
+    "Vendors with access to sensitive data must sign a data processing agreement.",
+    "Security awareness training is completed annually by all staff.",
+    "Risk assessments are performed at least annually and after significant changes.",
+    "Audit logs are retained for twelve months and reviewed weekly.",
+    "Patches for critical vulnerabilities are applied within fourteen days.",
+]
+
+HEADINGS = ['PURPOSE', 'SCOPE', 'ROLES AND RESPONSIBILITIES', 'ACCESS CONTROL', 'DATA PROTECTION',
+            'INCIDENT MANAGEMENT', 'RISK MANAGEMENT', 'TRAINING', 'SUPPLIER SECURITY', 'COMPLIANCE']
+
+# Canned response per pipeline stage (metrics.current_stage()); the revision stages echo a policy
+RESPONSES = {
+    'gap_analysis': """GAP ANALYSIS REPORT
+===================
+
+1. CRITICAL GAPS (High Priority)
+- Access control lacks multi-factor authentication (PR.AA-03)
+- No incident classification or escalation procedure (RS.MA-02)
+
+2. SIGNIFICANT GAPS (Medium Priority)
+- Training is limited to onboarding (PR.AT-01)
+- No supplier risk assessment (GV.SC-06)
+
+3. MINOR GAPS (Low Priority)
+- Policy review cadence undefined (GV.PO-02)
+
+4. SUMMARY
+The policy covers basic controls but misses several NIST CSF requirements.""",
+    'roadmap': """POLICY IMPROVEMENT ROADMAP
+==========================
+
+PHASE 1: IMMEDIATE ACTIONS (0-3 months)
+- Action 1: Deploy multi-factor authentication
+  - NIST Function: Protect
+
+PHASE 2: SHORT-TERM IMPROVEMENTS (3-6 months)
+- Action 1: Define incident classification
+
+PHASE 3: LONG-TERM ENHANCEMENTS (6-12 months)
+- Action 1: Continuous security training
+
+NIST FRAMEWORK ALIGNMENT
+- Protect (PR): MFA and training
+- Respond (RS): Incident classification
+
+KEY MILESTONES
+- Month 1: MFA pilot complete
+
+RESOURCE REQUIREMENTS
+- Personnel: 1 security engineer
+
+SUCCESS METRICS
+- MFA coverage: 100% of accounts""",
+    'executive_summary': """EXECUTIVE SUMMARY
+=================
+
+CURRENT STATE:
+The policy provides a basic foundation.
+
+KEY FINDINGS:
+- Missing multi-factor authentication
+- No incident classification
+
+RISK EXPOSURE:
+Account compromise and slow incident response.
+
+RECOMMENDED ACTIONS:
+Deploy MFA and define incident classification.
+
+INVESTMENT REQUIRED:
+One engineer for six months.
+
+EXPECTED OUTCOMES:
+Alignment with the NIST CSF Protect and Respond functions.
+
+TIMELINE:
+12 months.""",
+}
+
+
+class StandInLLM:
+    """Fixed-latency LLM replacement answering each pipeline stage with a template-shaped response."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, prompt, model, timeout, host=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        response = RESPONSES.get(current_stage())
+        if response is None:
+            # Revisions are policy-shaped and close with the marker the prompt asks for
+            response = f"{synthetic_policy(4096, seed=self.calls)}\n\n{END_MARKERS['revised_policy']}"
+        stats = {
+            'wall_time': self.latency,
+            'time_to_first_token': self.latency,
+            'prompt_eval_count': len(prompt) // 4,
+            'eval_count': len(response) // 4,
+        }
+        return response, stats
+
+
+def synthetic_policy(size, seed=0):
+    """Deterministic policy-like text of roughly `size` characters."""
+    rng = random.Random(seed)
+    parts = ["INFORMATION SECURITY POLICY", "Organization: Example Corp", ""]
+    length = sum(len(part) + 1 for part in parts)
+    number = 1
+    while length < size:
+        heading = f"{number}. {HEADINGS[(number - 1) % len(HEADINGS)]}"
+        body = [' '.join(rng.sample(SENTENCES, 3)) for _ in range(rng.randint(1, 4))]
+        for line in [heading] + body + ['']:
+            parts.append(line)
+            length += len(line) + 1
+        number += 1
+    return '\n'.join(parts)[:size]
+
+
+def write_corpus(directory, sizes):
+    """Write synthetic TXT, PDF and DOCX policies; returns {(format, size): path}."""
+    from docx import Document
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    corpus = {}
+    for size_name in sizes:
+        text = synthetic_policy(CORPUS_SIZES[size_name], seed=len(size_name))
+        lines = [line[i:i + 95] for line in text.split('\n') for i in range(0, max(len(line), 1), 95)]
+
+        txt_path = os.path.join(directory, f"policy_{size_name}.txt")
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        corpus[('txt', size_name)] = txt_path
+
+        pdf_path = os.path.join(directory, f"policy_{size_name}.pdf")
+        pdf = canvas.Canvas(pdf_path, pagesize=letter)
+        for start in range(0, len(lines), 60):
+            page = pdf.beginText(40, 750)
+            page.setFont('Helvetica', 8)
+            for line in lines[start:start + 60]:
+                page.textLine(line)
+            pdf.drawText(page)
+            pdf.showPage()
+        pdf.save()
+        corpus[('pdf', size_name)] = pdf_path
+
+        docx_path = os.path.join(directory, f"policy_{size_name}.docx")
+        document = Document()
+        for line in text.split('\n'):
+            document.add_paragraph(line)
+        document.save(docx_path)
+        corpus[('docx', size_name)] = docx_path
+
+    return corpus
+
+
+def markup_report(lines):
+    """LLM-style report of the given line count covering every markup kind."""
+    template = '\n'.join(RESPONSES.values()).split('\n')
+    return '\n'.join(template[index % len(template)] for index in range(lines))
+
+
+def best_time(func, repeat):
+    """Minimum wall time of `repeat` runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmarks(sizes, repeat=3, llm_latency=0.05, batch_size=8):
+    """Run every benchmark and return {name: seconds}."""
+    results = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print("Generating synthetic corpus...")
+        corpus = write_corpus(workdir, sizes)
+
+        for (fmt, size_name), path in sorted(corpus.items()):
+            results[f"extraction.{fmt}.{size_name}"] = best_time(lambda: read_policy_document(path), repeat)
+
+        def cold_framework_load():
+            clear_framework_cache()
+            load_nist_framework(os.path.join('data', 'reference'))
+
+        results['framework_load'] = best_time(cold_framework_load, repeat)
+        results['framework_load.cached'] = best_time(
+            lambda: load_nist_framework(os.path.join('data', 'reference')), repeat)
+        framework = load_nist_framework(os.path.join('data', 'reference'))
+
+        for size_name in sizes:
+            policy = read_policy_document(corpus[('txt', size_name)])
+
+            def build_prompts():
+                build_gap_analysis_prompt(policy, framework)
+                build_revision_prompt(policy, RESPONSES['gap_analysis'], framework)
+                build_roadmap_prompt(RESPONSES['gap_analysis'], 'policy')
+                build_executive_summary_prompt(RESPONSES['gap_analysis'], RESPONSES['roadmap'])
+
+            with redirect_stdout(io.StringIO()):
+                results[f"prompt_building.{size_name}"] = best_time(build_prompts, repeat)
+
+            def parse():
+                extract_gaps_structured(RESPONSES['gap_analysis'])
+                split_policy_sections(policy)
+
+            results[f"parsing.{size_name}"] = best_time(parse, repeat)
+
+        small = read_policy_document(corpus[('txt', sizes[0])])
+        results['parsing.section_state'] = best_time(
+            lambda: build_section_state(small, RESPONSES['gap_analysis'], small), repeat)
+
+        for size_name in ('1kb', '100kb'):
+            if size_name in sizes:
+                report = read_policy_document(corpus[('txt', size_name)])
+                pdf_path = os.path.join(workdir, f"render_{size_name}.pdf")
+                results[f"pdf_render.{size_name}"] = best_time(
+                    lambda: create_pdf_report(report, pdf_path, "Benchmark Report"), repeat)
+
+        report = markup_report(MARKUP_LINES)
+        results['markup.parse'] = best_time(lambda: parse_blocks(report), repeat)
+        blocks = parse_blocks(report)
+        get_styles()
+        results['markup.flowables'] = best_time(lambda: build_story(blocks, get_styles()), repeat)
+        print(f"Markup parsing: {MARKUP_LINES / results['markup.parse']:,.0f} lines/sec, "
+              f"flowables: {MARKUP_LINES / results['markup.flowables']:,.0f} lines/sec")
+
+        results['batch.seconds_per_policy'] = run_batch_benchmark(workdir, llm_latency, batch_size)
+
+    return results
+
+
+def run_batch_benchmark(workdir, llm_latency, batch_size):
+    """Full analyze_policy pipeline over a batch of small policies with the stand-in LLM."""
+    from main import analyze_policy
+
+    batch_dir = os.path.join(workdir, 'batch')
+    output_dir = os.path.join(workdir, 'batch_output')
+    os.makedirs(batch_dir)
+    for index in range(batch_size):
+        with open(os.path.join(batch_dir, f"policy_{index}.txt"), 'w', encoding='utf-8') as f:
+            f.write(synthetic_policy(2048, seed=100 + index))
+
+    set_llm_backend(StandInLLM(llm_latency))
+    try:
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for path in sorted(Path(batch_dir).glob('*.txt')):
+                analyze_policy(str(path), output_dir, incremental=False)
+        elapsed = time.perf_counter() - start
+    finally:
+        set_llm_backend(None)
+
+    return elapsed / batch_size
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print a comparison table; returns the names of regressed benchmarks."""
+    regressions = []
+    print(f"\n{'BENCHMARK':<36} {'BASELINE':>10} {'CURRENT':>10} {'CHANGE':>8}")
+    print('-' * 68)
+    for name, current in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<36} {'-':>10} {current:>10.4f} {'new':>8}")
+            continue
+        change = (current - reference) / reference if reference else 0.0
+        regressed = current > reference * (1 + tolerance) and current - reference > MIN_REGRESSION_SECONDS
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<36} {reference:>10.4f} {current:>10.4f} {change:>+7.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Offline performance benchmarks (no GPU or network needed)')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown before failing (default: 0.25 = 25%%)')
+    parser.add_argument('--quick', action='store_true', help='Only 1KB and 100KB corpora')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions per benchmark (best is kept)')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Stand-in LLM latency per call (seconds)')
+    parser.add_argument('--output', type=str, help='Also write results to this JSON file')
+
+    args = parser.parse_args()
+
+    # Paths such as data/reference are relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    sizes = QUICK_SIZES if args.quick else tuple(CORPUS_SIZES)
+    results = run_benchmarks(sizes, repeat=args.repeat, llm_latency=args.llm_latency)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline updated: {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        compare_to_baseline(results, {}, args.tolerance)
+        # Nothing was checked; a CI job must not mistake this for a pass
+        print(f"\n✗ No baseline at {args.baseline}. Run with --update-baseline to create one.",
+              file=sys.stderr)
+        sys.exit(2)
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}")
+        sys.exit(1)
+    print("\n✓ No performance regressions")
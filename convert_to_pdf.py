@@ -1,56 +1,169 @@
-"""Test script to convert existing text reports to PDF format."""
+"""Convert text reports to PDF format, skipping reports whose PDF is up to date."""
 
 import sys
 import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
 from pdf_generator import create_pdf_report
+from report_model import DOCUMENT_TITLES, COMPREHENSIVE_TITLE
+from checkpoint import RUNS_DIR
+from incremental import STATE_DIR
+from utils import atomic_write
+
+# Report filename suffix -> PDF title
+REPORT_TITLES = {**DOCUMENT_TITLES, 'comprehensive_report': COMPREHENSIVE_TITLE}
+DEFAULT_TITLE = "Policy Analysis Report"
+
+# Hashes of converted reports, kept in the converted directory
+STATE_FILE = '.convert_state.json'
+
+# Directories holding pipeline internals rather than reports
+SKIP_DIRS = {RUNS_DIR, STATE_DIR}
+
+
+def report_title(txt_file):
+    """PDF title for a report, from its filename suffix."""
+    return next((title for key, title in REPORT_TITLES.items() if key in txt_file.name), DEFAULT_TITLE)
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_reports(output_dir, recursive=False):
+    """Text reports in output_dir, optionally including subdirectories."""
+    if not recursive:
+        return sorted(output_dir.glob('*.txt'))
+    return sorted(path for path in output_dir.rglob('*.txt')
+                  if not any(part in SKIP_DIRS or part.endswith('_profile')
+                             for part in path.relative_to(output_dir).parts[:-1]))
+
+
+def needs_conversion(txt_file, pdf_file, entry):
+    """
+    Decide whether a report must be (re)converted.
+
+    Returns:
+        Tuple (convert, state_entry) where state_entry records the report's
+        size, mtime and hash once known
+    """
+    stat = txt_file.stat()
+    if not pdf_file.exists():
+        return True, None
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return False, entry
+
+    current = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(txt_file)}
+    if entry:
+        # Touched or copied but unchanged reports keep their PDF
+        return current['sha256'] != entry['sha256'], current
+    # Reports converted before state was tracked: trust a newer PDF
+    return pdf_file.stat().st_mtime_ns < stat.st_mtime_ns, current
+
+
+def convert_report(txt_path, pdf_path, title):
+    """Convert one report; runs in a worker process."""
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    create_pdf_report(content, pdf_path, title)
+
+
+def load_state(output_dir):
+    try:
+        with open(output_dir / STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def convert_existing_reports(output_dir='output', recursive=False, workers=None, force=False):
+    """
+    Convert new or changed text reports in output_dir to PDF.
+
+    Args:
+        output_dir: Directory holding the text reports
+        recursive: Also convert reports in subdirectories
+        workers: Conversion processes (default: one per CPU)
+        force: Reconvert every report regardless of its state
+
+    Returns:
+        Dictionary with converted, skipped and failed counts
+    """
+    output_dir = Path(output_dir)
+    txt_files = find_reports(output_dir, recursive)
 
-def convert_existing_reports():
-    """Convert all existing text reports in output folder to PDF."""
-    
-    output_dir = Path('output')
-    txt_files = list(output_dir.glob('*.txt'))
-    
     if not txt_files:
         print("No text reports found in output folder.")
-        return
-    
-    print(f"Found {len(txt_files)} text reports to convert\\n")
-    
+        return {'converted': 0, 'skipped': 0, 'failed': 0}
+
+    print(f"Found {len(txt_files)} text reports\n")
+
+    state = load_state(output_dir)
+    keys = {txt_file.relative_to(output_dir).as_posix() for txt_file in txt_files}
+    # Reports this run did not look at (subdirectories of a non-recursive run) keep their entries
+    new_state = {key: entry for key, entry in state.items()
+                 if key not in keys and (output_dir / key).exists()}
+    pending = {}
     for txt_file in txt_files:
-        try:
-            # Read content
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Generate PDF
-            pdf_file = txt_file.with_suffix('.pdf')
-            
-            # Determine title from filename
-            if 'gap_analysis' in txt_file.name:
-                title = "Gap Analysis Report"
-            elif 'revised_policy' in txt_file.name:
-                title = "Revised Policy Document"
-            elif 'roadmap' in txt_file.name:
-                title = "Implementation Roadmap"
-            elif 'executive_summary' in txt_file.name:
-                title = "Executive Summary"
-            elif 'comprehensive' in txt_file.name:
-                title = "Comprehensive Policy Analysis"
-            else:
-                title = "Policy Analysis Report"
-            
-            create_pdf_report(content, str(pdf_file), title)
-            print(f"OK Generated: {pdf_file.name}")
-            
-        except Exception as e:
-            print(f"FAILED to convert {txt_file.name}: {e}")
-    
-    print(f"\\nPDF conversion complete!")
+        key = txt_file.relative_to(output_dir).as_posix()
+        pdf_file = txt_file.with_suffix('.pdf')
+        convert, entry = needs_conversion(txt_file, pdf_file, None if force else state.get(key))
+        if convert:
+            pending[key] = (txt_file, pdf_file)
+        else:
+            new_state[key] = entry
+
+    counts = {'converted': 0, 'skipped': len(txt_files) - len(pending), 'failed': 0}
+
+    if pending:
+        print(f"Converting {len(pending)} new or changed reports ({counts['skipped']} up to date)\n")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(convert_report, str(txt_file), str(pdf_file), report_title(txt_file)): key
+                for key, (txt_file, pdf_file) in pending.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                txt_file, pdf_file = pending[key]
+                try:
+                    future.result()
+                except Exception as e:
+                    counts['failed'] += 1
+                    print(f"FAILED to convert {key}: {e}")
+                    continue
+                stat = txt_file.stat()
+                new_state[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                  'sha256': file_hash(txt_file)}
+                counts['converted'] += 1
+                print(f"OK Generated: {pdf_file.relative_to(output_dir)}")
+
+    atomic_write(json.dumps(new_state, indent=2, sort_keys=True), str(output_dir / STATE_FILE))
+
+    print(f"\nPDF conversion complete: {counts['converted']} converted, "
+          f"{counts['skipped']} skipped, {counts['failed']} failed")
+    return counts
+
 
 if __name__ == '__main__':
-    convert_existing_reports()
+    parser = argparse.ArgumentParser(description='Convert text reports to PDF, skipping up-to-date ones')
+    parser.add_argument('directory', nargs='?', default='output', help='Report directory (default: output)')
+    parser.add_argument('--recursive', '-r', action='store_true', help='Include subdirectories')
+    parser.add_argument('--workers', type=int, help='Conversion processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='Reconvert every report')
+
+    args = parser.parse_args()
+
+    counts = convert_existing_reports(args.directory, args.recursive, args.workers, args.force)
+    sys.exit(1 if counts['failed'] else 0)
@@ -0,0 +1,88 @@
+"""Query the SQLite results store written by `src/main.py --db`."""
+
+import sys
+import os
+import time
+import argparse
+import sqlite3
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from results_store import ResultsStore, DB_NAME
+
+
+def print_rows(rows, columns=None):
+    """Print rows as an aligned text table."""
+    if not rows:
+        print("No results.")
+        return
+    columns = columns or rows[0].keys()
+    table = [[_format(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(values[index]) for values in table))
+              for index, column in enumerate(columns)]
+    print('  '.join(column.upper().ljust(width) for column, width in zip(columns, widths)).rstrip())
+    print('  '.join('-' * width for width in widths))
+    for values in table:
+        print('  '.join(value.ljust(width) for value, width in zip(values, widths)).rstrip())
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Query stored policy analyses',
+        epilog='Example: python query_results.py gaps --control PR.AA --severity critical'
+    )
+    parser.add_argument('--db', type=str, default=os.path.join('output', DB_NAME),
+                        help=f'Results database (default: output/{DB_NAME})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gaps = commands.add_parser('gaps', help='Gaps by control, severity or policy')
+    gaps.add_argument('--control', type=str, help='Function (PR), category (PR.AA) or subcategory (PR.AA-03)')
+    gaps.add_argument('--severity', choices=['critical', 'significant', 'minor'])
+    gaps.add_argument('--policy', type=str, help='Policy name')
+    gaps.add_argument('--all-runs', action='store_true', help='Include superseded analyses')
+
+    commands.add_parser('policies', help='Latest analysis of every policy with gap counts')
+    commands.add_parser('stages', help='Stage timings across all analyses')
+
+    sql = commands.add_parser('sql', help='Run a read-only SQL query')
+    sql.add_argument('query', type=str)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No results database at {args.db}. Run src/main.py with --db first.", file=sys.stderr)
+        sys.exit(1)
+
+    store = ResultsStore(args.db)
+    start = time.perf_counter()
+    if args.command == 'gaps':
+        rows = store.find_gaps(args.control, args.severity, args.policy, latest=not args.all_runs)
+    elif args.command == 'policies':
+        rows = store.policy_summary()
+    elif args.command == 'stages':
+        rows = store.stage_timings()
+    else:
+        store.connection.execute('PRAGMA query_only = ON')
+        try:
+            rows = store.query(args.query)
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}", file=sys.stderr)
+            sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print_rows(rows)
+    print(f"\n{len(rows)} row(s) in {elapsed * 1000:.1f} ms")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Asyncio pipeline API for running many policy analyses from one event loop."""
+
+import asyncio
+import os
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from utils import read_policy_document, new_run_id, to_thread
+from gap_analyzer import load_nist_framework, build_gap_analysis_prompt, call_local_llm_async
+from policy_reviser import build_revision_prompt
+from roadmap_generator import build_roadmap_prompt, build_executive_summary_prompt
+from metrics import RunMetrics, collect_metrics, timed_stage
+from deadlines import Deadline, DeadlineExceeded, within_deadline, stage_history, save_partial
+from report_model import ReportModel
+from report_writers import write_reports
+from validation import strip_end_marker
+
+# Concurrent LLM calls allowed by analyze_policies_async() when no limit is given
+DEFAULT_LLM_CONCURRENCY = 2
+
+
+def _emitter(progress, policy_name):
+    """Event callback bound to one policy; a no-op when progress is None."""
+    def emit(event, **details):
+        if progress is not None:
+            progress({'policy': policy_name, 'event': event, 'time': time.time(), **details})
+    return emit
+
+
+async def _stage(emit, name, compute, timed=True):
+    """Run one pipeline stage, reporting its start and end."""
+    emit('stage_started', stage=name)
+    start = time.perf_counter()
+    with timed_stage(name) if timed else nullcontext():
+        result = await compute()
+    emit('stage_completed', stage=name, elapsed=time.perf_counter() - start)
+    return result
+
+
+async def _llm_stage(emit, name, prompt, limiter, completed):
+    """Run an LLM stage and add its result to the `completed` stages."""
+    async def compute():
+        if limiter is None:
+            return await call_local_llm_async(prompt, stage=name)
+        async with limiter:
+            return await call_local_llm_async(prompt, stage=name)
+    completed[name] = strip_end_marker(name, await _stage(emit, name, compute))
+    return completed[name]
+
+
+async def analyze_policy_async(policy_path, output_dir='output', limiter=None, progress=None,
+                               formats=('txt',), pdf_workers=1, store=None, deadline=None):
+    """
+    Analyze one policy without blocking the event loop.
+
+    Runs the same prompts and writes the same reports as analyze_policy()
+    but reports progress as events instead of printing. Extraction,
+    framework loading and report writing run in worker threads; LLM calls
+    run as asyncio subprocesses. Cancelling the task stops the running
+    Ollama process.
+
+    Args:
+        policy_path: Path to policy document (TXT, PDF, or DOCX)
+        output_dir: Directory to save output reports
+        limiter: Optional asyncio.Semaphore shared by concurrent analyses
+            to bound the number of simultaneous LLM calls
+        progress: Optional callable receiving event dictionaries with
+            policy, event (started, stage_started, stage_completed,
+            completed, failed or cancelled), time and stage details
+        formats: Report formats to write (txt, pdf, md, html, docx)
+        pdf_workers: Processes rendering the PDFs
+        store: Optional ResultsStore recording the analysis
+        deadline: Optional time budget in seconds shared across the LLM
+            stages as in analyze_policy(); a call running past it is killed,
+            the stages completed so far are saved as
+            <output_base>_partial.json and the analysis fails with
+            DeadlineExceeded
+
+    Returns:
+        Dictionary containing all analysis results and metrics
+    """
+    policy_name = Path(policy_path).stem
+    emit = _emitter(progress, policy_name)
+    metrics = RunMetrics(policy_name)
+    output_base = os.path.join(output_dir, f"{policy_name}_{new_run_id()}")
+    completed = {}
+    emit('started', path=str(policy_path))
+
+    try:
+        # Tasks own a copy of the context, so each analysis collects its own metrics
+        budget = Deadline(deadline, stage_history(output_dir)) if deadline else None
+        with collect_metrics(metrics), within_deadline(budget):
+            policy_content = await _stage(emit, 'extraction',
+                                          lambda: to_thread(read_policy_document, policy_path))
+            nist_framework = await _stage(emit, 'framework_load', lambda: to_thread(
+                load_nist_framework, os.path.join('data', 'reference')))
+
+            gap_analysis = await _llm_stage(emit, 'gap_analysis',
+                                            build_gap_analysis_prompt(policy_content, nist_framework),
+                                            limiter, completed)
+            revised_policy = await _llm_stage(
+                emit, 'revised_policy',
+                build_revision_prompt(policy_content, gap_analysis, nist_framework), limiter, completed)
+            roadmap = await _llm_stage(emit, 'roadmap', build_roadmap_prompt(gap_analysis, policy_name),
+                                       limiter, completed)
+            exec_summary = await _llm_stage(emit, 'executive_summary',
+                                            build_executive_summary_prompt(gap_analysis, roadmap),
+                                            limiter, completed)
+
+            report = ReportModel(policy_name, {
+                'gap_analysis': gap_analysis,
+                'revised_policy': revised_policy,
+                'roadmap': roadmap,
+                'executive_summary': exec_summary
+            })
+            # The writers time their own stages
+            files = await _stage(emit, 'reports', lambda: to_thread(
+                write_reports, report, output_base, formats, pdf_workers, lambda message: None),
+                timed=False)
+    except asyncio.CancelledError:
+        emit('cancelled')
+        raise
+    except DeadlineExceeded as e:
+        files = await to_thread(save_partial, policy_path, output_base, completed, metrics, e)
+        emit('failed', error=str(e), partial=files[0])
+        raise
+    except Exception as e:
+        emit('failed', error=str(e))
+        raise
+
+    if budget is not None:
+        metrics.deadline = {'budget': budget.seconds, 'elapsed': budget.elapsed(), 'exceeded': False}
+    metrics.save(f"{output_base}_metrics.json")
+    files.append(f"{output_base}_metrics.json")
+    results = {
+        'policy_name': policy_name,
+        'gap_analysis': gap_analysis,
+        'revised_policy': revised_policy,
+        'roadmap': roadmap,
+        'executive_summary': exec_summary,
+        'output_base': output_base,
+        'files': files,
+        'metrics': metrics.to_dict()
+    }
+    if store is not None:
+        await to_thread(store.record_policy, results, policy_path)
+
+    emit('completed', output_base=output_base, total_time=metrics.total_time)
+    return results
+
+
+async def analyze_policies_async(policy_paths, output_dir='output', max_concurrent_llm=DEFAULT_LLM_CONCURRENCY,
+                                 progress=None, **options):
+    """
+    Analyze many policies concurrently on the running event loop.
+
+    All analyses share one limit of `max_concurrent_llm` simultaneous LLM
+    calls. A failed analysis does not stop the others.
+
+    Returns:
+        List with each policy's results dictionary, or the exception it raised
+    """
+    limiter = asyncio.Semaphore(max_concurrent_llm)
+    return await asyncio.gather(
+        *(analyze_policy_async(path, output_dir, limiter=limiter, progress=progress, **options)
+          for path in policy_paths),
+        return_exceptions=True)
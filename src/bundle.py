@@ -0,0 +1,103 @@
+"""Single-file zip bundles of a run's reports with a hashed manifest."""
+
+import hashlib
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from utils import atomic_path
+
+BUNDLE_MANIFEST = 'manifest.json'
+
+# Already-compressed formats are stored rather than deflated again
+STORED_EXTENSIONS = {'.pdf', '.docx', '.zip'}
+
+
+def _add_file(bundle, path, arcname):
+    """Copy a file into the bundle, hashing it in the same pass."""
+    digest = hashlib.sha256()
+    size = 0
+    compression = zipfile.ZIP_STORED if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS \
+        else zipfile.ZIP_DEFLATED
+    info = zipfile.ZipInfo.from_file(path, arcname)
+    info.compress_type = compression
+    with open(path, 'rb') as source, bundle.open(info, 'w') as target:
+        for chunk in iter(lambda: source.read(1 << 20), b''):
+            digest.update(chunk)
+            size += len(chunk)
+            target.write(chunk)
+    return {'name': arcname, 'bytes': size, 'sha256': digest.hexdigest()}
+
+
+def write_run_bundle(run, bundle_path=None):
+    """
+    Write every report of a run's completed policies, and the partial
+    results of interrupted ones, into one zip archive.
+
+    The archive holds one folder per policy plus a manifest.json listing
+    each file's size and SHA-256, and is written atomically.
+
+    Args:
+        run: RunCheckpoint of the run
+        bundle_path: Archive path (default: <output_dir>/run_<run_id>.zip)
+
+    Returns:
+        Path of the written bundle
+    """
+    output_dir = run.manifest['output_dir']
+    bundle_path = bundle_path or os.path.join(output_dir, f"run_{run.run_id}.zip")
+
+    manifest = {
+        'run_id': run.run_id,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'policies': [],
+        'files': []
+    }
+
+    with atomic_path(bundle_path) as temp_path:
+        with zipfile.ZipFile(temp_path, 'w', compresslevel=6) as bundle:
+            for entry in run.manifest['policies']:
+                # Interrupted policies contribute their partial results
+                if entry['status'] not in ('complete', 'interrupted'):
+                    continue
+                files = []
+                for path in entry.get('files', []):
+                    if os.path.exists(path):
+                        files.append(_add_file(bundle, path, f"{entry['slug']}/{os.path.basename(path)}"))
+                manifest['policies'].append({
+                    'path': entry['path'],
+                    'slug': entry['slug'],
+                    'status': entry['status'],
+                    'output_base': entry['output_base'],
+                    'files': files
+                })
+
+            batch_metrics = os.path.join(run.run_dir, 'batch_metrics.json')
+            if os.path.exists(batch_metrics):
+                manifest['files'].append(_add_file(bundle, batch_metrics, 'batch_metrics.json'))
+
+            bundle.writestr(BUNDLE_MANIFEST, json.dumps(manifest, indent=2))
+
+    return bundle_path
+
+
+def verify_bundle(bundle_path):
+    """
+    Check every file in a bundle against its manifest hash.
+
+    Returns:
+        List of archive names whose contents do not match
+    """
+    mismatched = []
+    with zipfile.ZipFile(bundle_path) as bundle:
+        manifest = json.loads(bundle.read(BUNDLE_MANIFEST))
+        entries = manifest['files'] + [item for policy in manifest['policies'] for item in policy['files']]
+        for item in entries:
+            digest = hashlib.sha256()
+            with bundle.open(item['name']) as source:
+                for chunk in iter(lambda: source.read(1 << 20), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != item['sha256']:
+                mismatched.append(item['name'])
+    return mismatched
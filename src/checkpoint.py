@@ -0,0 +1,139 @@
+"""Checkpointed pipeline runs that can be resumed after a crash or timeout."""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from utils import atomic_write, new_run_id
+
+# Run directories live under the output directory
+RUNS_DIR = 'runs'
+MANIFEST_NAME = 'manifest.json'
+
+
+class RunCheckpoint:
+    """A run directory holding a manifest and every completed stage result."""
+
+    def __init__(self, run_dir, manifest):
+        self.run_dir = run_dir
+        self.manifest = manifest
+        # Batch workers update their own entries concurrently; the manifest is saved whole
+        self.lock = threading.RLock()
+
+    @classmethod
+    def create(cls, output_dir, policy_paths):
+        """Start a new run for the given policies."""
+        run_id = new_run_id()
+        run_dir = os.path.join(output_dir, RUNS_DIR, run_id)
+        manifest = {
+            'run_id': run_id,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'output_dir': output_dir,
+            'policies': [
+                {
+                    'path': str(path),
+                    'slug': f"{index:03d}_{Path(path).stem}",
+                    'status': 'pending',
+                    'output_base': None,
+                    'stages': {}
+                }
+                for index, path in enumerate(policy_paths)
+            ]
+        }
+        checkpoint = cls(run_dir, manifest)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, run, output_dir='output'):
+        """Open an existing run by directory path or by run ID under output_dir."""
+        run_dir = run if os.path.isdir(run) else os.path.join(output_dir, RUNS_DIR, run)
+        manifest_path = os.path.join(run_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No run manifest found: {manifest_path}")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return cls(run_dir, json.load(f))
+
+    @property
+    def run_id(self):
+        return self.manifest['run_id']
+
+    def save(self):
+        """Persist the manifest atomically."""
+        with self.lock:
+            self.manifest['updated'] = datetime.now().isoformat(timespec='seconds')
+            content = json.dumps(self.manifest, indent=2)
+            atomic_write(content, os.path.join(self.run_dir, MANIFEST_NAME))
+
+    def pending(self):
+        """Policy paths not yet completed, in original order."""
+        return [entry['path'] for entry in self.manifest['policies'] if entry['status'] != 'complete']
+
+    def policy(self, policy_path):
+        """Checkpoint handle for one policy of this run."""
+        for entry in self.manifest['policies']:
+            if entry['path'] == str(policy_path):
+                return PolicyCheckpoint(self, entry)
+        raise KeyError(f"Policy not part of run {self.run_id}: {policy_path}")
+
+
+class PolicyCheckpoint:
+    """Stage results of a single policy within a run."""
+
+    def __init__(self, run, entry):
+        self.run = run
+        self.entry = entry
+
+    @property
+    def output_base(self):
+        return self.entry['output_base']
+
+    def start(self, output_base):
+        """Mark the policy as running and fix its report file prefix."""
+        with self.run.lock:
+            self.entry['status'] = 'running'
+            self.entry['output_base'] = self.entry['output_base'] or output_base
+            self.run.save()
+        return self.entry['output_base']
+
+    def load_stage(self, stage):
+        """Return a completed stage result, or None if the stage must run."""
+        if stage not in self.entry['stages']:
+            return None
+        path = os.path.join(self.run.run_dir, self.entry['stages'][stage]['file'])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save_stage(self, stage, result):
+        """Write a stage result, then record it in the manifest."""
+        relative = os.path.join(self.entry['slug'], f"{stage}.txt")
+        atomic_write(result, os.path.join(self.run.run_dir, relative))
+        with self.run.lock:
+            self.entry['stages'][stage] = {
+                'file': relative,
+                'completed': datetime.now().isoformat(timespec='seconds')
+            }
+            self.run.save()
+
+    def interrupt(self, reason, files=None):
+        """Mark the policy as stopped early; it stays pending so a resumed run finishes it."""
+        with self.run.lock:
+            self.entry['status'] = 'interrupted'
+            self.entry['reason'] = reason
+            if files is not None:
+                self.entry['files'] = files
+            self.run.save()
+
+    def complete(self, files=None):
+        """Mark the policy as done, recording the report files it produced."""
+        with self.run.lock:
+            self.entry['status'] = 'complete'
+            self.entry.pop('reason', None)
+            if files is not None:
+                self.entry['files'] = files
+            self.run.save()
@@ -0,0 +1,127 @@
+"""Single-flight coalescing: concurrent identical LLM calls share one generation."""
+
+import asyncio
+import hashlib
+import threading
+
+
+def flight_key(prompt, model):
+    """Fingerprint of a model and prompt identifying identical requests."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode('utf-8')).hexdigest()
+
+
+class FlightTimeout(TimeoutError):
+    """A caller gave up waiting for an identical call in flight."""
+
+    def __init__(self, timeout):
+        super().__init__(f"Identical call still in flight after {timeout:g} seconds")
+        self.timeout = timeout
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run a call once per key at a time; callers arriving while it is in
+    flight wait for it and receive the same result or exception.
+
+    Each caller waits at most its own `timeout`, and errors for which the
+    caller's `retry(error)` is true (e.g. the leader running out of its own
+    deadline) make the caller run its call itself, once.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        # (event loop, key) -> [task, number of waiting callers]
+        self.tasks = {}
+
+    def do(self, key, call, timeout=None, retry=None):
+        """
+        Run `call()` unless an identical call is already in flight.
+
+        Args:
+            timeout: Seconds to wait for a call in flight; None waits for it
+            retry: Optional predicate on the error of a call in flight; if
+                true, `call()` is run by this caller instead
+
+        Returns:
+            Tuple (result, shared) where shared is True if another caller
+            ran the call
+
+        Raises:
+            FlightTimeout: If the call in flight outlasted `timeout`
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise FlightTimeout(timeout)
+            if flight.error is None:
+                return flight.result, True
+            if retry is None or not retry(flight.error):
+                raise flight.error
+            return call(), False
+
+        try:
+            flight.result = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    async def do_async(self, key, call, timeout=None, retry=None):
+        """
+        Await `call()` unless an identical call is already in flight on this loop.
+
+        The shared call is cancelled only when every caller waiting on it
+        has been cancelled or has timed out.
+
+        Returns:
+            Tuple (result, shared) as for do()
+        """
+        task_key = (asyncio.get_running_loop(), key)
+        entry = self.tasks.get(task_key)
+        if entry is not None and entry[0].done():
+            entry = None
+        shared = entry is not None
+        if not shared:
+            entry = self.tasks[task_key] = [asyncio.ensure_future(call()), 0]
+            entry[0].add_done_callback(
+                lambda _: self.tasks.pop(task_key) if self.tasks.get(task_key) is entry else None)
+
+        entry[1] += 1
+        try:
+            if not shared:
+                return await asyncio.shield(entry[0]), False
+            try:
+                return await asyncio.wait_for(asyncio.shield(entry[0]), timeout), True
+            except asyncio.TimeoutError:
+                if entry[0].done():
+                    raise
+                if entry[1] == 1:
+                    entry[0].cancel()
+                raise FlightTimeout(timeout) from None
+        except asyncio.CancelledError:
+            if entry[1] == 1:
+                entry[0].cancel()
+            raise
+        except Exception as e:
+            if not shared or retry is None or not retry(e) or not entry[0].done():
+                raise
+        finally:
+            entry[1] -= 1
+        return await call(), False
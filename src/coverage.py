@@ -0,0 +1,209 @@
+"""Library-wide NIST control coverage using a vectorized TF-IDF similarity matrix."""
+
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from utils import read_policy_document, split_policy_sections
+
+# Similarity thresholds for coverage status
+COVERED_THRESHOLD = 0.25
+PARTIAL_THRESHOLD = 0.12
+
+CONTROL_PATTERN = re.compile(r'^([A-Z]{2}\.[A-Z]{2})\s*-\s*(\d{2})\b\s*(.*)$')
+TOKEN_PATTERN = re.compile(r'[a-z][a-z0-9]+')
+
+STOP_WORDS = frozenset("""
+a an and are as at be been by for from has have in into is it its of on or
+that the their this to was were which will with within all any may must shall
+should such these those other policy policies organization organizational
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stop words removed."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def extract_framework_controls(nist_framework):
+    """Parse control IDs (e.g. PR.AA-01) and their descriptions from framework text."""
+    controls = {}
+    current_id = None
+
+    for line in nist_framework.split('\n'):
+        line = line.strip()
+        match = CONTROL_PATTERN.match(line)
+        if match:
+            current_id = f"{match.group(1)}-{match.group(2)}"
+            if current_id in controls:
+                current_id = None
+            else:
+                controls[current_id] = match.group(3)
+        elif current_id and line and not line.startswith(('•', 'NIST')) and not line[0].isdigit():
+            controls[current_id] += ' ' + line
+        else:
+            current_id = None
+
+    return controls
+
+
+def _tfidf_matrices(section_tokens, control_tokens):
+    """Build L2-normalised TF-IDF matrices restricted to the control vocabulary."""
+    counts = [Counter(tokens) for tokens in section_tokens + control_tokens]
+    doc_freq = Counter()
+    for count in counts:
+        doc_freq.update(count.keys())
+
+    n_docs = len(counts)
+    idf = {term: math.log((1 + n_docs) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+    # Terms absent from every control cannot contribute to a similarity score,
+    # so only control vocabulary becomes a matrix column. Norms use all terms.
+    vocab = {}
+    for tokens in control_tokens:
+        for term in tokens:
+            vocab.setdefault(term, len(vocab))
+
+    matrix = np.zeros((n_docs, len(vocab)), dtype=np.float32)
+    for row, count in enumerate(counts):
+        norm = 0.0
+        for term, tf in count.items():
+            weight = (1 + math.log(tf)) * idf[term]
+            norm += weight * weight
+            col = vocab.get(term)
+            if col is not None:
+                matrix[row, col] = weight
+        if norm:
+            matrix[row] /= math.sqrt(norm)
+
+    return matrix[:len(section_tokens)], matrix[len(section_tokens):]
+
+
+def compute_coverage(policies, nist_framework):
+    """
+    Compute control-by-policy coverage for a library of policies.
+
+    Args:
+        policies: Dictionary mapping policy name to policy text
+        nist_framework: Framework text from load_nist_framework()
+
+    Returns:
+        Dictionary with control IDs, policy names, the policies x controls
+        best-score matrix and per-control best coverage across the library;
+        with no policies every control is uncovered
+    """
+    controls = extract_framework_controls(nist_framework)
+    if not controls:
+        raise ValueError("No NIST control identifiers found in framework reference")
+
+    policy_names = list(policies)
+    control_ids = list(controls)
+    if not policy_names:
+        return {
+            'controls': control_ids,
+            'policies': [],
+            'matrix': np.zeros((0, len(control_ids)), dtype=np.float32),
+            'per_control': [{'control': cid, 'description': controls[cid].strip(), 'score': 0.0,
+                             'status': 'uncovered', 'best_policy': None, 'best_section': None}
+                            for cid in control_ids]
+        }
+
+    section_tokens = []
+    section_refs = []
+    offsets = []
+    for name in policy_names:
+        sections = split_policy_sections(policies[name]) or [('PREAMBLE', '')]
+        offsets.append(len(section_refs))
+        for heading, text in sections:
+            section_tokens.append(tokenize(text))
+            section_refs.append((name, heading))
+
+    control_tokens = [tokenize(f"{cid} {controls[cid]}") for cid in control_ids]
+
+    section_matrix, control_matrix = _tfidf_matrices(section_tokens, control_tokens)
+    similarity = section_matrix @ control_matrix.T
+
+    # Best section score per policy, then best policy per control
+    policy_scores = np.maximum.reduceat(similarity, offsets, axis=0)
+    best_rows = similarity.argmax(axis=0)
+    best_scores = similarity[best_rows, np.arange(len(control_ids))]
+
+    per_control = []
+    for col, cid in enumerate(control_ids):
+        score = float(best_scores[col])
+        if score >= COVERED_THRESHOLD:
+            status = 'covered'
+        elif score >= PARTIAL_THRESHOLD:
+            status = 'partial'
+        else:
+            status = 'uncovered'
+        policy_name, heading = section_refs[best_rows[col]]
+        per_control.append({
+            'control': cid,
+            'description': controls[cid].strip(),
+            'score': score,
+            'status': status,
+            'best_policy': policy_name,
+            'best_section': heading
+        })
+
+    return {
+        'controls': control_ids,
+        'policies': policy_names,
+        'matrix': policy_scores,
+        'per_control': per_control
+    }
+
+
+def load_policy_library(policy_paths):
+    """
+    Read every policy once, skipping unreadable files with a warning.
+
+    Returns:
+        Dictionary keyed by each path relative to the policies' common
+        directory, so isms.txt and isms.pdf stay distinct
+    """
+    policy_paths = list(policy_paths)
+    if not policy_paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in policy_paths])
+    policies = {}
+    for path in policy_paths:
+        try:
+            policies[os.path.relpath(os.path.abspath(path), root)] = read_policy_document(str(path))
+        except (ValueError, OSError) as e:
+            print(f"WARNING: Skipping {path} for coverage: {e}")
+    return policies
+
+
+def format_coverage_report(coverage):
+    """Render coverage results as a plain-text report."""
+    per_control = coverage['per_control']
+    counts = Counter(item['status'] for item in per_control)
+
+    lines = [
+        "CONTROL COVERAGE REPORT",
+        "=======================",
+        f"Policies analyzed: {len(coverage['policies'])}",
+        f"Framework controls: {len(per_control)}",
+        f"Covered: {counts['covered']}  Partial: {counts['partial']}  Uncovered: {counts['uncovered']}",
+        ""
+    ]
+
+    for status, title in (('uncovered', 'UNCOVERED CONTROLS'),
+                          ('partial', 'PARTIALLY COVERED CONTROLS'),
+                          ('covered', 'COVERED CONTROLS')):
+        items = sorted((item for item in per_control if item['status'] == status),
+                       key=lambda item: item['score'])
+        lines.append(f"{title} ({len(items)})")
+        lines.append('-' * 40)
+        for item in items:
+            best = f"{item['best_policy']} / {item['best_section']}" if item['score'] > 0 else "none"
+            lines.append(f"- {item['control']} [{item['score']:.2f}] best: {best}")
+            lines.append(f"  {item['description'][:150]}")
+        lines.append("")
+
+    return '\n'.join(lines)
@@ -0,0 +1,235 @@
+"""Time budgets for policies and batches, shared out across the remaining pipeline stages."""
+
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils import save_output
+
+# Stages of one policy's pipeline in order; 'reports' covers every report writer
+PIPELINE_STAGES = ('gap_analysis', 'revised_policy', 'roadmap', 'executive_summary', 'reports')
+
+# Expected seconds per stage before any history exists (the estimates the CLI prints)
+DEFAULT_STAGE_SECONDS = {
+    'gap_analysis': 90.0,
+    'revised_policy': 150.0,
+    'roadmap': 90.0,
+    'executive_summary': 45.0,
+    'reports': 10.0
+}
+
+HISTORY_RUNS = 50  # most recent metrics files learned from
+HISTORY_SAMPLES = 200  # most recent samples kept per stage
+
+_current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+# StageHistory per output directory, loaded on first use
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+class DeadlineExceeded(RuntimeError):
+    """A policy or batch ran out of its time budget."""
+
+    def __init__(self, stage, budget, elapsed):
+        super().__init__(f"Deadline of {budget:.4g}s exceeded during {stage or 'analysis'} "
+                         f"after {elapsed:.0f}s")
+        self.stage = stage
+        self.budget = budget
+        self.elapsed = elapsed
+
+
+class StageHistory:
+    """Typical stage and LLM call durations learned from earlier runs' metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # stage -> seconds the stage's LLM calls took per policy
+        self.stages = {}
+        # stage -> (prompt characters, seconds) of single LLM calls
+        self.calls = {}
+
+    @classmethod
+    def load(cls, output_dir, limit=HISTORY_RUNS):
+        """History from the most recent per-policy metrics files in an output directory."""
+        history = cls()
+        paths = glob.glob(os.path.join(glob.escape(output_dir), '*_metrics.json'))
+        for path in sorted(paths, key=os.path.getmtime)[-limit:]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    history.add(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return history
+
+    def add(self, metrics):
+        """Learn from one policy's metrics dictionary (RunMetrics.to_dict())."""
+        totals = {}
+        with self.lock:
+            for call in metrics.get('llm_calls', []):
+                stage, wall_time = call.get('stage'), call.get('wall_time')
+                if not stage or not wall_time:
+                    continue
+                totals[stage] = totals.get(stage, 0.0) + wall_time
+                self._sample(self.calls, stage, (call.get('prompt_chars') or 0, wall_time))
+            reports = sum(stage['wall_time'] for stage in metrics.get('stages', [])
+                          if stage['stage'] == 'save_reports' or stage['stage'].endswith('_generation'))
+            if reports:
+                totals['reports'] = reports
+            for stage, seconds in totals.items():
+                self._sample(self.stages, stage, seconds)
+
+    @staticmethod
+    def _sample(samples, stage, value):
+        values = samples.setdefault(stage, [])
+        values.append(value)
+        del values[:-HISTORY_SAMPLES]
+
+    def stage_seconds(self, stage):
+        """Expected duration of a stage for one policy."""
+        with self.lock:
+            values = self.stages.get(stage)
+            if not values:
+                return DEFAULT_STAGE_SECONDS.get(stage, 0.0)
+            return sum(values) / len(values)
+
+    def call_seconds(self, stage, prompt_chars):
+        """Expected duration of one LLM call of a stage with a prompt of the given size."""
+        with self.lock:
+            calls = self.calls.get(stage)
+        if not calls:
+            return self.stage_seconds(stage)
+        mean_chars = sum(chars for chars, _ in calls) / len(calls)
+        mean_seconds = sum(seconds for _, seconds in calls) / len(calls)
+        if not mean_chars:
+            return mean_seconds
+        # Prompt evaluation grows with the prompt; generation length roughly does not
+        return mean_seconds * (0.5 + 0.5 * prompt_chars / mean_chars)
+
+
+def stage_history(output_dir):
+    """The shared StageHistory of an output directory."""
+    key = os.path.abspath(output_dir)
+    with _histories_lock:
+        if key not in _histories:
+            _histories[key] = StageHistory.load(output_dir)
+        return _histories[key]
+
+
+def record_history(output_dir, metrics):
+    """Add a finished policy's metrics to its output directory's history, if loaded."""
+    with _histories_lock:
+        history = _histories.get(os.path.abspath(output_dir))
+    if history is not None:
+        history.add(metrics)
+
+
+class Deadline:
+    """A wall-clock budget that LLM calls draw their timeouts from."""
+
+    def __init__(self, seconds, history=None):
+        self.seconds = seconds
+        self.history = history or StageHistory()
+        self.started = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return self.seconds - self.elapsed()
+
+    def exceeded(self, stage=None):
+        """DeadlineExceeded describing this budget running out during `stage`."""
+        return DeadlineExceeded(stage, self.seconds, self.elapsed())
+
+    def share(self, count, workers=1):
+        """Seconds each of `count` queued items may use when `workers` of them run at once."""
+        if count <= 0:
+            return self.remaining()
+        return self.remaining() * min(workers, count) / count
+
+    def call_timeout(self, stage, prompt_chars):
+        """
+        Timeout for an LLM call of `stage`, leaving time for the stages after it.
+
+        With slack a call may use whatever the later stages do not typically
+        need; a tight budget is shared in proportion to expected durations.
+        Calls outside the pipeline stages may use the whole remaining budget.
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.exceeded(stage)
+        if stage not in PIPELINE_STAGES:
+            return remaining
+        current = self.history.call_seconds(stage, prompt_chars)
+        later = sum(self.history.stage_seconds(name)
+                    for name in PIPELINE_STAGES[PIPELINE_STAGES.index(stage) + 1:])
+        return max(remaining - later, remaining * current / (current + later))
+
+
+def current_deadline():
+    """The Deadline bounding the current context, or None."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def within_deadline(deadline):
+    """Bound the LLM calls made in this context by `deadline`; None leaves them unbounded."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def llm_timeout(stage, prompt_chars, limit):
+    """
+    Timeout for an LLM call under the current deadline.
+
+    Returns:
+        Tuple (timeout, budgeted) where budgeted is True if the deadline,
+        not `limit`, set the timeout
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return limit, False
+    timeout = deadline.call_timeout(stage, prompt_chars)
+    return min(timeout, limit), timeout < limit
+
+
+def save_partial(policy_path, output_base, stages, metrics, error):
+    """
+    Record the stages a policy completed before its deadline ran out.
+
+    Args:
+        policy_path: Path of the policy document
+        output_base: Output path prefix of the analysis
+        stages: Dictionary of completed stage name -> result
+        metrics: RunMetrics of the analysis; saved with the exceeded deadline
+        error: The DeadlineExceeded raised
+
+    Returns:
+        Paths of the partial results and metrics files written
+    """
+    metrics.deadline = {'budget': error.budget, 'elapsed': error.elapsed, 'exceeded': True,
+                        'stage': error.stage}
+    metrics.save(f"{output_base}_metrics.json")
+    save_output(json.dumps({
+        'policy_name': Path(policy_path).stem,
+        'policy_path': str(policy_path),
+        'status': 'deadline_exceeded',
+        'stage': error.stage,
+        'budget': error.budget,
+        'elapsed': error.elapsed,
+        'completed_stages': list(stages),
+        'results': stages
+    }, indent=2), f"{output_base}_partial.json")
+    return [f"{output_base}_partial.json", f"{output_base}_metrics.json"]
@@ -0,0 +1,146 @@
+"""Duplicate and near-duplicate policy detection using MinHash with LSH banding."""
+
+import hashlib
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# MinHash / LSH parameters (32 bands x 4 rows detects Jaccard >= ~0.5 candidates)
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Policies a long-running service remembers; the oldest are forgotten first
+SERVICE_MAX_ENTRIES = 1000
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240101)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so formatting-only edits compare equal."""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def fingerprint_text(text):
+    """Stable content fingerprint of normalized text."""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """Hash word k-shingles of normalized text to 32-bit integers."""
+    words = normalize_text(text).split()
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+            for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text):
+    """MinHash signature over all shingles, computed in one vectorized pass."""
+    hashes = np.fromiter(shingle_hashes(text), dtype=np.uint64)
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+class DuplicateIndex:
+    """
+    In-memory index of analyzed policies for exact and near-duplicate lookup.
+
+    Safe to share between the workers of a batch or service.
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, max_entries=None):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        # Oldest entries are evicted beyond this many; None keeps every entry
+        self.max_entries = max_entries
+        self.exact = {}
+        self.fingerprints = {}
+        self.signatures = {}
+        self.payloads = {}
+        self.buckets = {}
+
+    def _bands(self, signature):
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        for band in range(LSH_BANDS):
+            yield band, signature[band * rows:(band + 1) * rows].tobytes()
+
+    def add(self, key, text, payload):
+        """Register an analyzed policy and the results to reuse for its duplicates."""
+        signature = minhash_signature(text)
+        fingerprint = fingerprint_text(text)
+        with self.lock:
+            self._remove(key)
+            self.exact.setdefault(fingerprint, key)
+            self.fingerprints[key] = fingerprint
+            self.signatures[key] = signature
+            self.payloads[key] = payload
+            for band in self._bands(signature):
+                self.buckets.setdefault(band, set()).add(key)
+            if self.max_entries is not None:
+                while len(self.payloads) > self.max_entries:
+                    self._remove(next(iter(self.payloads)))
+
+    def remove(self, key):
+        """Forget a policy; unknown keys are ignored."""
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        del self.payloads[key]
+        fingerprint = self.fingerprints.pop(key)
+        if self.exact.get(fingerprint) == key:
+            del self.exact[fingerprint]
+            # Another policy with the same text takes over the exact match
+            other = next((other for other, value in self.fingerprints.items() if value == fingerprint), None)
+            if other is not None:
+                self.exact[fingerprint] = other
+        for band in self._bands(signature):
+            bucket = self.buckets[band]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[band]
+
+    def find(self, text):
+        """
+        Look up the closest analyzed policy.
+
+        Returns:
+            Tuple (kind, key, payload, similarity) where kind is 'exact',
+            'near' or None when no neighbor passes the threshold
+        """
+        fingerprint = fingerprint_text(text)
+        with self.lock:
+            key = self.exact.get(fingerprint)
+            if key is not None:
+                return 'exact', key, self.payloads[key], 1.0
+
+        signature = minhash_signature(text)
+        with self.lock:
+            candidates = set()
+            for band in self._bands(signature):
+                candidates |= self.buckets.get(band, set())
+
+            best_key, best_score = None, 0.0
+            for candidate in candidates:
+                score = estimate_similarity(signature, self.signatures[candidate])
+                if score > best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is not None and best_score >= self.threshold:
+                return 'near', best_key, self.payloads[best_key], best_score
+            return None, None, None, best_score
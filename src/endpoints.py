@@ -0,0 +1,302 @@
+"""Load balancing of LLM calls across several Ollama servers."""
+
+import asyncio
+import logging
+import os
+import subprocess
+import threading
+import time
+
+from llm_backend import OllamaConnectionError
+from utils import to_thread
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT_CONCURRENCY = 1  # requests one Ollama server handles at a time
+HEALTH_CHECK_TIMEOUT = 10  # seconds allowed for `ollama list` against an endpoint
+HEALTH_RETRY_INTERVAL = 30  # seconds before a failed endpoint is probed again
+RETRY_BACKOFF = 1.0  # first delay before the last usable endpoint is retried; doubles per failure
+LAST_ENDPOINT_RETRIES = 2  # retries of the last usable endpoint before its error is raised
+
+# Schedulers shared by every call naming the same endpoint list
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def parse_endpoint(spec):
+    """
+    Parse 'host:port' with an optional '=N' concurrency cap.
+
+    Returns:
+        Tuple (host, max_concurrent)
+    """
+    host, _, cap = spec.strip().partition('=')
+    if not host:
+        raise ValueError(f"Invalid endpoint: {spec!r}")
+    try:
+        max_concurrent = int(cap) if cap else DEFAULT_ENDPOINT_CONCURRENCY
+    except ValueError:
+        raise ValueError(f"Invalid concurrency cap in endpoint: {spec!r}")
+    if max_concurrent < 1:
+        raise ValueError(f"Endpoint concurrency cap must be at least 1: {spec!r}")
+    return host, max_concurrent
+
+
+def parse_endpoints(value):
+    """Parse a comma-separated --endpoints value into endpoint specs."""
+    specs = [spec for spec in value.split(',') if spec.strip()]
+    if not specs:
+        raise ValueError("No endpoints given")
+    for spec in specs:
+        parse_endpoint(spec)
+    return specs
+
+
+def check_endpoint(host):
+    """True if the Ollama server at `host` answers `ollama list`."""
+    try:
+        result = subprocess.run(['ollama', 'list'], env={**os.environ, 'OLLAMA_HOST': host},
+                                capture_output=True, timeout=HEALTH_CHECK_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+class Endpoint:
+    """One Ollama server and its in-flight request count."""
+
+    def __init__(self, host, max_concurrent=DEFAULT_ENDPOINT_CONCURRENCY):
+        self.host = host
+        self.max_concurrent = max_concurrent
+        self.outstanding = 0
+        self.completed = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # Unchecked endpoints are probed before their first request
+        self.healthy = False
+        self.retry_at = 0.0
+        # Failed while no other endpoint was usable: retried after a short backoff
+        self.backing_off = False
+
+    def to_dict(self):
+        return {'host': self.host, 'max_concurrent': self.max_concurrent, 'outstanding': self.outstanding,
+                'completed': self.completed, 'failures': self.failures, 'healthy': self.healthy,
+                'backing_off': self.backing_off}
+
+
+class EndpointScheduler:
+    """
+    Least-outstanding-requests scheduling over several Ollama endpoints.
+
+    Each endpoint runs at most its own number of concurrent requests. An
+    endpoint that cannot be reached or times out is taken out of rotation
+    and the call is retried on another one; it is probed with `ollama list`
+    again after HEALTH_RETRY_INTERVAL seconds. The last usable endpoint is
+    never taken out: it is retried after an exponential backoff. Other
+    errors, such as an unknown model, are raised without failing over.
+    """
+
+    def __init__(self, specs, retry_interval=HEALTH_RETRY_INTERVAL, backoff=RETRY_BACKOFF):
+        self.endpoints = [Endpoint(*parse_endpoint(spec)) for spec in specs]
+        if not self.endpoints:
+            raise ValueError("No endpoints given")
+        self.retry_interval = retry_interval
+        self.backoff = backoff
+        self.condition = threading.Condition()
+
+    @property
+    def capacity(self):
+        """Total concurrent requests across all endpoints."""
+        return sum(endpoint.max_concurrent for endpoint in self.endpoints)
+
+    def _select(self, exclude):
+        """Pick an endpoint under the lock; returns (endpoint, needs_probe, should_wait)."""
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        free = [endpoint for endpoint in candidates if endpoint.outstanding < endpoint.max_concurrent]
+        healthy = [endpoint for endpoint in free if endpoint.healthy]
+        if healthy:
+            return min(healthy, key=lambda e: (e.outstanding / e.max_concurrent, e.completed)), False, False
+        due = [endpoint for endpoint in free if endpoint.outstanding == 0 and now >= endpoint.retry_at]
+        if due:
+            return due[0], True, False
+        # Wait while an endpoint is busy, being probed or backing off; otherwise all are down
+        return None, False, any(endpoint.healthy or endpoint.outstanding or endpoint.backing_off
+                                for endpoint in candidates)
+
+    def acquire(self, exclude=()):
+        """
+        Reserve the least loaded healthy endpoint, waiting while all are busy.
+
+        Raises:
+            RuntimeError: If no endpoint outside `exclude` is available
+        """
+        while True:
+            with self.condition:
+                while True:
+                    endpoint, probe, should_wait = self._select(exclude)
+                    if endpoint is not None:
+                        endpoint.outstanding += 1
+                        break
+                    if not should_wait:
+                        hosts = ', '.join(endpoint.host for endpoint in self.endpoints)
+                        raise RuntimeError(f"No LLM endpoint available ({hosts})")
+                    self.condition.wait(1.0)
+            if not probe:
+                return endpoint
+            # Probe outside the lock so other calls keep flowing to healthy endpoints
+            if check_endpoint(endpoint.host):
+                with self.condition:
+                    endpoint.healthy = True
+                    endpoint.backing_off = False
+                return endpoint
+            if not self.release(endpoint, ok=False):
+                exclude = (*exclude, endpoint)
+
+    def release(self, endpoint, ok=True):
+        """
+        Return an endpoint reserved by acquire(); ok=False reports that it was unreachable or timed out.
+
+        A failed endpoint is taken out of rotation for retry_interval seconds
+        while another endpoint is usable. The last usable one stays in
+        rotation after a backoff of backoff * 2^(failures - 1) seconds.
+
+        Returns:
+            True if the failed endpoint is the last usable one and may be
+            retried (at most LAST_ENDPOINT_RETRIES times in a row)
+        """
+        with self.condition:
+            endpoint.outstanding -= 1
+            retry = False
+            if ok:
+                endpoint.completed += 1
+                endpoint.consecutive_failures = 0
+                endpoint.backing_off = False
+            else:
+                now = time.monotonic()
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                endpoint.healthy = False
+                endpoint.backing_off = not any(
+                    other.healthy or other.outstanding or now >= other.retry_at
+                    for other in self.endpoints if other is not endpoint)
+                if endpoint.backing_off:
+                    endpoint.retry_at = now + min(self.backoff * 2 ** (endpoint.consecutive_failures - 1),
+                                                  self.retry_interval)
+                    retry = endpoint.consecutive_failures <= LAST_ENDPOINT_RETRIES
+                else:
+                    endpoint.retry_at = now + self.retry_interval
+            self.condition.notify_all()
+            return retry
+
+    def _failed(self, endpoint, error, failover_on_timeout):
+        """
+        Release an endpoint whose request raised `error`.
+
+        Returns:
+            'raise' if the error is not the endpoint's fault, 'retry' to try
+            the same (last usable) endpoint again, or 'failover'
+        """
+        unreachable = isinstance(error, (OllamaConnectionError, ConnectionError))
+        timed_out = isinstance(error, subprocess.TimeoutExpired) and failover_on_timeout
+        if not (unreachable or timed_out):
+            # A generation error, interruption, or a budgeted timeout: no time is left to retry
+            self.release(endpoint)
+            return 'raise'
+        retry = self.release(endpoint, ok=False)
+        problem = 'timed out' if timed_out else f"failed ({error})"
+        if retry:
+            logger.warning("LLM endpoint %s %s; no other endpoint is usable, retrying it", endpoint.host, problem)
+            return 'retry'
+        if endpoint.backing_off:
+            logger.warning("LLM endpoint %s %s; giving up after %d retries", endpoint.host, problem,
+                           LAST_ENDPOINT_RETRIES)
+        else:
+            logger.warning("LLM endpoint %s %s; trying another", endpoint.host, problem)
+        return 'failover'
+
+    def call(self, backend, prompt, model, timeout, failover_on_timeout=True):
+        """
+        Run `backend(prompt, model, timeout, host=...)` on the least loaded endpoint.
+
+        Unreachable endpoints and timeouts fail over to the remaining
+        endpoints, or back off and retry the last usable one; the last error
+        is raised once every endpoint has been tried. Timeouts set by a time
+        budget are raised at once without marking the endpoint unhealthy
+        when `failover_on_timeout` is False.
+
+        Returns:
+            Tuple (response, stats) with stats['endpoint'] set to the host used
+        """
+        tried = []
+        last_error = None
+        while len(tried) < len(self.endpoints):
+            try:
+                endpoint = self.acquire(exclude=tried)
+            except RuntimeError:
+                if last_error is not None:
+                    raise last_error
+                raise
+            try:
+                response, stats = backend(prompt, model, timeout, host=endpoint.host)
+            except BaseException as e:
+                action = self._failed(endpoint, e, failover_on_timeout)
+                if action == 'raise':
+                    raise
+                last_error = e
+                if action == 'failover':
+                    tried.append(endpoint)
+                continue
+            self.release(endpoint)
+            stats['endpoint'] = endpoint.host
+            return response, stats
+        raise last_error
+
+    async def _acquire_async(self, exclude):
+        """acquire() in a worker thread; an endpoint reserved after cancellation is released."""
+        acquiring = asyncio.ensure_future(to_thread(self.acquire, tuple(exclude)))
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(
+                lambda done: done.cancelled() or done.exception() or self.release(done.result()))
+            raise
+
+    async def call_async(self, backend, prompt, model, timeout, failover_on_timeout=True):
+        """Asyncio variant of call() for a coroutine backend such as run_ollama_async()."""
+        tried = []
+        last_error = None
+        while len(tried) < len(self.endpoints):
+            try:
+                endpoint = await self._acquire_async(tried)
+            except RuntimeError:
+                if last_error is not None:
+                    raise last_error
+                raise
+            try:
+                response, stats = await backend(prompt, model, timeout, host=endpoint.host)
+            except BaseException as e:
+                action = self._failed(endpoint, e, failover_on_timeout)
+                if action == 'raise':
+                    raise
+                last_error = e
+                if action == 'failover':
+                    tried.append(endpoint)
+                continue
+            self.release(endpoint)
+            stats['endpoint'] = endpoint.host
+            return response, stats
+        raise last_error
+
+    def status(self):
+        with self.condition:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
+
+
+def get_scheduler(specs):
+    """The shared scheduler for an endpoint list, created on first use."""
+    key = tuple(specs)
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = EndpointScheduler(specs)
+        return _schedulers[key]
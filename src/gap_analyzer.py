@@ -1,13 +1,166 @@
 """Gap analysis module for identifying policy weaknesses against NIST framework."""
 
+import os
+import logging
 import subprocess
 import json
+import threading
 from pathlib import Path
 
+from llm_backend import run_ollama, run_ollama_async
+from endpoints import EndpointScheduler, get_scheduler
+from metrics import record_llm_call, record_escalation, record_repair, record_cache_hit, current_stage
+from coalescing import FlightTimeout, SingleFlight, flight_key
+from deadlines import DeadlineExceeded, current_deadline, llm_timeout
+from validation import REQUIRED_SECTIONS, missing_sections, splice_sections
+
+# Warnings about truncation, repairs and escalations; also counted in the run metrics
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemma3:4b"
+
+# Pipeline stages whose model can be configured (call_local_llm's `stage`)
+MODEL_STAGES = ('gap_analysis', 'revised_policy', 'roadmap', 'executive_summary', 'revision_summary')
+
 # Security limits
-LLM_TIMEOUT = 600  # 10 minutes
+LLM_TIMEOUT = 600  # 10 minutes per call; a deadline (see deadlines.py) can shorten it
 MAX_PROMPT_SIZE = 100000  # 100KB
 
+# Parsed framework text keyed by (path, mtime); the reference PDF takes ~1s to parse
+_framework_cache = {}
+# Concurrent analyses wait for one parse instead of each parsing the PDF
+_framework_lock = threading.Lock()
+
+# Callable(prompt, model, timeout, host=None) -> (response, stats); see llm_backend.run_ollama
+_llm_backend = run_ollama
+# Coroutine function with the same signature used by call_local_llm_async()
+_async_llm_backend = run_ollama_async
+
+
+def set_llm_backend(backend=None, async_backend=None):
+    """Replace the LLM backends (e.g. stand-ins for benchmarks); None restores Ollama."""
+    global _llm_backend, _async_llm_backend
+    _llm_backend = backend or run_ollama
+    _async_llm_backend = async_backend or run_ollama_async
+
+
+# Identical prompts issued concurrently (duplicate policies, retries) share one generation
+_in_flight = SingleFlight()
+
+# EndpointScheduler used when call_local_llm() is not given endpoints; None runs Ollama's default host
+_llm_endpoints = None
+
+
+def set_llm_endpoints(endpoints=None):
+    """Balance LLM calls across Ollama endpoints ('host:port' or 'host:port=N'); None restores the default."""
+    global _llm_endpoints
+    _llm_endpoints = get_scheduler(endpoints) if endpoints else None
+    return _llm_endpoints
+
+
+# Models per stage, smallest first; later models are tried only when the output fails validation
+_default_models = (DEFAULT_MODEL,)
+_stage_models = {}
+
+
+def parse_models(value):
+    """Parse 'model' or a comma-separated cascade 'small,large' into a tuple of models."""
+    models = tuple(model.strip() for model in value.split(',') if model.strip())
+    if not models:
+        raise ValueError(f"No model given: {value!r}")
+    return models
+
+
+def parse_stage_model(spec):
+    """
+    Parse a --stage-model value 'stage=model[,larger_model...]'.
+
+    Returns:
+        Tuple (stage, models)
+    """
+    stage, _, models = spec.partition('=')
+    stage = stage.strip()
+    if stage not in MODEL_STAGES:
+        raise ValueError(f"Unknown stage {stage!r} in {spec!r}. Stages: {', '.join(MODEL_STAGES)}")
+    return stage, parse_models(models)
+
+
+def set_stage_models(default=None, stages=None):
+    """
+    Configure the models used by each stage.
+
+    Args:
+        default: Model or cascade tuple for stages without their own entry
+            (None restores DEFAULT_MODEL)
+        stages: Dictionary of stage -> model or cascade tuple
+    """
+    global _default_models, _stage_models
+    as_tuple = lambda models: (models,) if isinstance(models, str) else tuple(models)
+    _default_models = as_tuple(default) if default else (DEFAULT_MODEL,)
+    _stage_models = {stage: as_tuple(models) for stage, models in (stages or {}).items()}
+
+
+def stage_models(stage=None):
+    """Models tried for a stage, smallest first."""
+    return _stage_models.get(stage, _default_models)
+
+
+def build_missing_sections_prompt(prompt, response, missing):
+    """
+    Build a follow-up prompt asking only for the sections a response omitted.
+
+    The missing sections depend on the policy, framework and findings, so a
+    bare "write the missing sections" instruction would leave the model
+    without anything to write them from. The original prompt and response
+    are therefore resent, as a prefix of the follow-up: Ollama keeps the
+    evaluated prompt of the previous call on the loaded model and only
+    evaluates the new suffix, so the extra cost is roughly the response
+    length, and only the missing sections are generated. Follow-ups that
+    would exceed MAX_PROMPT_SIZE are not sent (see _repair_prompt()).
+    """
+    return f"""{prompt}
+
+YOUR RESPONSE SO FAR:
+{response}
+
+Your response is missing these required sections: {', '.join(missing)}.
+Write ONLY the missing sections, each under its exact heading from the format above. Do not repeat sections you already wrote."""
+
+
+def _repair_prompt(stage, prompt, response):
+    """Follow-up prompt for a partial response and its missing sections, or (None, None)."""
+    if stage not in REQUIRED_SECTIONS:
+        return None, None
+    missing = missing_sections(stage, response)
+    # Regenerating everything is the cascade's job; repair partial output only. A
+    # missing end marker (validation.END_MARKERS) means the whole output is suspect
+    if not missing or len(missing) == len(REQUIRED_SECTIONS[stage]):
+        return None, None
+    follow_up = build_missing_sections_prompt(prompt, response, missing)
+    if len(follow_up) > MAX_PROMPT_SIZE:
+        return None, None
+    logger.warning("%s output is missing %s; requesting only those sections", stage, ', '.join(missing))
+    return follow_up, missing
+
+
+def _splice_repair(stage, model, response, addition, missing):
+    repaired = splice_sections(stage, response, addition)
+    record_repair(stage, model, missing, missing_sections(stage, repaired))
+    return repaired
+
+
+def _needs_escalation(stage, models, index, response):
+    """True if a cascade should retry the response of models[index] with the next model."""
+    if index == len(models) - 1:
+        return False
+    missing = missing_sections(stage, response)
+    if not missing:
+        return False
+    logger.warning("%s output of %s is missing %s; retrying with %s", stage, models[index], ', '.join(missing),
+                   models[index + 1])
+    record_escalation(stage, models[index], models[index + 1], missing)
+    return True
+
 
 def load_nist_framework(framework_path):
     """Load NIST framework reference data from TXT or PDF."""
@@ -27,46 +180,184 @@ def load_nist_framework(framework_path):
         else:
             raise FileNotFoundError(f"No TXT or PDF reference files found in {framework_path}")
     
-    # Use existing document reader (supports TXT and PDF)
-    return read_policy_document(framework_path)
+    # Use existing document reader (supports TXT and PDF); parsed once per file version
+    key = (os.path.abspath(framework_path), os.stat(framework_path).st_mtime_ns)
+    with _framework_lock:
+        if key not in _framework_cache:
+            _framework_cache[key] = read_policy_document(framework_path)
+        return _framework_cache[key]
 
 
-def call_local_llm(prompt, model="gemma3:4b"):
-    """Call local LLM via Ollama (fully offline after model download)."""
-    # Check prompt size
+def clear_framework_cache():
+    """Forget parsed frameworks so the next load reads the reference file again."""
+    _framework_cache.clear()
+
+
+def _check_prompt(prompt):
     if len(prompt) > MAX_PROMPT_SIZE:
         raise ValueError(f"Prompt too large: {len(prompt)} characters (max: {MAX_PROMPT_SIZE})")
+
+
+def _backend_error(error, budgeted=False):
+    """
+    Map an LLM backend failure to the RuntimeError reported to the user.
+
+    A call killed because its timeout came from the current deadline
+    (`budgeted`) means the deadline was exceeded; so does giving up on an
+    identical call in flight for the same reason.
+    """
+    if isinstance(error, (subprocess.TimeoutExpired, FlightTimeout)):
+        if budgeted:
+            return current_deadline().exceeded(current_stage())
+        return RuntimeError(f"LLM execution timed out after {error.timeout:g} seconds. Try a shorter policy.")
+    if isinstance(error, FileNotFoundError):
+        return RuntimeError("Ollama not found. Please install from: https://ollama.ai/download")
+    if isinstance(error, RuntimeError):
+        return error
+    return RuntimeError(f"LLM execution failed: {error}")
+
+
+def call_local_llm(prompt, model=None, *, endpoints=None, stage=None):
+    """
+    Call local LLM via Ollama (fully offline after model download).
+    
+    Args:
+        model: Model to run; None uses the models configured for `stage`.
+            Sections of the stage's template missing from the output are
+            requested with a short follow-up and spliced in. When the models
+            form a cascade, each larger model is tried only if sections are
+            still missing
+        endpoints: Optional list of Ollama endpoints or an EndpointScheduler;
+            calls go to the least loaded healthy endpoint and fail over to
+            the others. Defaults to the endpoints set with set_llm_endpoints()
+        stage: Pipeline stage of the prompt (see MODEL_STAGES)
+    """
+    _check_prompt(prompt)
+    
+    if endpoints is not None and not isinstance(endpoints, EndpointScheduler):
+        endpoints = get_scheduler(endpoints)
+    scheduler = endpoints or _llm_endpoints
+    
+    models = (model,) if model else stage_models(stage)
+    for index, candidate in enumerate(models):
+        response = _run_llm(prompt, candidate, scheduler)
+        follow_up, missing = _repair_prompt(stage, prompt, response)
+        if follow_up is not None:
+            addition = _run_llm(follow_up, candidate, scheduler)
+            response = _splice_repair(stage, candidate, response, addition, missing)
+        if not _needs_escalation(stage, models, index, response):
+            return response
+
+
+def _call_timeout(prompt):
+    """Timeout for a call of the current stage under its deadline; see deadlines.llm_timeout()."""
+    return llm_timeout(current_stage(), len(prompt), LLM_TIMEOUT)
+
+
+def _run_llm(prompt, model, scheduler):
+    timeout, budgeted = _call_timeout(prompt)
+    if scheduler is not None:
+        backend = lambda: scheduler.call(_llm_backend, prompt, model, timeout,
+                                         failover_on_timeout=not budgeted)
+    else:
+        backend = lambda: _llm_backend(prompt, model, timeout)
+    
+    def generate():
+        try:
+            return backend()
+        except subprocess.TimeoutExpired as e:
+            # Raised as the leader's DeadlineExceeded so that callers sharing
+            # the call retry it under their own budget
+            if budgeted:
+                raise _backend_error(e, budgeted) from e
+            raise
     
     try:
-        result = subprocess.run(
-            ['ollama', 'run', model],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            timeout=LLM_TIMEOUT
-        )
-        
-        if result.returncode != 0:
-            raise RuntimeError(f"LLM execution failed: {result.stderr}")
-        
-        return result.stdout.strip()
-        
-    except subprocess.TimeoutExpired:
-        raise RuntimeError(f"LLM execution timed out after {LLM_TIMEOUT} seconds. Try a shorter policy.")
-    except FileNotFoundError:
-        raise RuntimeError("Ollama not found. Please install from: https://ollama.ai/download")
+        (response, stats), shared = _in_flight.do(flight_key(prompt, model), generate, timeout,
+                                                  retry=_leader_deadline)
     except Exception as e:
-        raise RuntimeError(f"LLM execution failed: {e}")
+        error = _backend_error(e, budgeted)
+        if error is e:
+            raise
+        raise error from e
+    
+    _record_generation(model, prompt, response, stats, shared)
+    return response
 
 
-def analyze_policy_gaps(policy_content, nist_framework):
-    """Identify gaps in policy against NIST framework using local LLM."""
+def _leader_deadline(error):
+    """Whether a shared call failed only because its caller's deadline ran out."""
+    return isinstance(error, DeadlineExceeded)
+
+
+def _record_generation(model, prompt, response, stats, shared):
+    """Record an LLM call, or a response shared from an identical in-flight call."""
+    if shared:
+        record_cache_hit('coalesced')
+    else:
+        record_llm_call(model, len(prompt), len(response), stats)
+
+
+async def call_local_llm_async(prompt, model=None, *, endpoints=None, stage=None):
+    """
+    Asyncio variant of call_local_llm(); cancelling the task kills the Ollama process.
+    
+    Calls are balanced over `endpoints`, or the endpoints set with
+    set_llm_endpoints(), through the same scheduler as synchronous calls.
+    """
+    _check_prompt(prompt)
+    
+    if endpoints is not None and not isinstance(endpoints, EndpointScheduler):
+        endpoints = get_scheduler(endpoints)
+    scheduler = endpoints or _llm_endpoints
+    
+    models = (model,) if model else stage_models(stage)
+    for index, candidate in enumerate(models):
+        response = await _run_llm_async(prompt, candidate, scheduler)
+        follow_up, missing = _repair_prompt(stage, prompt, response)
+        if follow_up is not None:
+            addition = await _run_llm_async(follow_up, candidate, scheduler)
+            response = _splice_repair(stage, candidate, response, addition, missing)
+        if not _needs_escalation(stage, models, index, response):
+            return response
+
+
+async def _run_llm_async(prompt, model, scheduler):
+    timeout, budgeted = _call_timeout(prompt)
+    if scheduler is not None:
+        backend = lambda: scheduler.call_async(_async_llm_backend, prompt, model, timeout,
+                                               failover_on_timeout=not budgeted)
+    else:
+        backend = lambda: _async_llm_backend(prompt, model, timeout)
+    
+    async def generate():
+        try:
+            return await backend()
+        except subprocess.TimeoutExpired as e:
+            if budgeted:
+                raise _backend_error(e, budgeted) from e
+            raise
+    
+    try:
+        (response, stats), shared = await _in_flight.do_async(flight_key(prompt, model), generate, timeout,
+                                                              retry=_leader_deadline)
+    except Exception as e:
+        error = _backend_error(e, budgeted)
+        if error is e:
+            raise
+        raise error from e
+    
+    _record_generation(model, prompt, response, stats, shared)
+    return response
+
+
+def build_gap_analysis_prompt(policy_content, nist_framework):
+    """Build the gap analysis prompt, truncating oversized policies."""
     
     # Truncate policy if too large
     MAX_POLICY_SIZE = 50000  # ~50KB
     if len(policy_content) > MAX_POLICY_SIZE:
-        print(f"WARNING: Policy is large ({len(policy_content)} chars). Truncating to {MAX_POLICY_SIZE} chars.")
+        logger.warning("Policy is large (%d chars). Truncating to %d chars.", len(policy_content), MAX_POLICY_SIZE)
         policy_content = policy_content[:MAX_POLICY_SIZE] + "\n\n[TRUNCATED - Policy exceeded size limit]"
     
     prompt = f"""You are a cybersecurity policy analyst. Compare the organizational policy below against the NIST Cybersecurity Framework standards and identify ALL gaps, weaknesses, and missing elements.
@@ -96,7 +387,12 @@ GAP ANALYSIS REPORT
 
 Be specific and reference exact NIST controls that are missing or inadequately addressed."""
 
-    return call_local_llm(prompt)
+    return prompt
+
+
+def analyze_policy_gaps(policy_content, nist_framework):
+    """Identify gaps in policy against NIST framework using local LLM."""
+    return call_local_llm(build_gap_analysis_prompt(policy_content, nist_framework), stage='gap_analysis')
 
 
 def extract_gaps_structured(gap_analysis_text):
@@ -128,3 +424,66 @@ def extract_gaps_structured(gap_analysis_text):
                 gaps[current_section].append(line.lstrip('-•* 0123456789.'))
     
     return gaps
+
+
+def build_section_gaps_prompt(changed_sections, other_headings, nist_framework):
+    """Build the gap analysis prompt restricted to selected policy sections."""
+    
+    sections_text = '\n\n'.join(changed_sections)
+    covered = '\n'.join(f"- {heading}" for heading in other_headings) or "- (none)"
+    
+    prompt = f"""You are a cybersecurity policy analyst. Compare the policy sections below against the NIST Cybersecurity Framework standards and identify ALL gaps, weaknesses, and missing elements in THESE SECTIONS ONLY.
+
+NIST FRAMEWORK STANDARDS:
+{nist_framework}
+
+POLICY SECTIONS TO ANALYZE:
+{sections_text}
+
+The following sections of the same policy were already analyzed separately. Do not report gaps that belong to them:
+{covered}
+
+Provide a detailed gap analysis in the following format:
+
+GAP ANALYSIS REPORT
+===================
+
+1. CRITICAL GAPS (High Priority)
+[List all critical missing elements with specific references to NIST requirements]
+
+2. SIGNIFICANT GAPS (Medium Priority)
+[List all significant weaknesses and incomplete provisions]
+
+3. MINOR GAPS (Low Priority)
+[List all minor improvements needed]
+
+4. SUMMARY
+[Provide overall assessment and key findings]
+
+Be specific and reference exact NIST controls that are missing or inadequately addressed."""
+
+    return prompt
+
+
+def analyze_section_gaps(changed_sections, other_headings, nist_framework):
+    """Identify gaps in selected policy sections only, for incremental re-analysis."""
+    return call_local_llm(build_section_gaps_prompt(changed_sections, other_headings, nist_framework),
+                          stage='gap_analysis')
+
+
+def format_gap_report(gaps):
+    """Render structured gaps (as from extract_gaps_structured) in the gap analysis format."""
+    lines = ["GAP ANALYSIS REPORT", "==================="]
+    
+    for number, (key, title) in enumerate((('critical', 'CRITICAL GAPS (High Priority)'),
+                                           ('significant', 'SIGNIFICANT GAPS (Medium Priority)'),
+                                           ('minor', 'MINOR GAPS (Low Priority)')), 1):
+        lines.append("")
+        lines.append(f"{number}. {title}")
+        lines.extend(f"- {gap}" for gap in gaps[key])
+    
+    lines.append("")
+    lines.append("4. SUMMARY")
+    lines.append(gaps['summary'].strip())
+    
+    return '\n'.join(lines)
@@ -0,0 +1,313 @@
+"""Section-level reuse of prior analysis results for edited or near-duplicate policies."""
+
+import hashlib
+import json
+import os
+import re
+
+from utils import split_policy_sections, save_output
+from dedup import fingerprint_text
+from coverage import tokenize
+from gap_analyzer import (analyze_section_gaps, extract_gaps_structured, format_gap_report,
+                          stage_models, MODEL_STAGES)
+from validation import split_sections
+from policy_reviser import revise_sections
+
+# Fall back to a full analysis when more than this share of sections changed
+MAX_CHANGED_RATIO = 0.5
+# Minimum share of a gap's tokens found in a section to attribute it there
+ATTRIBUTION_THRESHOLD = 0.5
+
+SEVERITIES = ('critical', 'significant', 'minor')
+
+# Gap report heading of each severity (see validation.REQUIRED_SECTIONS)
+SEVERITY_SECTIONS = {'critical': 'CRITICAL GAPS', 'significant': 'SIGNIFICANT GAPS', 'minor': 'MINOR GAPS'}
+
+# Per-policy section state lives under the output directory
+STATE_DIR = '.state'
+
+
+def analysis_config(nist_framework):
+    """
+    Fingerprint of everything besides the policy that shapes its results.
+
+    Stored results are reused only while the framework text and the models
+    configured for every stage are unchanged.
+    """
+    models = json.dumps({stage: list(stage_models(stage)) for stage in MODEL_STAGES}, sort_keys=True)
+    return {
+        'framework': fingerprint_text(nist_framework),
+        'models': hashlib.sha256(models.encode('utf-8')).hexdigest()
+    }
+
+
+def section_key(heading):
+    """Normalize a section heading so renumbering and markup do not change its key."""
+    key = re.sub(r'^[\d.)\s]+', '', heading.strip('#* ')).lower()
+    return re.sub(r'\s+', ' ', key).strip() or 'preamble'
+
+
+def keyed_sections(content):
+    """Split content into sections with unique normalized keys, in document order."""
+    sections = []
+    seen = {}
+    for heading, text in split_policy_sections(content):
+        key = section_key(heading)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key} #{seen[key]}"
+        sections.append((key, heading, text))
+    return sections
+
+
+def _attribute_gap(gap, sections):
+    """Return the key of the section a gap finding refers to, or None if document-wide."""
+    lowered = gap.lower()
+
+    reference = re.search(r'section\s+(\d+)', lowered)
+    if reference:
+        for key, heading, _ in sections:
+            if re.match(rf'^{reference.group(1)}\b', heading.strip('#* ')):
+                return key
+
+    named = [key for key, _, _ in sections if key != 'preamble' and len(key) > 3 and key in lowered]
+    if named:
+        return max(named, key=len)
+
+    gap_tokens = set(tokenize(gap))
+    if not gap_tokens:
+        return None
+    best_key, best_score = None, 0.0
+    for key, _, text in sections:
+        score = len(gap_tokens & set(tokenize(text))) / len(gap_tokens)
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key if best_score >= ATTRIBUTION_THRESHOLD else None
+
+
+def build_section_state(policy_content, gap_analysis, revised_policy):
+    """
+    Record per-section fingerprints, gap findings and revised text for later reuse.
+
+    Returns:
+        JSON-serializable dictionary describing the analyzed policy by section
+    """
+    sections = keyed_sections(policy_content)
+    gaps = extract_gaps_structured(gap_analysis)
+
+    section_gaps = {key: {severity: [] for severity in SEVERITIES} for key, _, _ in sections}
+    document_gaps = {severity: [] for severity in SEVERITIES}
+    for severity in SEVERITIES:
+        for gap in gaps[severity]:
+            key = _attribute_gap(gap, sections)
+            target = section_gaps[key] if key else document_gaps
+            target[severity].append(gap)
+
+    # Sections the model added are kept with the key of the section they follow
+    policy_keys = {key for key, _, _ in sections}
+    revised = {}
+    revised_extra = []
+    previous = None
+    for key, _, text in keyed_sections(revised_policy):
+        if key in policy_keys:
+            revised[key] = text
+            previous = key
+        else:
+            revised_extra.append([previous, text])
+
+    return {
+        'order': [key for key, _, _ in sections],
+        'fingerprints': {key: fingerprint_text(text) for key, _, text in sections},
+        'gaps': section_gaps,
+        'document_gaps': document_gaps,
+        'summary': gaps['summary'].strip(),
+        'revised': revised,
+        'revised_extra': revised_extra
+    }
+
+
+def diff_sections(policy_content, state):
+    """
+    Compare a policy against a stored section state.
+
+    Returns:
+        Tuple (sections, changed_keys, removed_keys)
+    """
+    sections = keyed_sections(policy_content)
+    fingerprints = state['fingerprints']
+    changed = [key for key, _, text in sections if fingerprints.get(key) != fingerprint_text(text)]
+    current = {key for key, _, _ in sections}
+    removed = [key for key in state['order'] if key not in current]
+    return sections, changed, removed
+
+
+def is_worth_reusing(sections, changed):
+    """Whether section-level reuse saves enough work over a full analysis."""
+    return bool(sections) and len(changed) <= MAX_CHANGED_RATIO * len(sections)
+
+
+def _gap_of_line(line):
+    """The finding a report line holds as extract_gaps_structured() reads it, or None."""
+    line = line.strip()
+    if line and (line.startswith(('-', '•', '*')) or line[0].isdigit()):
+        return line.lstrip('-•* 0123456789.')
+    return None
+
+
+def _splice_gap_report(report, stale, added, summary):
+    """
+    Edit a previous gap report in place: drop stale findings, append new ones
+    under their severity heading and replace the summary.
+
+    Headings, prose and the findings of unchanged sections are kept as
+    written. Returns None if the report lacks a severity section.
+    """
+    preamble, sections = split_sections('gap_analysis', report)
+    if any(heading not in sections for heading in SEVERITY_SECTIONS.values()):
+        return None
+
+    parts = [preamble] if preamble else []
+    for severity in SEVERITIES:
+        heading_line, *body = sections[SEVERITY_SECTIONS[severity]].split('\n')
+        kept = [line for line in body if _gap_of_line(line) not in stale[severity]]
+        while kept and not kept[-1].strip():
+            kept.pop()
+        parts.append('\n'.join([heading_line, *kept, *(f"- {gap}" for gap in added[severity])]))
+
+    old_summary = sections.get('SUMMARY')
+    if summary or old_summary is None:
+        heading_line = old_summary.split('\n')[0] if old_summary else '4. SUMMARY'
+        parts.append(f"{heading_line}\n{summary}")
+    else:
+        parts.append(old_summary)
+    return '\n\n'.join(parts)
+
+
+def incremental_gap_analysis(sections, changed, removed, state, nist_framework, previous_report=None):
+    """
+    Re-analyze only changed sections and merge with preserved findings.
+
+    Args:
+        previous_report: Gap analysis text `state` was built from; when
+            given, its prose and layout are kept and only the findings of
+            changed or removed sections are replaced
+
+    Returns:
+        Merged gap analysis text in the standard report format
+    """
+    merged = {severity: list(state['document_gaps'][severity]) for severity in SEVERITIES}
+    stale_keys = set(changed) | set(removed)
+    stale = {severity: set() for severity in SEVERITIES}
+    for key in state['order']:
+        for severity in SEVERITIES:
+            if key in stale_keys:
+                stale[severity].update(state['gaps'][key][severity])
+            else:
+                merged[severity].extend(state['gaps'][key][severity])
+    # Findings that unchanged sections also report stay in the report
+    for severity in SEVERITIES:
+        stale[severity] -= set(merged[severity])
+    merged['summary'] = state['summary']
+    added = {severity: [] for severity in SEVERITIES}
+    summary = ''
+
+    if changed:
+        changed_text = [text for key, _, text in sections if key in changed]
+        other_headings = [heading for key, heading, _ in sections if key not in changed]
+        partial = extract_gaps_structured(
+            analyze_section_gaps(changed_text, other_headings, nist_framework))
+        for severity in SEVERITIES:
+            known = {gap.lower() for gap in merged[severity]}
+            added[severity] = [gap for gap in partial[severity] if gap.lower() not in known]
+            merged[severity].extend(added[severity])
+        # The new summary describes the edited policy; appending would grow it on every edit
+        summary = partial['summary'].strip()
+        if summary:
+            merged['summary'] = summary
+
+    if previous_report:
+        spliced = _splice_gap_report(previous_report, stale, added, summary)
+        if spliced is not None:
+            return spliced
+    return format_gap_report(merged)
+
+
+def same_findings(gap_analysis, other_gap_analysis):
+    """Whether two gap analyses report the same findings, ignoring order and layout."""
+    gaps = extract_gaps_structured(gap_analysis)
+    other = extract_gaps_structured(other_gap_analysis)
+    return all(set(gaps[severity]) == set(other[severity]) for severity in SEVERITIES)
+
+
+def incremental_revision(sections, changed, state, gap_analysis, nist_framework):
+    """
+    Revise only changed (or previously unmatched) sections and splice them into
+    the preserved revised policy.
+
+    Returns:
+        Full revised policy text
+    """
+    to_revise = [key for key, _, _ in sections if key in changed or key not in state['revised']]
+
+    fresh = {}
+    if to_revise:
+        response = revise_sections([text for key, _, text in sections if key in to_revise],
+                                   gap_analysis, nist_framework)
+        fresh = {key: text for key, _, text in keyed_sections(response)}
+
+    extras = {}
+    for after, text in state['revised_extra']:
+        extras.setdefault(after, []).append(text)
+
+    parts = list(extras.pop(None, []))
+    for key, _, text in sections:
+        if key in to_revise:
+            parts.append(fresh.get(key, text))
+        else:
+            parts.append(state['revised'][key])
+        parts.extend(extras.pop(key, []))
+    for texts in extras.values():
+        parts.extend(texts)
+
+    return '\n\n'.join(parts)
+
+
+def _state_path(output_dir, policy_name):
+    return os.path.join(output_dir, STATE_DIR, f"{policy_name}.json")
+
+
+def load_policy_state(output_dir, policy_name, config=None):
+    """
+    Load the stored results of the last analysis of a policy, or None.
+
+    Results stored under a different analysis_config() (framework or model
+    change) are ignored when `config` is given.
+    """
+    path = _state_path(output_dir, policy_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Ignoring unreadable state file {path}: {e}")
+        return None
+    if config is not None and state.get('config') != config:
+        print(f"      Framework or model configuration changed since {policy_name} was analyzed; "
+              f"ignoring stored results")
+        return None
+    return state
+
+
+def save_policy_state(output_dir, policy_content, results, config=None):
+    """Store fingerprints, per-section findings and outputs for the next re-submission."""
+    state = {
+        'fingerprint': fingerprint_text(policy_content),
+        'config': config,
+        'gap_analysis': results['gap_analysis'],
+        'revised_policy': results['revised_policy'],
+        'roadmap': results['roadmap'],
+        'executive_summary': results['executive_summary'],
+        'sections': results['sections']
+    }
+    save_output(json.dumps(state, indent=2), _state_path(output_dir, results['policy_name']))
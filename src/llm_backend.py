@@ -0,0 +1,182 @@
+"""Ollama CLI backend with streaming output and generation statistics."""
+
+import asyncio
+import os
+import re
+import subprocess
+import threading
+import time
+
+# Statistics printed by `ollama run --verbose` on stderr
+STAT_PATTERN = re.compile(r'^\s*(total duration|load duration|prompt eval count|prompt eval duration|'
+                          r'eval count|eval duration):\s*(\S+)', re.MULTILINE)
+DURATION_PATTERN = re.compile(r'([\d.]+)(h|ms|µs|us|ns|m|s)')
+DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 1e-3, 'µs': 1e-6, 'us': 1e-6, 'ns': 1e-9}
+
+# Ollama CLI errors meaning the server could not be reached, as opposed to a failed generation
+CONNECTION_ERROR_PATTERN = re.compile(r'could not connect|connection refused|connection reset|dial tcp|'
+                                      r'no such host|no route to host|i/o timeout|server not responding',
+                                      re.IGNORECASE)
+
+
+class OllamaConnectionError(RuntimeError):
+    """The Ollama server could not be reached."""
+
+
+def _run_error(stderr):
+    """Exception for an `ollama run` that exited with an error."""
+    message = f"LLM execution failed: {stderr.strip()}"
+    if CONNECTION_ERROR_PATTERN.search(stderr):
+        return OllamaConnectionError(message)
+    return RuntimeError(message)
+
+
+def parse_duration(value):
+    """Parse a Go duration string such as '1m2.5s' or '350.2ms' into seconds."""
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in DURATION_PATTERN.findall(value))
+
+
+def parse_verbose_stats(stderr):
+    """Extract token counts and durations from `ollama run --verbose` output."""
+    stats = {}
+    for name, value in STAT_PATTERN.findall(stderr):
+        key = name.replace(' ', '_')
+        stats[key] = int(value) if key.endswith('count') else parse_duration(value)
+    return stats
+
+
+def _ollama_env(host):
+    """Process environment directing the Ollama CLI at `host`, or None for the default."""
+    return {**os.environ, 'OLLAMA_HOST': host} if host else None
+
+
+def run_ollama(prompt, model, timeout, host=None):
+    """
+    Run a prompt through the Ollama CLI, streaming the response.
+
+    `host` selects the Ollama server (OLLAMA_HOST); None uses the default.
+
+    Returns:
+        Tuple (response_text, stats) where stats holds wall time, time to
+        first token and, when reported by Ollama, token counts and rates
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        ['ollama', 'run', '--verbose', model],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        env=_ollama_env(host)
+    )
+
+    timed_out = threading.Event()
+
+    def kill_on_timeout():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill_on_timeout)
+    timer.start()
+
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()))
+    stderr_reader.start()
+
+    def write_prompt():
+        try:
+            process.stdin.write(prompt)
+            process.stdin.close()
+        except OSError:
+            pass
+
+    writer = threading.Thread(target=write_prompt)
+    writer.start()
+
+    try:
+        first = process.stdout.read(1)
+        first_token_time = time.perf_counter() - start if first else None
+        output = first + process.stdout.read()
+        process.wait()
+    finally:
+        timer.cancel()
+        writer.join()
+        stderr_reader.join()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(process.args, timeout)
+
+    stderr = ''.join(stderr_chunks)
+    if process.returncode != 0:
+        raise _run_error(stderr)
+
+    return output.strip(), _call_stats(stderr, start, first_token_time)
+
+
+def _call_stats(stderr, start, first_token_time):
+    stats = parse_verbose_stats(stderr)
+    stats['wall_time'] = time.perf_counter() - start
+    stats['time_to_first_token'] = first_token_time
+    if stats.get('eval_count') and stats.get('eval_duration'):
+        stats['tokens_per_second'] = stats['eval_count'] / stats['eval_duration']
+    return stats
+
+
+async def run_ollama_async(prompt, model, timeout, host=None):
+    """
+    Asyncio variant of run_ollama() for use inside an event loop.
+
+    The Ollama process is killed if the call times out or its task is cancelled.
+
+    Returns:
+        Tuple (response_text, stats) as returned by run_ollama()
+    """
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        'ollama', 'run', '--verbose', model,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=_ollama_env(host)
+    )
+    first_token_time = None
+
+    async def write_prompt():
+        try:
+            process.stdin.write(prompt.encode('utf-8'))
+            await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    async def communicate():
+        nonlocal first_token_time
+        pending = [asyncio.ensure_future(write_prompt()), asyncio.ensure_future(process.stderr.read())]
+        try:
+            first = await process.stdout.read(1)
+            if first:
+                first_token_time = time.perf_counter() - start
+            output = first + await process.stdout.read()
+            await pending[0]
+            stderr = await pending[1]
+            await process.wait()
+            return output, stderr
+        finally:
+            for task in pending:
+                task.cancel()
+
+    try:
+        output, stderr = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise subprocess.TimeoutExpired(['ollama', 'run', '--verbose', model], timeout)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    stderr = stderr.decode('utf-8', errors='replace')
+    if process.returncode != 0:
+        raise _run_error(stderr)
+
+    return output.decode('utf-8', errors='replace').strip(), _call_stats(stderr, start, first_token_time)
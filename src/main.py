@@ -2,152 +2,406 @@
 
 import os
 import sys
+import json
 import argparse
-from datetime import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import read_policy_document, save_output
-from gap_analyzer import load_nist_framework, analyze_policy_gaps, extract_gaps_structured
+from utils import read_policy_document, save_output, new_run_id
+from gap_analyzer import (load_nist_framework, analyze_policy_gaps, extract_gaps_structured,
+                          set_llm_endpoints, set_stage_models, parse_models, parse_stage_model,
+                          DEFAULT_MODEL, MODEL_STAGES)
+from endpoints import parse_endpoints
 from policy_reviser import revise_policy, generate_revision_summary
 from roadmap_generator import generate_improvement_roadmap, generate_executive_summary
-from pdf_generator import generate_all_pdfs
+from checkpoint import RunCheckpoint
+from metrics import (RunMetrics, collect_metrics, timed_stage, record_cache_hit,
+                     aggregate_metrics)
+from profiling import ProfileCollector, collect_profiles
+from report_model import ReportModel
+from report_writers import DEFAULT_FORMATS, parse_formats, write_reports
+from results_store import ResultsStore, DB_NAME
+from bundle import write_run_bundle
+from server import serve, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_SIZE
+from watcher import PolicyWatcher, DEFAULT_DEBOUNCE
+from work_queue import run_worker, DEFAULT_LEASE_TIMEOUT
+from deadlines import Deadline, DeadlineExceeded, within_deadline, stage_history, record_history, save_partial
+from dedup import DuplicateIndex, SERVICE_MAX_ENTRIES, fingerprint_text
+from packing import DEFAULT_PACK_SIZE, PACK_MAX_POLICY_SIZE, may_pack, plan_packs, analyze_packed_gaps
+from incremental import (build_section_state, diff_sections, is_worth_reusing,
+                         incremental_gap_analysis, incremental_revision,
+                         same_findings, load_policy_state, save_policy_state, analysis_config)
 
+# Metrics of the packed gap analysis prompts of a batch run, next to batch_metrics.json
+PACKED_METRICS_NAME = 'packed_metrics.json'
 
-def analyze_policy(policy_path, output_dir='output'):
+
+def _run_stage(checkpoint, stage, compute, partial):
+    """Return a checkpointed stage result, or compute it and checkpoint it; `partial` collects results."""
+    with timed_stage(stage):
+        result = checkpoint.load_stage(stage) if checkpoint is not None else None
+        if result is not None:
+            record_cache_hit('checkpoint')
+            print("      Restored from checkpoint")
+        else:
+            result = compute()
+            if checkpoint is not None:
+                checkpoint.save_stage(stage, result)
+        partial['stages'][stage] = result
+        return result
+
+
+def _reused(result, source):
+    """Count a stage result taken from an earlier analysis."""
+    record_cache_hit(source)
+    return result
+
+
+def analyze_policy(policy_path, output_dir='output', dedup_index=None, incremental=True,
+                   checkpoint=None, profile=False, trace_memory=False, pdf_workers=None,
+                   formats=DEFAULT_FORMATS, store=None, packed_gap_analysis=None, deadline=None,
+                   pdf_pool=None):
     """
     Main function to analyze policy document and generate comprehensive report.
     
     Args:
         policy_path: Path to policy document (TXT, PDF, or DOCX)
         output_dir: Directory to save output reports
+        dedup_index: Optional DuplicateIndex of policies analyzed earlier in
+            the batch; duplicates reuse their neighbor's results
+        incremental: Reuse the stored section state of a previous analysis
+            of the same policy so only edited sections are re-analyzed
+        checkpoint: Optional PolicyCheckpoint; completed stages are restored
+            from it and new stage results are persisted as they finish
+        profile: Write a cProfile .pstats file per stage next to the outputs
+        trace_memory: Write top allocations per stage using tracemalloc
+        pdf_workers: Processes rendering the PDFs; None uses one per CPU.
+            Profiled runs render in-process so the renders are captured
+        formats: Report formats to write (txt, pdf, md, html, docx); writers
+            for other formats are never imported
+        store: Optional ResultsStore recording the gaps, timings and files
+        packed_gap_analysis: Gap analysis already produced for this policy
+            by a packed batch prompt (see pack_gap_analyses())
+        deadline: Optional time budget in seconds. Each LLM call's timeout
+            is what remains after the later stages' typical durations;
+            a call running past it is killed, the stages completed so far
+            are saved as <output_base>_partial.json and DeadlineExceeded
+            is raised
+        pdf_pool: Optional process pool shared by the run's analyses for
+            the PDFs (see pdf_generator.render_pool()); overrides pdf_workers
     
     Returns:
         Dictionary containing all analysis results
     """
+    metrics = RunMetrics(Path(policy_path).stem)
+    profiler = None
+    if profile or trace_memory:
+        profiler = ProfileCollector(cpu=profile, memory=trace_memory)
+        pdf_workers, pdf_pool = 1, None
+    
+    budget = Deadline(deadline, stage_history(output_dir)) if deadline else None
+    partial = {'output_base': None, 'stages': {}}
+    try:
+        with collect_metrics(metrics), (collect_profiles(profiler) if profiler else nullcontext()), \
+                within_deadline(budget):
+            results = _analyze_policy(policy_path, output_dir, dedup_index, incremental, checkpoint,
+                                      pdf_workers, pdf_pool, formats, packed_gap_analysis, partial)
+    except DeadlineExceeded as e:
+        _save_partial(policy_path, partial, metrics, e, checkpoint)
+        raise
+    
+    if profiler is not None:
+        profiler.write(results['output_base'])
+    
+    if budget is not None:
+        metrics.deadline = {'budget': budget.seconds, 'elapsed': budget.elapsed(), 'exceeded': False}
+    metrics.save(f"{results['output_base']}_metrics.json")
+    results['metrics'] = metrics.to_dict()
+    results['files'].append(f"{results['output_base']}_metrics.json")
+    record_history(output_dir, results['metrics'])
+    print(f"  ✓ Metrics saved: {Path(results['output_base']).name}_metrics.json")
+    
+    if store is not None:
+        store.record_policy(results, policy_path, checkpoint.run.run_id if checkpoint else None)
+        print(f"  ✓ Results recorded in {store.path}")
+    
+    if checkpoint is not None:
+        checkpoint.complete(results['files'])
+    
+    print(f"\n{'='*60}")
+    print("ANALYSIS COMPLETE")
+    print(f"{'='*60}\n")
+    
+    return results
+
+
+def _save_partial(policy_path, partial, metrics, error, checkpoint):
+    """Record the stages a policy completed before its deadline ran out."""
+    print(f"  ✗ {error}")
+    if partial['output_base'] is None:
+        return
+    output_base = partial['output_base']
+    files = save_partial(policy_path, output_base, partial['stages'], metrics, error)
+    print(f"  ✓ Partial results saved: {Path(output_base).name}_partial.json")
+    if checkpoint is not None:
+        checkpoint.interrupt(str(error), files)
+
+
+def _analyze_policy(policy_path, output_dir, dedup_index, incremental, checkpoint, pdf_workers, pdf_pool,
+                    formats, packed_gap_analysis, partial):
+    """Run the analysis pipeline stages; see analyze_policy()."""
     print(f"\n{'='*60}")
     print("LOCAL LLM POLICY GAP ANALYSIS MODULE")
     print(f"{'='*60}\n")
     
     # Load policy document
     print(f"[1/6] Loading policy document: {policy_path}")
-    policy_content = read_policy_document(policy_path)
+    with timed_stage('extraction'):
+        policy_content = read_policy_document(policy_path)
     policy_name = Path(policy_path).stem
     print(f"      Policy loaded: {len(policy_content)} characters\n")
     
+    output_base = os.path.join(output_dir, f"{policy_name}_{new_run_id()}")
+    if checkpoint is not None:
+        output_base = checkpoint.start(output_base)
+    partial['output_base'] = output_base
+    
     # Load NIST framework
     print("[2/6] Loading NIST Cybersecurity Framework standards...")
     framework_path = os.path.join('data', 'reference')
-    nist_framework = load_nist_framework(framework_path)
+    with timed_stage('framework_load'):
+        nist_framework = load_nist_framework(framework_path)
     print(f"      Framework loaded: {len(nist_framework)} characters\n")
     
+    # Check for a previous analysis of this policy, then for a batch duplicate
+    config = analysis_config(nist_framework)
+    reuse = None
+    reuse_source = 'stored_state'
+    previous = load_policy_state(output_dir, policy_name, config) if incremental else None
+    if previous is not None:
+        neighbor_name, neighbor = policy_name, previous
+        sections, changed, removed = diff_sections(policy_content, previous['sections'])
+        if previous['fingerprint'] == fingerprint_text(policy_content):
+            reuse = 'exact'
+            print("      Unchanged since last analysis: reusing stored results\n")
+        elif is_worth_reusing(sections, changed):
+            reuse = 'near'
+            print(f"      Edited since last analysis: re-analyzing {len(changed)} "
+                  f"of {len(sections)} sections\n")
+    
+    if reuse is None and dedup_index is not None:
+        reuse_source = 'duplicate'
+        kind, neighbor_name, neighbor, similarity = dedup_index.find(policy_content)
+        if kind == 'exact':
+            reuse = 'exact'
+            print(f"      Exact duplicate of {neighbor_name}: reusing its analysis\n")
+        elif kind == 'near':
+            sections, changed, removed = diff_sections(policy_content, neighbor['sections'])
+            if is_worth_reusing(sections, changed):
+                reuse = 'near'
+                print(f"      Near-duplicate of {neighbor_name} ({similarity:.0%} similar): "
+                      f"re-analyzing {len(changed)} of {len(sections)} sections\n")
+    
     # Analyze gaps
     print("[3/6] Analyzing policy gaps (this may take 1-2 minutes)...")
-    gap_analysis = analyze_policy_gaps(policy_content, nist_framework)
+    if reuse == 'exact':
+        compute = lambda: _reused(neighbor['gap_analysis'], reuse_source)
+    elif packed_gap_analysis is not None:
+        compute = lambda: _reused(packed_gap_analysis, 'packed')
+    elif reuse == 'near':
+        compute = lambda: incremental_gap_analysis(sections, changed, removed, neighbor['sections'],
+                                                   nist_framework, neighbor['gap_analysis'])
+    else:
+        compute = lambda: analyze_policy_gaps(policy_content, nist_framework)
+    gap_analysis = _run_stage(checkpoint, 'gap_analysis', compute, partial)
     print(f"      Gap analysis complete: {len(gap_analysis)} characters\n")
     
     # Revise policy
     print("[4/6] Generating revised policy (this may take 2-3 minutes)...")
-    revised_policy = revise_policy(policy_content, gap_analysis, nist_framework)
+    if reuse == 'exact':
+        compute = lambda: _reused(neighbor['revised_policy'], reuse_source)
+    elif reuse == 'near':
+        compute = lambda: incremental_revision(sections, changed, neighbor['sections'],
+                                               gap_analysis, nist_framework)
+    else:
+        compute = lambda: revise_policy(policy_content, gap_analysis, nist_framework)
+    revised_policy = _run_stage(checkpoint, 'revised_policy', compute, partial)
     print(f"      Revised policy generated: {len(revised_policy)} characters\n")
     
+    # Roadmap and summary depend only on the gaps, so reuse them when unchanged
+    if reuse == 'near' and same_findings(gap_analysis, neighbor['gap_analysis']):
+        reuse = 'exact'
+    
     # Generate roadmap
     print("[5/6] Creating improvement roadmap (this may take 1-2 minutes)...")
-    roadmap = generate_improvement_roadmap(gap_analysis, policy_name)
+    if reuse == 'exact':
+        compute = lambda: _reused(neighbor['roadmap'].replace(f"Policy: {neighbor_name}",
+                                                              f"Policy: {policy_name}"),
+                                  reuse_source)
+    else:
+        compute = lambda: generate_improvement_roadmap(gap_analysis, policy_name)
+    roadmap = _run_stage(checkpoint, 'roadmap', compute, partial)
     print(f"      Roadmap generated: {len(roadmap)} characters\n")
     
     # Generate executive summary
     print("[6/6] Generating executive summary...")
-    exec_summary = generate_executive_summary(gap_analysis, roadmap)
+    if reuse == 'exact':
+        compute = lambda: _reused(neighbor['executive_summary'], reuse_source)
+    else:
+        compute = lambda: generate_executive_summary(gap_analysis, roadmap)
+    exec_summary = _run_stage(checkpoint, 'executive_summary', compute, partial)
     print(f"      Executive summary complete\n")
     
-    # Save outputs
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_base = os.path.join(output_dir, f"{policy_name}_{timestamp}")
+    section_state = build_section_state(policy_content, gap_analysis, revised_policy)
+    
+    # Every report format is composed from one parsed model
+    report = ReportModel(policy_name, {
+        'gap_analysis': gap_analysis,
+        'revised_policy': revised_policy,
+        'roadmap': roadmap,
+        'executive_summary': exec_summary
+    })
     
     print(f"Saving reports to: {output_dir}/")
-    save_output(gap_analysis, f"{output_base}_gap_analysis.txt")
-    print(f"  ✓ Gap analysis saved")
+    files = write_reports(report, output_base, formats, pdf_workers, pdf_pool=pdf_pool)
     
-    save_output(revised_policy, f"{output_base}_revised_policy.txt")
-    print(f"  ✓ Revised policy saved")
+    results = {
+        'policy_name': policy_name,
+        'gap_analysis': gap_analysis,
+        'revised_policy': revised_policy,
+        'roadmap': roadmap,
+        'executive_summary': exec_summary,
+        'output_base': output_base,
+        'files': files,
+        'sections': section_state
+    }
     
-    save_output(roadmap, f"{output_base}_roadmap.txt")
-    print(f"  ✓ Improvement roadmap saved")
+    if incremental:
+        save_policy_state(output_dir, policy_content, results, config)
     
-    save_output(exec_summary, f"{output_base}_executive_summary.txt")
-    print(f"  ✓ Executive summary saved")
+    if dedup_index is not None and reuse != 'exact':
+        dedup_index.add(policy_name, policy_content, results)
     
-    # Generate comprehensive report
-    comprehensive_report = f"""
-{'='*80}
-COMPREHENSIVE POLICY ANALYSIS REPORT
-{'='*80}
-Policy: {policy_name}
-Analysis Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-Framework: NIST Cybersecurity Framework (CIS MS-ISAC 2024)
-{'='*80}
+    return results
 
-{exec_summary}
 
-{'='*80}
-DETAILED GAP ANALYSIS
-{'='*80}
-
-{gap_analysis}
-
-{'='*80}
-REVISED POLICY DOCUMENT
-{'='*80}
-
-{revised_policy}
-
-{'='*80}
-IMPLEMENTATION ROADMAP
-{'='*80}
+def generate_coverage_report(policy_paths, output_dir='output'):
+    """Score every framework control against the whole policy library."""
+    from coverage import load_policy_library, compute_coverage, format_coverage_report
+    
+    print("Computing control coverage across policy library...")
+    policies = load_policy_library(policy_paths)
+    if not policies:
+        print("  WARNING: No readable policies; skipping the coverage report\n")
+        return None
+    nist_framework = load_nist_framework(os.path.join('data', 'reference'))
+    coverage = compute_coverage(policies, nist_framework)
+    
+    report_path = os.path.join(output_dir, f"coverage_report_{new_run_id()}.txt")
+    save_output(format_coverage_report(coverage), report_path)
+    print(f"  ✓ Coverage report saved: {Path(report_path).name}\n")
+    
+    return coverage
 
-{roadmap}
 
-{'='*80}
-END OF REPORT
-{'='*80}
-"""
+def pack_gap_analyses(run, policies, output_dir, incremental=True, pack_size=DEFAULT_PACK_SIZE, workers=1,
+                      deadline=None):
+    """
+    Analyze the gaps of small batch policies several per prompt.
     
-    save_output(comprehensive_report, f"{output_base}_comprehensive_report.txt")
-    print(f"  ✓ Comprehensive report saved\n")
+    Policies with a checkpointed gap analysis, or stored results that an
+    incremental run reuses, are left out, as are files too large to pack,
+    which are never read here; identical policies share one slot.
+    Packs cut off by the batch `deadline` (a Deadline) are left for
+    individual analysis.
     
-    # Generate PDF versions
-    print("Generating PDF reports with formatted output...")
-    results_dict = {
-        'policy_name': policy_name,
-        'gap_analysis': gap_analysis,
-        'revised_policy': revised_policy,
-        'roadmap': roadmap,
-        'executive_summary': exec_summary
-    }
+    Returns:
+        Dictionary of policy path -> gap analysis for analyze_policy()
+    """
+    nist_framework = load_nist_framework(os.path.join('data', 'reference'))
+    config = analysis_config(nist_framework)
+    slots = {}
+    for policy_path in policies:
+        name = Path(policy_path).stem
+        if not may_pack(policy_path):
+            continue
+        if 'gap_analysis' in run.policy(policy_path).entry['stages']:
+            continue
+        if incremental and load_policy_state(output_dir, name, config) is not None:
+            continue
+        content = read_policy_document(str(policy_path))
+        slot = slots.setdefault(fingerprint_text(content), (name, content, []))
+        slot[2].append(str(policy_path))
     
-    try:
-        pdf_files = generate_all_pdfs(results_dict, output_base)
-        for pdf_file in pdf_files:
-            print(f"  ✓ PDF saved: {Path(pdf_file).name}")
-    except Exception as e:
-        print(f"  ⚠ PDF generation failed: {e}")
-        print(f"  Note: Text reports are still available")
+    packs = plan_packs([(key, name, content) for key, (name, content, _) in slots.items()],
+                       pack_size, len(nist_framework))
+    if not packs:
+        return {}
     
-    print(f"\n{'='*60}")
-    print("ANALYSIS COMPLETE")
-    print(f"{'='*60}\n")
+    print(f"Packing {sum(len(pack) for pack in packs)} small policies into {len(packs)} gap analysis prompts...")
     
-    return {
-        'policy_name': policy_name,
-        'gap_analysis': gap_analysis,
-        'revised_policy': revised_policy,
-        'roadmap': roadmap,
-        'executive_summary': exec_summary,
-        'output_base': output_base
-    }
+    def analyze_pack(pack):
+        metrics = RunMetrics(f"pack of {len(pack)}")
+        try:
+            with collect_metrics(metrics), within_deadline(deadline), \
+                    timed_stage('packed_gap_analysis', policies=len(pack)):
+                reports = analyze_packed_gaps(pack, nist_framework)
+        except DeadlineExceeded as e:
+            print(f"  ✗ Packed prompt stopped: {e}")
+            reports = {}
+        return reports, metrics
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='pack-worker') as executor:
+        outcomes = list(executor.map(analyze_pack, packs))
+    
+    packed = {}
+    for reports, _ in outcomes:
+        for key, report in reports.items():
+            packed.update(dict.fromkeys(slots[key][2], report))
+    missed = sum(len(pack) for pack in packs) - sum(len(reports) for reports, _ in outcomes)
+    print(f"  ✓ {sum(len(reports) for reports, _ in outcomes)} gap analyses from packed prompts"
+          + (f" ({missed} left for individual analysis)" if missed else "") + "\n")
+    
+    save_output(json.dumps([metrics.to_dict() for _, metrics in outcomes], indent=2),
+                os.path.join(run.run_dir, PACKED_METRICS_NAME))
+    return packed
+
+
+def write_batch_metrics(run):
+    """Aggregate the metrics of every completed policy in a run into one report."""
+    runs = []
+    for entry in run.manifest['policies']:
+        metrics_path = f"{entry['output_base']}_metrics.json"
+        if entry['status'] == 'complete' and os.path.exists(metrics_path):
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                runs.append(json.load(f))
+    
+    report = aggregate_metrics(runs)
+    packed_path = os.path.join(run.run_dir, PACKED_METRICS_NAME)
+    if os.path.exists(packed_path):
+        with open(packed_path, 'r', encoding='utf-8') as f:
+            report['packed'] = aggregate_metrics(json.load(f))
+    
+    report_path = os.path.join(run.run_dir, 'batch_metrics.json')
+    save_output(json.dumps(report, indent=2), report_path)
+    print(f"Batch metrics saved: {report_path}")
+
+
+def _seed_dedup_index(dedup_index, run, output_dir):
+    """Index policies already completed in a resumed run so later duplicates reuse them."""
+    config = analysis_config(load_nist_framework(os.path.join('data', 'reference')))
+    for entry in run.manifest['policies']:
+        if entry['status'] != 'complete':
+            continue
+        state = load_policy_state(output_dir, Path(entry['path']).stem, config)
+        if state is not None:
+            dedup_index.add(Path(entry['path']).stem, read_policy_document(entry['path']), state)
 
 
 def main():
@@ -160,6 +414,8 @@ Examples:
   python main.py --policy data/test_policies/isms_policy.txt
   python main.py --policy data/test_policies/data_privacy_policy.txt --output results
   python main.py --batch data/test_policies/
+  python main.py --batch data/test_policies/ --coverage
+  python main.py --resume 20240101_120000_a1b2c3
 
 Note: Requires Ollama with gemma3:4b model installed.
       System operates completely offline after initial setup.
@@ -185,31 +441,414 @@ Note: Requires Ollama with gemma3:4b model installed.
         help='Output directory for reports (default: output)'
     )
     
+    parser.add_argument(
+        '--coverage',
+        action='store_true',
+        help='Also write a library-wide NIST control coverage report'
+    )
+    
+    parser.add_argument(
+        '--no-dedup',
+        action='store_true',
+        help='Analyze every batch policy in full, even exact or near duplicates'
+    )
+    
+    parser.add_argument(
+        '--no-incremental',
+        action='store_true',
+        help='Ignore stored results of previous runs and re-analyze every section'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        type=str,
+        metavar='RUN',
+        help='Resume an interrupted run (run ID or run directory), skipping completed stages'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile each stage with cProfile and write .pstats files next to the reports'
+    )
+    
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help='Record top memory allocations per stage with tracemalloc'
+    )
+    
+    parser.add_argument(
+        '--pdf-workers',
+        type=int,
+        metavar='N',
+        help='Processes rendering each analysis\'s PDF reports; the run shares one pool of at most one '
+             'process per CPU (default: CPUs divided among concurrent analyses, 1 = sequential)'
+    )
+    
+    parser.add_argument(
+        '--formats',
+        type=str,
+        default=','.join(DEFAULT_FORMATS),
+        help='Comma-separated report formats: txt, pdf, md, html, docx (default: txt,pdf)'
+    )
+    
+    parser.add_argument(
+        '--db',
+        nargs='?',
+        const='',
+        metavar='PATH',
+        help=f'Record gaps, timings and files in an SQLite store (default: <output>/{DB_NAME})'
+    )
+    
+    parser.add_argument(
+        '--bundle',
+        action='store_true',
+        help='Also pack the run\'s reports and metrics into one zip with a hashed manifest'
+    )
+    
+    parser.add_argument(
+        '--pack',
+        type=int,
+        nargs='?',
+        const=DEFAULT_PACK_SIZE,
+        metavar='N',
+        help=f'Analyze the gaps of small batch policies (<= {PACK_MAX_POLICY_SIZE} characters) '
+             f'N per prompt, sharing the framework context (default N: {DEFAULT_PACK_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--model',
+        type=str,
+        default=DEFAULT_MODEL,
+        help=f'Ollama model for every stage, or a comma-separated cascade tried smallest first '
+             f'(default: {DEFAULT_MODEL})'
+    )
+    
+    parser.add_argument(
+        '--stage-model',
+        action='append',
+        default=[],
+        metavar='STAGE=MODEL',
+        help=f'Model or cascade for one stage, e.g. roadmap=gemma3:1b or '
+             f'gap_analysis=gemma3:1b,gemma3:12b (stages: {", ".join(MODEL_STAGES)}); repeatable'
+    )
+    
+    parser.add_argument(
+        '--endpoints',
+        type=str,
+        metavar='HOSTS',
+        help='Comma-separated Ollama servers to balance LLM calls across, each host:port '
+             'with an optional =N concurrency cap (e.g. 127.0.0.1:11434=2,10.0.0.5:11434)'
+    )
+    
+    parser.add_argument(
+        '--batch-workers',
+        type=int,
+        metavar='N',
+        help='Policies analyzed concurrently in batch mode (default: total endpoint capacity, or 1)'
+    )
+    
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        metavar='SECONDS',
+        help='Time budget per policy, shared across its stages by their typical durations; a policy '
+             'running over is stopped and its completed stages saved as <report>_partial.json'
+    )
+    
+    parser.add_argument(
+        '--batch-deadline',
+        type=float,
+        metavar='SECONDS',
+        help='Time budget for a whole batch; each policy gets a fair share of what remains and '
+             'policies not started in time are left for --resume'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run as a long-lived service accepting analysis jobs over a local HTTP API'
+    )
+    
+    parser.add_argument(
+        '--host',
+        type=str,
+        default=DEFAULT_HOST,
+        help=f'Address the service listens on (default: {DEFAULT_HOST})'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=DEFAULT_PORT,
+        help=f'Port the service listens on (default: {DEFAULT_PORT})'
+    )
+    
+    parser.add_argument(
+        '--serve-workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Jobs the service analyzes concurrently (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        metavar='N',
+        help=f'Jobs the service accepts before rejecting submissions (default: {DEFAULT_QUEUE_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--serve-root',
+        type=str,
+        metavar='DIR',
+        help='Directory whose policies the service accepts by path; without it only uploads are accepted'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        type=str,
+        metavar='DIR',
+        help='Watch a directory and analyze new or changed policies as they arrive'
+    )
+    
+    parser.add_argument(
+        '--watch-workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Policies analyzed concurrently in watch mode (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar='SECONDS',
+        help=f'Time a watched file must stay unchanged before analysis (default: {DEFAULT_DEBOUNCE:g})'
+    )
+    
+    parser.add_argument(
+        '--worker',
+        type=str,
+        metavar='DIR',
+        help='Work through the policies in a shared directory together with other --worker '
+             'processes, claiming each through a lease file; exits when all are analyzed'
+    )
+    
+    parser.add_argument(
+        '--lease-timeout',
+        type=float,
+        default=DEFAULT_LEASE_TIMEOUT,
+        metavar='SECONDS',
+        help=f'Time without a heartbeat after which a worker\'s lease is reclaimed '
+             f'(default: {DEFAULT_LEASE_TIMEOUT:g})'
+    )
+    
     args = parser.parse_args()
     
-    if not args.policy and not args.batch:
+    # Pipeline warnings (truncation, repairs, escalations, endpoint failover) go to stderr
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.WARNING)
+    
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    try:
+        set_stage_models(parse_models(args.model), dict(parse_stage_model(spec) for spec in args.stage_model))
+    except ValueError as e:
+        parser.error(str(e))
+    
+    scheduler = None
+    if args.endpoints:
+        try:
+            scheduler = set_llm_endpoints(parse_endpoints(args.endpoints))
+        except ValueError as e:
+            parser.error(str(e))
+    
+    for name in ('deadline', 'batch_deadline'):
+        if getattr(args, name) is not None and getattr(args, name) <= 0:
+            parser.error(f"--{name.replace('_', '-')} must be a positive number of seconds")
+    
+    store = None
+    if args.db is not None:
+        store = ResultsStore(args.db or os.path.join(args.output, DB_NAME))
+    
+    # Analyses running at once in this mode
+    if args.serve:
+        concurrency = args.serve_workers
+    elif args.watch:
+        concurrency = args.watch_workers
+    elif args.worker:
+        concurrency = 1
+    elif args.profile or args.trace_memory:
+        # Stage profilers are process-wide, so profiled runs analyze one policy at a time
+        concurrency = 1
+    else:
+        concurrency = args.batch_workers or (scheduler.capacity if scheduler else 1)
+    
+    # One render pool for the whole run, so concurrent analyses never hold more than a process per CPU
+    cpus = os.cpu_count() or 1
+    pdf_workers = args.pdf_workers or max(1, cpus // concurrency)
+    pdf_pool = None
+    if 'pdf' in formats and pdf_workers > 1 and not (args.profile or args.trace_memory):
+        from pdf_generator import render_pool
+        pdf_pool = render_pool(min(pdf_workers * concurrency, cpus))
+    
+    # Options shared by every analysis of the long-running modes
+    service_options = {
+        'dedup_index': None if args.no_dedup else DuplicateIndex(max_entries=SERVICE_MAX_ENTRIES),
+        'incremental': not args.no_incremental,
+        'pdf_workers': pdf_workers,
+        'pdf_pool': pdf_pool,
+        'formats': formats,
+        'deadline': args.deadline
+    }
+    
+    try:
+        _run_mode(args, parser, formats, store, concurrency, service_options)
+    finally:
+        if pdf_pool is not None:
+            pdf_pool.shutdown()
+
+
+def _run_mode(args, parser, formats, store, batch_workers, service_options):
+    """Run the service, watch, worker or batch mode selected on the command line."""
+    if args.serve:
+        serve(analyze_policy, args.host, args.port, args.output, args.serve_workers, args.queue_size, store,
+              args.serve_root, **service_options)
+        return
+    
+    if args.watch:
+        watcher = PolicyWatcher(args.watch, analyze_policy, args.output, args.watch_workers, args.debounce,
+                                store=store, **service_options)
+        try:
+            watcher.watch()
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+        return
+    
+    if args.worker:
+        run_worker(args.worker, analyze_policy, args.output, args.lease_timeout, store=store,
+                   **service_options)
+        return
+    
+    if not args.policy and not args.batch and not args.resume:
         parser.print_help()
         sys.exit(1)
     
+    run = None
+    # Started before anything else so extraction and packing count against the window
+    batch_deadline = Deadline(args.batch_deadline) if args.batch_deadline else None
     try:
-        if args.batch:
+        output_dir = args.output
+        if args.resume:
+            run = RunCheckpoint.load(args.resume, args.output)
+            output_dir = run.manifest['output_dir']
+            policies = run.pending()
+            print(f"\nResuming run {run.run_id}: {len(policies)} of "
+                  f"{len(run.manifest['policies'])} policies remaining\n")
+        elif args.batch:
             # Batch processing
             policy_dir = Path(args.batch)
             policies = list(policy_dir.glob('*.txt')) + list(policy_dir.glob('*.pdf')) + list(policy_dir.glob('*.docx'))
             
             print(f"\nFound {len(policies)} policies to analyze\n")
             
-            for policy_path in policies:
-                analyze_policy(str(policy_path), args.output)
-                print("\n")
+            if args.coverage:
+                generate_coverage_report(policies, output_dir)
         else:
             # Single policy analysis
-            analyze_policy(args.policy, args.output)
+            policies = [args.policy]
+            if args.coverage:
+                generate_coverage_report(policies, output_dir)
+        
+        if run is None:
+            run = RunCheckpoint.create(output_dir, policies)
+            print(f"Run ID: {run.run_id} (resume with --resume {run.run_id})\n")
+        
+        if store is not None:
+            store.record_run(run.run_id, output_dir)
+        
+        dedup_index = None
+        if not args.no_dedup and len(run.manifest['policies']) > 1:
+            dedup_index = DuplicateIndex()
+            if not args.no_incremental:
+                _seed_dedup_index(dedup_index, run, output_dir)
+        
+        packed = {}
+        if args.pack and len(policies) > 1:
+            packed = pack_gap_analyses(run, policies, output_dir, not args.no_incremental, args.pack,
+                                       batch_workers, batch_deadline)
+        
+        # Policies stopped by a deadline or never started before the batch deadline
+        missed = []
+        unstarted = len(policies)
+        schedule_lock = threading.Lock()
+        
+        def analyze(policy_path):
+            nonlocal unstarted
+            deadline = args.deadline
+            if batch_deadline is not None:
+                # Time a policy leaves unused passes on to the policies after it
+                with schedule_lock:
+                    share = batch_deadline.share(unstarted, batch_workers)
+                    unstarted -= 1
+                if share <= 0:
+                    print(f"Batch deadline reached; not starting {Path(policy_path).name}")
+                    missed.append(str(policy_path))
+                    return
+                deadline = min(deadline, share) if deadline else share
+            try:
+                analyze_policy(str(policy_path), output_dir, dedup_index,
+                               incremental=not args.no_incremental,
+                               checkpoint=run.policy(policy_path),
+                               profile=args.profile, trace_memory=args.trace_memory,
+                               pdf_workers=service_options['pdf_workers'],
+                               pdf_pool=service_options['pdf_pool'], formats=formats, store=store,
+                               packed_gap_analysis=packed.get(str(policy_path)), deadline=deadline)
+            except DeadlineExceeded:
+                missed.append(str(policy_path))
+            if len(policies) > 1:
+                print("\n")
+        
+        if batch_workers <= 1 or len(policies) <= 1:
+            for policy_path in policies:
+                analyze(policy_path)
+        else:
+            print(f"Analyzing {len(policies)} policies with {batch_workers} workers\n")
+            with ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='batch-worker') as executor:
+                futures = [executor.submit(analyze, policy_path) for policy_path in policies]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    # Stop queued policies; running ones finish and stay checkpointed
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        if len(run.manifest['policies']) > 1:
+            write_batch_metrics(run)
+        
+        if args.bundle:
+            print(f"Run bundle saved: {write_run_bundle(run)}")
+        
+        if missed:
+            print(f"\n{len(missed)} of {len(policies)} policies did not finish within the deadline. "
+                  f"Resume with: --resume {run.run_id} --output {output_dir}", file=sys.stderr)
+            sys.exit(1)
     
     except Exception as e:
         print(f"\nERROR: {e}", file=sys.stderr)
+        if run is not None and run.pending():
+            print(f"Completed stages are saved. Resume with: --resume {run.run_id} --output {output_dir}",
+                  file=sys.stderr)
         sys.exit(1)
 
-
 if __name__ == '__main__':
     main()
@@ -0,0 +1,214 @@
+"""Per-run timing, token throughput and cache metrics emitted as JSON."""
+
+import contextvars
+import json
+import time
+from contextlib import contextmanager, ExitStack
+from datetime import datetime
+
+from utils import atomic_write
+
+_current_metrics = contextvars.ContextVar('current_metrics', default=None)
+_current_stage = contextvars.ContextVar('current_stage', default=None)
+
+# Context manager factories called as hook(name, details) around every timed stage
+_stage_hooks = []
+
+
+def add_stage_hook(hook):
+    """Run `hook(name, details)` as a context manager around every timed stage."""
+    if hook not in _stage_hooks:
+        _stage_hooks.append(hook)
+
+
+class RunMetrics:
+    """Metrics collected while analyzing one policy."""
+
+    def __init__(self, policy_name):
+        self.policy_name = policy_name
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.total_time = None
+        self.stages = []
+        self.llm_calls = []
+        self.escalations = []
+        self.repairs = []
+        self.cache_hits = {}
+        # Time budget of the analysis and whether it was met (see deadlines.Deadline)
+        self.deadline = None
+
+    def to_dict(self):
+        return {
+            'policy_name': self.policy_name,
+            'started': self.started,
+            'total_time': self.total_time,
+            'stages': self.stages,
+            'llm_calls': self.llm_calls,
+            'escalations': self.escalations,
+            'repairs': self.repairs,
+            'cache_hits': self.cache_hits,
+            'deadline': self.deadline
+        }
+
+    def save(self, output_path):
+        atomic_write(json.dumps(self.to_dict(), indent=2), output_path)
+
+
+def current_metrics():
+    """The RunMetrics collecting for the current context, or None."""
+    return _current_metrics.get()
+
+
+def current_stage():
+    """Name of the timed stage running in the current context, or None."""
+    return _current_stage.get()
+
+
+@contextmanager
+def collect_metrics(metrics):
+    """Route metrics recorded in this context (and its LLM calls) to `metrics`."""
+    token = _current_metrics.set(metrics)
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total_time = time.perf_counter() - start
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def timed_stage(name, **details):
+    """Record the wall time of a pipeline stage; a no-op outside collect_metrics()."""
+    metrics = _current_metrics.get()
+    token = _current_stage.set(name)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as hooks:
+            for hook in _stage_hooks:
+                hooks.enter_context(hook(name, details))
+            yield
+    finally:
+        _current_stage.reset(token)
+        if metrics is not None:
+            metrics.stages.append({'stage': name, 'wall_time': time.perf_counter() - start, **details})
+
+
+def record_stage(name, wall_time, **details):
+    """Record a stage timed elsewhere, such as in a worker process."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.stages.append({'stage': name, 'wall_time': wall_time, **details})
+
+
+def record_llm_call(model, prompt_chars, completion_chars, stats):
+    """Record one LLM call with the statistics returned by the backend."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return
+    metrics.llm_calls.append({
+        'stage': _current_stage.get(),
+        'model': model,
+        'endpoint': stats.get('endpoint'),
+        'prompt_chars': prompt_chars,
+        'completion_chars': completion_chars,
+        'prompt_tokens': stats.get('prompt_eval_count'),
+        'completion_tokens': stats.get('eval_count'),
+        'wall_time': stats.get('wall_time'),
+        'time_to_first_token': stats.get('time_to_first_token'),
+        'load_duration': stats.get('load_duration'),
+        'prompt_eval_duration': stats.get('prompt_eval_duration'),
+        'eval_duration': stats.get('eval_duration'),
+        'tokens_per_second': stats.get('tokens_per_second')
+    })
+
+
+def record_escalation(stage, from_model, to_model, missing):
+    """Record a model cascade retrying a stage because its output missed required sections."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.escalations.append({'stage': stage, 'from_model': from_model, 'to_model': to_model,
+                                    'missing': missing})
+
+
+def record_repair(stage, model, missing, still_missing):
+    """Record a follow-up call that regenerated only the sections missing from a stage's output."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.repairs.append({'stage': stage, 'model': model, 'missing': missing,
+                                'still_missing': still_missing})
+
+
+def record_cache_hit(source):
+    """Count a stage result served without an LLM call (checkpoint, duplicate, ...)."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.cache_hits[source] = metrics.cache_hits.get(source, 0) + 1
+
+
+def _summarize(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {'count': len(values), 'total': sum(values), 'mean': sum(values) / len(values),
+            'min': min(values), 'max': max(values)}
+
+
+def aggregate_metrics(runs):
+    """
+    Aggregate per-policy metrics dictionaries into a batch report.
+
+    Returns:
+        Dictionary with per-stage and per-LLM-stage summaries and totals
+    """
+    stage_times = {}
+    for run in runs:
+        for stage in run['stages']:
+            name = stage['stage'] + (f":{stage['document']}" if 'document' in stage else '')
+            stage_times.setdefault(name, []).append(stage['wall_time'])
+
+    llm_by_stage = {}
+    for run in runs:
+        for call in run['llm_calls']:
+            llm_by_stage.setdefault(call['stage'], []).append(call)
+
+    llm_by_model = {}
+    llm_by_endpoint = {}
+    for run in runs:
+        for call in run['llm_calls']:
+            llm_by_model.setdefault(call['model'], []).append(call['wall_time'])
+            if call.get('endpoint'):
+                llm_by_endpoint.setdefault(call['endpoint'], []).append(call['wall_time'])
+
+    escalations = {}
+    repairs = {}
+    for run in runs:
+        for escalation in run.get('escalations', []):
+            escalations[escalation['stage']] = escalations.get(escalation['stage'], 0) + 1
+        for repair in run.get('repairs', []):
+            repairs[repair['stage']] = repairs.get(repair['stage'], 0) + 1
+
+    cache_hits = {}
+    for run in runs:
+        for source, count in run['cache_hits'].items():
+            cache_hits[source] = cache_hits.get(source, 0) + count
+
+    return {
+        'policies': len(runs),
+        'total_time': sum(run['total_time'] or 0 for run in runs),
+        'stages': {name: _summarize(times) for name, times in stage_times.items()},
+        'llm': {
+            stage: {
+                'calls': len(calls),
+                'wall_time': _summarize([call['wall_time'] for call in calls]),
+                'time_to_first_token': _summarize([call['time_to_first_token'] for call in calls]),
+                'prompt_tokens': _summarize([call['prompt_tokens'] for call in calls]),
+                'completion_tokens': _summarize([call['completion_tokens'] for call in calls]),
+                'tokens_per_second': _summarize([call['tokens_per_second'] for call in calls])
+            }
+            for stage, calls in llm_by_stage.items()
+        },
+        'models': {model: _summarize(times) for model, times in llm_by_model.items()},
+        'escalations': escalations,
+        'repairs': repairs,
+        'endpoints': {endpoint: _summarize(times) for endpoint, times in llm_by_endpoint.items()},
+        'cache_hits': cache_hits
+    }
@@ -0,0 +1,126 @@
+"""Pack several small policies into one gap analysis prompt sharing the framework context."""
+
+import os
+import re
+from pathlib import Path
+
+from gap_analyzer import call_local_llm, stage_models, MAX_PROMPT_SIZE
+from validation import missing_sections
+
+PACK_MAX_POLICY_SIZE = 2048  # characters; larger policies are analyzed on their own
+DEFAULT_PACK_SIZE = 4  # policies per packed prompt
+# File size bounds checked before a policy is read; UTF-8 text takes at most
+# 4 bytes per character, extracted documents carry their own markup overhead
+PACK_MAX_FILE_SIZE = {'.txt': PACK_MAX_POLICY_SIZE * 4, '.pdf': 64 * 1024, '.docx': 64 * 1024}
+
+# Report delimiter the model is asked to write before each policy's analysis
+REPORT_MARKER = re.compile(r'^[ \t#*=]*GAP ANALYSIS (\d+)\b.*$', re.MULTILINE)
+
+
+def may_pack(policy_path):
+    """Whether a policy file is small enough to be worth reading as a packing candidate."""
+    limit = PACK_MAX_FILE_SIZE.get(Path(policy_path).suffix.lower())
+    try:
+        return limit is not None and os.path.getsize(policy_path) <= limit
+    except OSError:
+        return False
+
+
+def plan_packs(policies, pack_size=DEFAULT_PACK_SIZE, framework_size=0):
+    """
+    Group small policies into packs.
+
+    Args:
+        policies: List of (key, name, content) tuples
+        pack_size: Maximum policies per pack
+        framework_size: Length of the framework text every prompt carries
+
+    Returns:
+        List of packs of at least two policies each
+    """
+    small = [policy for policy in policies if len(policy[2]) <= PACK_MAX_POLICY_SIZE]
+    # Leave room for the instructions and per-policy delimiters
+    budget = MAX_PROMPT_SIZE - framework_size - 4000
+    packs, current, size = [], [], 0
+    for policy in small:
+        cost = len(policy[2]) + 200
+        if current and (len(current) == pack_size or size + cost > budget):
+            packs.append(current)
+            current, size = [], 0
+        current.append(policy)
+        size += cost
+    packs.append(current)
+    return [pack for pack in packs if len(pack) > 1]
+
+
+def build_packed_gap_analysis_prompt(pack, nist_framework):
+    """Build one gap analysis prompt covering every policy of a pack."""
+    policies_text = '\n\n'.join(
+        f"===== POLICY {number}: {name} =====\n{content}\n===== END OF POLICY {number} ====="
+        for number, (_, name, content) in enumerate(pack, 1))
+
+    prompt = f"""You are a cybersecurity policy analyst. Compare EACH of the {len(pack)} organizational policies below against the NIST Cybersecurity Framework standards and identify ALL gaps, weaknesses, and missing elements. Analyze every policy separately; do not mix findings between policies.
+
+NIST FRAMEWORK STANDARDS:
+{nist_framework}
+
+ORGANIZATIONAL POLICIES TO ANALYZE:
+{policies_text}
+
+For EACH policy, in order, write a separate report. Start each report with the line
+===== GAP ANALYSIS <number>: <policy name> =====
+followed by the gap analysis in this format:
+
+GAP ANALYSIS REPORT
+===================
+
+1. CRITICAL GAPS (High Priority)
+[List all critical missing elements with specific references to NIST requirements]
+
+2. SIGNIFICANT GAPS (Medium Priority)
+[List all significant weaknesses and incomplete provisions]
+
+3. MINOR GAPS (Low Priority)
+[List all minor improvements needed]
+
+4. SUMMARY
+[Provide overall assessment and key findings]
+
+Be specific and reference exact NIST controls that are missing or inadequately addressed."""
+
+    return prompt
+
+
+def split_packed_response(response, count):
+    """
+    Split a packed response into the reports of each policy.
+
+    Returns:
+        Dictionary of policy number (1-based) -> report text; numbers whose
+        report is absent or misses template sections are left out
+    """
+    markers = [(match.start(), match.end(), int(match.group(1))) for match in REPORT_MARKER.finditer(response)]
+    reports = {}
+    for index, (_, end, number) in enumerate(markers):
+        stop = markers[index + 1][0] if index + 1 < len(markers) else len(response)
+        report = response[end:stop].strip()
+        if 1 <= number <= count and number not in reports and not missing_sections('gap_analysis', report):
+            reports[number] = report
+    return reports
+
+
+def analyze_packed_gaps(pack, nist_framework):
+    """
+    Run one packed gap analysis.
+
+    The pack uses the first model configured for the gap analysis stage;
+    policies whose report cannot be recovered from the response are left
+    for individual analysis, which applies the full model cascade.
+
+    Returns:
+        Dictionary of policy key -> gap analysis text
+    """
+    prompt = build_packed_gap_analysis_prompt(pack, nist_framework)
+    response = call_local_llm(prompt, model=stage_models('gap_analysis')[0])
+    reports = split_packed_response(response, len(pack))
+    return {pack[number - 1][0]: report for number, report in reports.items()}
@@ -6,9 +6,38 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.lib.colors import HexColor
-from datetime import datetime
-import re
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from concurrent.futures import ProcessPoolExecutor
 import html
+import multiprocessing
+import os
+import re
+import time
+
+from metrics import record_stage, timed_stage
+from utils import atomic_path
+from report_model import parse_blocks
+
+BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+
+# Reports with more text than this (characters) skip Platypus layout and are
+# drawn straight onto a canvas, e.g. revised policies of several hundred pages
+STREAMING_THRESHOLD = 1000000
+
+# Direct-canvas writer: block kind -> (font, size, indent, space before)
+CANVAS_STYLES = {
+    'title': ('Helvetica-Bold', 14, 0, 8),
+    'heading': ('Helvetica-Bold', 12, 0, 6),
+    'bold': ('Helvetica-Bold', 10, 0, 4),
+    'bullet': ('Helvetica', 10, 20, 0),
+    'numbered': ('Helvetica', 10, 20, 0),
+    'body': ('Helvetica', 10, 0, 0)
+}
+PAGE_MARGIN = 0.75*inch
+
+# Paragraph styles are built on first use and shared by every report in the process
+_styles = None
 
 
 def escape_html(text):
@@ -20,12 +49,11 @@ def escape_html(text):
     return text
 
 
-def create_pdf_report(content, output_path, title="Policy Analysis Report"):
-    """Generate formatted PDF from markdown-style text content."""
-    
-    doc = SimpleDocTemplate(output_path, pagesize=letter,
-                           topMargin=0.75*inch, bottomMargin=0.75*inch,
-                           leftMargin=0.75*inch, rightMargin=0.75*inch)
+def get_styles():
+    """Report paragraph styles, built once per process."""
+    global _styles
+    if _styles is not None:
+        return _styles
     
     styles = getSampleStyleSheet()
     
@@ -48,119 +76,163 @@ def create_pdf_report(content, output_path, title="Policy Analysis Report"):
     styles.add(ParagraphStyle(name='CustomBullet', parent=styles['BodyText'],
                              fontSize=10, leftIndent=20, spaceAfter=4))
     
-    story = []
+    _styles = styles
+    return styles
+
+
+def build_story(blocks, styles):
+    """Convert parsed report blocks into Platypus flowables."""
     
-    # Parse content
-    lines = content.split('\n')
+    story = []
     
-    for line in lines:
-        line = line.rstrip()
-        
-        # Skip separator lines
-        if re.match(r'^[=\-]{3,}$', line):
+    for kind, text in blocks:
+        if kind in ('separator', 'blank'):
             story.append(Spacer(1, 0.1*inch))
-            continue
-        
-        # Title (all caps lines or lines with many =)
-        if line.isupper() and len(line) > 10 and not line.startswith((' ', '\t', '-', '*', '•')):
+        elif kind == 'title':
             story.append(Spacer(1, 0.15*inch))
-            story.append(Paragraph(escape_html(line), styles['CustomTitle']))
-            continue
-        
-        # Headings (lines ending with : or starting with **)
-        if line.endswith(':') and len(line) < 80 and not line.startswith((' ', '\t')):
-            story.append(Paragraph(escape_html(line), styles['CustomHeading2']))
-            continue
-        
-        # Bold sections (**text**)
-        if '**' in line:
+            story.append(Paragraph(escape_html(text), styles['CustomTitle']))
+        elif kind == 'heading':
+            story.append(Paragraph(escape_html(text), styles['CustomHeading2']))
+        elif kind == 'bold':
             # Properly handle bold markdown
-            clean_line = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', line)
+            clean_line = BOLD_PATTERN.sub(r'<b>\1</b>', text)
             story.append(Paragraph(escape_html(clean_line).replace('&lt;b&gt;', '<b>').replace('&lt;/b&gt;', '</b>'), styles['CustomHeading2']))
+        elif kind == 'bullet':
+            story.append(Paragraph(f"• {escape_html(text)}", styles['CustomBullet']))
+        elif kind == 'numbered':
+            story.append(Paragraph(escape_html(text), styles['CustomBullet']))
+        else:
+            story.append(Paragraph(escape_html(text), styles['CustomBody']))
+    
+    return story
+
+
+def write_pdf_canvas(blocks, output_path):
+    """
+    Draw report blocks straight onto a canvas with simple wrapping and page breaks.
+    
+    No flowables are built, so memory does not grow with a Platypus story;
+    each finished page is only kept as its compressed content stream.
+    """
+    page_width, page_height = letter
+    text_width = page_width - 2*PAGE_MARGIN
+    
+    pdf = canvas.Canvas(output_path, pagesize=letter, pageCompression=1)
+    y = page_height - PAGE_MARGIN
+    
+    for kind, text in blocks:
+        if kind in ('separator', 'blank'):
+            y -= 0.1*inch
             continue
         
-        # Bullet points
-        if line.strip().startswith(('-', '*', '•')):
-            clean_line = line.strip().lstrip('-*• ')
-            story.append(Paragraph(f"• {escape_html(clean_line)}", styles['CustomBullet']))
-            continue
+        font, size, indent, space_before = CANVAS_STYLES[kind]
+        if kind == 'bullet':
+            text = f"• {text}"
+        elif kind == 'bold':
+            text = text.replace('**', '')
+        leading = size * 1.2
+        y -= space_before
         
-        # Numbered lists
-        if re.match(r'^\s*\d+\.', line):
-            story.append(Paragraph(escape_html(line.strip()), styles['CustomBullet']))
-            continue
+        pdf.setFont(font, size)
+        for line in simpleSplit(text, font, size, text_width - indent):
+            if y - leading < PAGE_MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, size)
+                y = page_height - PAGE_MARGIN
+            y -= leading
+            if kind == 'title':
+                pdf.drawCentredString(page_width / 2, y, line)
+            else:
+                pdf.drawString(PAGE_MARGIN + indent, y, line)
+    
+    pdf.save()
+
+
+def write_pdf(blocks, output_path, streaming=None):
+    """
+    Lay out parsed report blocks into a PDF file.
+    
+    Args:
+        blocks: Parsed report blocks
+        output_path: PDF file path
+        streaming: Use the direct-canvas writer; None picks it for reports
+            larger than STREAMING_THRESHOLD characters
+    """
+    if streaming is None:
+        streaming = sum(len(text) for _, text in blocks) > STREAMING_THRESHOLD
+    
+    # Rendered under a temporary name so a crash never leaves a partial PDF
+    with atomic_path(output_path) as temp_path:
+        if streaming:
+            write_pdf_canvas(blocks, temp_path)
+            return
         
-        # Regular paragraphs
-        if line.strip():
-            story.append(Paragraph(escape_html(line), styles['CustomBody']))
-        else:
-            story.append(Spacer(1, 0.1*inch))
-    
-    doc.build(story)
+        doc = SimpleDocTemplate(temp_path, pagesize=letter,
+                               topMargin=0.75*inch, bottomMargin=0.75*inch,
+                               leftMargin=0.75*inch, rightMargin=0.75*inch)
+        
+        doc.build(build_story(blocks, get_styles()))
 
 
-def generate_all_pdfs(results, output_base):
-    """Generate PDF versions of all analysis reports."""
-    
-    pdf_files = []
-    
-    # Gap Analysis PDF
-    gap_pdf = f"{output_base}_gap_analysis.pdf"
-    create_pdf_report(results['gap_analysis'], gap_pdf, "Gap Analysis Report")
-    pdf_files.append(gap_pdf)
-    
-    # Revised Policy PDF
-    policy_pdf = f"{output_base}_revised_policy.pdf"
-    create_pdf_report(results['revised_policy'], policy_pdf, "Revised Policy Document")
-    pdf_files.append(policy_pdf)
-    
-    # Roadmap PDF
-    roadmap_pdf = f"{output_base}_roadmap.pdf"
-    create_pdf_report(results['roadmap'], roadmap_pdf, "Implementation Roadmap")
-    pdf_files.append(roadmap_pdf)
-    
-    # Executive Summary PDF
-    exec_pdf = f"{output_base}_executive_summary.pdf"
-    create_pdf_report(results['executive_summary'], exec_pdf, "Executive Summary")
-    pdf_files.append(exec_pdf)
-    
-    # Comprehensive Report PDF
-    comprehensive = f"""
-{'='*80}
-COMPREHENSIVE POLICY ANALYSIS REPORT
-{'='*80}
-Policy: {results['policy_name']}
-Analysis Date: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-Framework: NIST Cybersecurity Framework (CIS MS-ISAC 2024)
-{'='*80}
+def create_pdf_report(content, output_path, title="Policy Analysis Report"):
+    """Generate formatted PDF from markdown-style text content."""
+    write_pdf(parse_blocks(content), output_path)
 
-{results['executive_summary']}
 
-{'='*80}
-DETAILED GAP ANALYSIS
-{'='*80}
+def _render_job(blocks, output_path):
+    """Render one PDF and return its wall time; runs in a worker process."""
+    start = time.perf_counter()
+    write_pdf(blocks, output_path)
+    return time.perf_counter() - start
 
-{results['gap_analysis']}
 
-{'='*80}
-REVISED POLICY DOCUMENT
-{'='*80}
+def render_pool(workers):
+    """
+    Process pool for generate_all_pdfs(), shared by every analysis of a run.
 
-{results['revised_policy']}
+    Workers start with forkserver (or spawn) rather than fork: the pool is
+    created while batch, LLM and heartbeat threads are running, and a
+    forked child can inherit one of their locks held.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
 
-{'='*80}
-IMPLEMENTATION ROADMAP
-{'='*80}
 
-{results['roadmap']}
+def generate_all_pdfs(report, output_base, workers=None, pool=None):
+    """
+    Generate PDF versions of all analysis reports.
 
-{'='*80}
-END OF REPORT
-{'='*80}
-"""
-    
-    comprehensive_pdf = f"{output_base}_comprehensive_report.pdf"
-    create_pdf_report(comprehensive, comprehensive_pdf, "Comprehensive Policy Analysis")
-    pdf_files.append(comprehensive_pdf)
-    
-    return pdf_files
+    Args:
+        report: ReportModel of the analysis
+        output_base: Path prefix for the PDF files
+        workers: Rendering processes when no pool is given; None uses one
+            per CPU, 1 renders in-process
+        pool: Optional shared render_pool() the PDFs are rendered in
+
+    Returns:
+        List of PDF file paths
+    """
+    
+    jobs = {key: (blocks, f"{output_base}_{key}.pdf") for key, _, blocks in report.documents()}
+    
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if pool is None and workers <= 1:
+        for document, job in jobs.items():
+            with timed_stage('pdf_render', document=document):
+                write_pdf(*job)
+        return [job[1] for job in jobs.values()]
+    
+    # Largest documents first so the longest render starts immediately
+    order = sorted(jobs, key=lambda document: len(jobs[document][0]), reverse=True)
+    owned = pool is None
+    if owned:
+        pool = render_pool(workers)
+    try:
+        futures = {document: pool.submit(_render_job, *jobs[document]) for document in order}
+        for document in jobs:
+            record_stage('pdf_render', futures[document].result(), document=document, worker=True)
+    finally:
+        if owned:
+            pool.shutdown()
+    
+    return [job[1] for job in jobs.values()]
@@ -1,10 +1,11 @@
 """Policy revision module for generating improved policy versions."""
 
 from gap_analyzer import call_local_llm
+from validation import END_MARKERS, strip_end_marker
 
 
-def revise_policy(policy_content, gap_analysis, nist_framework):
-    """Generate revised policy addressing identified gaps."""
+def build_revision_prompt(policy_content, gap_analysis, nist_framework):
+    """Build the policy revision prompt."""
     
     prompt = f"""You are a cybersecurity policy expert. Revise the organizational policy below to address ALL identified gaps and align with NIST Cybersecurity Framework standards.
 
@@ -24,9 +25,17 @@ Generate a REVISED POLICY that:
 4. Adds specific, actionable provisions
 5. Includes clear roles, responsibilities, and procedures
 
-Provide the complete revised policy document with all improvements integrated."""
+Provide the complete revised policy document with all improvements integrated.
+Finish with the line {END_MARKERS['revised_policy']} after the last section."""
+
+    return prompt
 
-    return call_local_llm(prompt)
+
+def revise_policy(policy_content, gap_analysis, nist_framework):
+    """Generate revised policy addressing identified gaps."""
+    response = call_local_llm(build_revision_prompt(policy_content, gap_analysis, nist_framework),
+                              stage='revised_policy')
+    return strip_end_marker('revised_policy', response)
 
 
 def generate_revision_summary(original_policy, revised_policy):
@@ -61,4 +70,39 @@ ENHANCED SECTIONS:
 - [Section 2]: [What was improved]
 ..."""
 
-    return call_local_llm(prompt)
+    return call_local_llm(prompt, stage='revision_summary')
+
+
+def build_section_revision_prompt(changed_sections, gap_analysis, nist_framework):
+    """Build the revision prompt for selected policy sections only."""
+    
+    sections_text = '\n\n'.join(changed_sections)
+    
+    prompt = f"""You are a cybersecurity policy expert. Revise ONLY the policy sections below to address ALL identified gaps and align with NIST Cybersecurity Framework standards.
+
+NIST FRAMEWORK STANDARDS:
+{nist_framework}
+
+ORIGINAL SECTIONS:
+{sections_text}
+
+IDENTIFIED GAPS:
+{gap_analysis}
+
+Return each revised section under its original heading, in the original order:
+1. Keep every section heading exactly as written
+2. Address all critical and significant gaps
+3. Add specific, actionable provisions
+4. Do not add other sections or commentary
+
+Provide only the revised sections.
+Finish with the line {END_MARKERS['revised_policy']} after the last section."""
+
+    return prompt
+
+
+def revise_sections(changed_sections, gap_analysis, nist_framework):
+    """Generate revised text for selected policy sections only."""
+    response = call_local_llm(build_section_revision_prompt(changed_sections, gap_analysis, nist_framework),
+                              stage='revised_policy')
+    return strip_end_marker('revised_policy', response)
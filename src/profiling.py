@@ -0,0 +1,151 @@
+"""Optional cProfile and tracemalloc instrumentation of pipeline stages."""
+
+import contextvars
+import cProfile
+import os
+import pstats
+import re
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from metrics import add_stage_hook
+from utils import save_output
+
+_current_collector = contextvars.ContextVar('current_profile_collector', default=None)
+
+
+class ProfileCollector:
+    """Per-stage CPU profiles and allocation snapshots for one analysis."""
+
+    def __init__(self, cpu=True, memory=False, top_n=10):
+        self.cpu = cpu
+        self.memory = memory
+        self.top_n = top_n
+        self.stages = []
+        self._stack = []
+
+    def _label(self, name, details):
+        label = name + (f"_{details['document']}" if 'document' in details else '')
+        return f"{len(self.stages) + len(self._stack):02d}_{re.sub(r'[^A-Za-z0-9_]+', '_', label)}"
+
+    @contextmanager
+    def stage(self, name, details):
+        """Profile one stage; an enclosing stage's profiler pauses meanwhile."""
+        entry = {'label': self._label(name, details), 'profile': None, 'diff': None, 'peak': 0}
+        parent = self._stack[-1] if self._stack else None
+
+        if parent is not None and parent['profile'] is not None:
+            parent['profile'].disable()
+        if self.memory:
+            if parent is not None:
+                _observe_memory(parent)
+            entry['baseline'], entry['seen_peak'] = tracemalloc.get_traced_memory()
+            entry['top'] = entry['baseline']
+            start_snapshot = _take_snapshot()
+        if self.cpu:
+            entry['profile'] = cProfile.Profile()
+            entry['profile'].enable()
+
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            if entry['profile'] is not None:
+                entry['profile'].disable()
+            if self.memory:
+                _observe_memory(entry)
+                entry['peak'] = entry['top'] - entry['baseline']
+                entry['diff'] = _take_snapshot().compare_to(start_snapshot, 'lineno')
+                if parent is not None:
+                    parent['top'] = max(parent['top'], entry['top'])
+            if parent is not None and parent['profile'] is not None:
+                parent['profile'].enable()
+            self.stages.append(entry)
+
+    def write(self, output_base):
+        """Write .pstats and allocation reports next to the outputs and print hot spots."""
+        profile_dir = f"{output_base}_profile"
+        os.makedirs(profile_dir, exist_ok=True)
+
+        print(f"\nProfile hot spots (details in {profile_dir}/):")
+        for entry in sorted(self.stages, key=lambda item: item['label']):
+            parts = []
+            if entry['profile'] is not None:
+                stats = pstats.Stats(entry['profile'])
+                stats.dump_stats(os.path.join(profile_dir, f"{entry['label']}.pstats"))
+                parts.append(f"{stats.total_tt:.3f}s CPU")
+                hottest = _hottest_function(stats)
+                if hottest:
+                    parts.append(f"hottest {hottest}")
+            if entry['diff'] is not None:
+                save_output(_format_allocations(entry, self.top_n),
+                            os.path.join(profile_dir, f"{entry['label']}_memory.txt"))
+                parts.append(f"peak +{entry['peak'] / (1024 * 1024):.1f}MB")
+            print(f"  {entry['label']}: {', '.join(parts)}")
+
+
+def _observe_memory(entry):
+    """
+    Raise a running stage's highest traced memory from the current readings.
+
+    tracemalloc's peak only ever grows (reset_peak() needs Python 3.9), so a
+    rise of the peak since the stage's last reading happened within the
+    stage; otherwise only the current size is known to belong to it.
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    if peak > entry['seen_peak']:
+        entry['top'] = max(entry['top'], peak)
+        entry['seen_peak'] = peak
+    entry['top'] = max(entry['top'], current)
+
+
+def _take_snapshot():
+    """Allocation snapshot excluding tracemalloc's own bookkeeping."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),))
+
+
+def _hottest_function(stats):
+    """Function with the most self time, which is where a stage actually spends CPU."""
+    if not stats.stats:
+        return None
+    (filename, lineno, function), (_, _, self_time, _, _) = max(
+        stats.stats.items(), key=lambda item: item[1][2])
+    name = function if filename.startswith('~') else f"{os.path.basename(filename)}:{lineno}({function})"
+    return f"{name} {self_time:.3f}s self"
+
+
+def _format_allocations(entry, top_n):
+    """Top-N allocation growth report for one stage."""
+    lines = [f"MEMORY PROFILE: {entry['label']}",
+             f"Peak traced memory above stage start: {entry['peak'] / (1024 * 1024):.2f} MB",
+             "",
+             f"Top {top_n} allocation changes by size:"]
+    for stat in entry['diff'][:top_n]:
+        lines.append(f"  {stat}")
+    return '\n'.join(lines) + '\n'
+
+
+def _profile_hook(name, details):
+    collector = _current_collector.get()
+    if collector is None:
+        return nullcontext()
+    return collector.stage(name, details)
+
+
+@contextmanager
+def collect_profiles(collector):
+    """Profile every timed stage run in this context with `collector`."""
+    add_stage_hook(_profile_hook)
+    started_tracing = collector.memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
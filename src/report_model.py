@@ -0,0 +1,137 @@
+"""Report model: each report section is parsed once and every output is composed from it."""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+
+SEPARATOR = '=' * 80
+FRAMEWORK_NAME = 'NIST Cybersecurity Framework (CIS MS-ISAC 2024)'
+
+# Report documents in output order: key -> document title
+DOCUMENT_TITLES = {
+    'gap_analysis': 'Gap Analysis Report',
+    'revised_policy': 'Revised Policy Document',
+    'roadmap': 'Implementation Roadmap',
+    'executive_summary': 'Executive Summary'
+}
+COMPREHENSIVE_TITLE = 'Comprehensive Policy Analysis'
+
+# Every report file suffix, the comprehensive report last
+REPORT_KEYS = (*DOCUMENT_TITLES, 'comprehensive_report')
+
+# Order of the sections in the comprehensive report and their banner headings
+COMPREHENSIVE_SECTIONS = [
+    ('executive_summary', None),
+    ('gap_analysis', 'DETAILED GAP ANALYSIS'),
+    ('revised_policy', 'REVISED POLICY DOCUMENT'),
+    ('roadmap', 'IMPLEMENTATION ROADMAP')
+]
+
+# One formatted line of a report. Kinds: separator, blank, title, heading,
+# bold, bullet, numbered, body. Plain tuples so blocks pickle cheaply.
+Block = namedtuple('Block', ['kind', 'text'])
+
+# Line markup, compiled once per process
+SEPARATOR_PATTERN = re.compile(r'[=\-]{3,}')
+NUMBERED_PATTERN = re.compile(r'\d+\.')
+BULLET_MARKERS = '-*•'
+INDENT_CHARS = ' \t'
+
+SEPARATOR_BLOCK = Block('separator', '')
+BLANK_BLOCK = Block('blank', '')
+
+
+def parse_lines(lines):
+    """
+    Classify markdown-style report lines into blocks in a single pass.
+
+    Rules are checked in priority order: separator, all-caps title, heading
+    ending with ':', **bold**, bullet, numbered item, then body text.
+    """
+    blocks = []
+    append = blocks.append
+    for line in lines:
+        line = line.rstrip()
+        if not line:
+            append(BLANK_BLOCK)
+            continue
+
+        first = line[0]
+        if first in '=-' and SEPARATOR_PATTERN.fullmatch(line):
+            append(SEPARATOR_BLOCK)
+            continue
+
+        indented = first in INDENT_CHARS
+        if not indented and first not in BULLET_MARKERS and len(line) > 10 and line.isupper():
+            append(Block('title', line))
+        elif not indented and line[-1] == ':' and len(line) < 80:
+            append(Block('heading', line))
+        elif '**' in line:
+            append(Block('bold', line))
+        else:
+            stripped = line.lstrip()
+            if stripped[0] in BULLET_MARKERS:
+                append(Block('bullet', stripped.lstrip('-*• ')))
+            elif stripped[0].isdigit() and NUMBERED_PATTERN.match(stripped):
+                append(Block('numbered', stripped))
+            else:
+                append(Block('body', line))
+
+    return blocks
+
+
+def parse_blocks(content):
+    """Parse report text into blocks."""
+    return parse_lines(content.split('\n'))
+
+
+class ReportModel:
+    """The four analysis reports of one policy plus the comprehensive report built from them."""
+
+    def __init__(self, policy_name, sections, generated=None):
+        self.policy_name = policy_name
+        self.sections = sections
+        self.generated = generated or datetime.now()
+        self._blocks = {}
+
+    @classmethod
+    def from_results(cls, results):
+        """Build the model from an analysis results dictionary."""
+        return cls(results['policy_name'], {key: results[key] for key in DOCUMENT_TITLES})
+
+    def blocks(self, key):
+        """Parsed blocks of one section; each section is parsed only once."""
+        if key not in self._blocks:
+            self._blocks[key] = parse_blocks(self.sections[key])
+        return self._blocks[key]
+
+    def _comprehensive_parts(self):
+        """The comprehensive report as alternating framing lines and section keys."""
+        yield ['', SEPARATOR, 'COMPREHENSIVE POLICY ANALYSIS REPORT', SEPARATOR,
+               f"Policy: {self.policy_name}",
+               f"Analysis Date: {self.generated.strftime('%Y-%m-%d %H:%M:%S')}",
+               f"Framework: {FRAMEWORK_NAME}",
+               SEPARATOR, '']
+        for key, heading in COMPREHENSIVE_SECTIONS:
+            if heading:
+                yield ['', SEPARATOR, heading, SEPARATOR, '']
+            yield key
+        yield ['', SEPARATOR, 'END OF REPORT', SEPARATOR, '']
+
+    def comprehensive_text(self):
+        """Plain-text comprehensive report."""
+        return '\n'.join(self.sections[part] if isinstance(part, str) else '\n'.join(part)
+                         for part in self._comprehensive_parts())
+
+    def comprehensive_blocks(self):
+        """Comprehensive report blocks, reusing the parsed section blocks."""
+        blocks = []
+        for part in self._comprehensive_parts():
+            blocks.extend(self.blocks(part) if isinstance(part, str) else parse_lines(part))
+        return blocks
+
+    def documents(self):
+        """(key, title, blocks) for every document, the comprehensive report last."""
+        for key, title in DOCUMENT_TITLES.items():
+            yield key, title, self.blocks(key)
+        yield 'comprehensive_report', COMPREHENSIVE_TITLE, self.comprehensive_blocks()
@@ -0,0 +1,270 @@
+"""Markdown, HTML and DOCX writers driven by the parsed report model."""
+
+import html
+import re
+from pathlib import Path
+
+from metrics import timed_stage
+from report_model import REPORT_KEYS
+from utils import atomic_path, save_output
+
+# Output formats selectable with --formats; txt and pdf keep their own writers
+FORMATS = ('txt', 'pdf', 'md', 'html', 'docx')
+DEFAULT_FORMATS = ('txt', 'pdf')
+
+# Navy palette shared with generate_docx.py
+COLORS = {
+    'primary': '1E3A5F',
+    'secondary': '2E5077',
+    'accent': '4A90A4',
+    'text': '2C3E50',
+    'light': 'E8F4F8',
+    'border': 'CBD5E1'
+}
+
+# Progress line printed as each text report is saved
+TXT_SAVED = {
+    'gap_analysis': 'Gap analysis saved',
+    'revised_policy': 'Revised policy saved',
+    'roadmap': 'Improvement roadmap saved',
+    'executive_summary': 'Executive summary saved',
+    'comprehensive_report': 'Comprehensive report saved\n'
+}
+
+BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; font-size: 15px; line-height: 1.5;
+       color: #{text}; max-width: 52em; margin: 2em auto; padding: 0 1em; }}
+h1 {{ color: #{primary}; text-align: center; border-bottom: 2px solid #{accent}; padding-bottom: .3em; }}
+h2 {{ color: #{primary}; margin-top: 1.6em; }}
+h3 {{ color: #{secondary}; margin: 1.2em 0 .4em; }}
+p {{ margin: .3em 0; text-align: justify; }}
+p.numbered, ul {{ margin-left: 1.2em; }}
+li {{ margin: .2em 0; }}
+p.meta {{ color: #{accent}; text-align: center; font-size: 13px; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p class="meta">{policy_name}</p>
+{body}
+</body>
+</html>
+"""
+
+
+def parse_formats(value):
+    """
+    Parse a comma-separated --formats value.
+
+    Raises:
+        ValueError: If a format is not supported
+    """
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported output format(s): {', '.join(unknown)}. "
+                         f"Choose from: {', '.join(FORMATS)}")
+    return list(dict.fromkeys(formats))
+
+
+def render_markdown(blocks):
+    """Markdown text of parsed report blocks."""
+    lines = []
+
+    def blank():
+        if lines and lines[-1]:
+            lines.append('')
+
+    for kind, text in blocks:
+        if kind in ('separator', 'blank'):
+            blank()
+        elif kind == 'title':
+            blank()
+            lines.extend([f"## {text.strip()}", ''])
+        elif kind == 'heading':
+            blank()
+            lines.extend([f"### {text.strip()}", ''])
+        elif kind == 'bullet':
+            if lines and not lines[-1].startswith('- '):
+                blank()
+            lines.append(f"- {text}")
+        else:
+            # One paragraph per line; bold and numbered lines are already Markdown
+            blank()
+            lines.append(text.strip())
+
+    return '\n'.join(lines).strip() + '\n'
+
+
+def _inline_html(text):
+    """Escape text and turn **bold** into <strong>."""
+    return BOLD_PATTERN.sub(r'<strong>\1</strong>', html.escape(text.strip()))
+
+
+def render_html(blocks, title, policy_name=''):
+    """Self-contained HTML page of parsed report blocks."""
+    parts = []
+    in_list = False
+    for kind, text in blocks:
+        if kind == 'bullet':
+            if not in_list:
+                parts.append('<ul>')
+                in_list = True
+            parts.append(f"<li>{_inline_html(text)}</li>")
+            continue
+        if in_list:
+            parts.append('</ul>')
+            in_list = False
+
+        if kind == 'title':
+            parts.append(f"<h2>{_inline_html(text)}</h2>")
+        elif kind == 'heading':
+            parts.append(f"<h3>{_inline_html(text)}</h3>")
+        elif kind == 'bold':
+            parts.append(f"<h3>{_inline_html(text)}</h3>")
+        elif kind == 'numbered':
+            parts.append(f'<p class="numbered">{_inline_html(text)}</p>')
+        elif kind == 'body':
+            parts.append(f"<p>{_inline_html(text)}</p>")
+    if in_list:
+        parts.append('</ul>')
+
+    return HTML_TEMPLATE.format(title=html.escape(title), policy_name=html.escape(policy_name),
+                                body='\n'.join(parts), **COLORS)
+
+
+def write_docx(blocks, output_path, title, policy_name=''):
+    """Word document of parsed report blocks, styled like generate_docx.py."""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+
+    navy = RGBColor.from_string(COLORS['primary'])
+    doc = Document()
+
+    heading = doc.add_heading(title, 0)
+    heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in heading.runs:
+        run.font.color.rgb = navy
+    if policy_name:
+        meta = doc.add_paragraph()
+        meta.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = meta.add_run(policy_name)
+        run.italic = True
+        run.font.color.rgb = RGBColor.from_string(COLORS['accent'])
+
+    for kind, text in blocks:
+        if kind in ('separator', 'blank'):
+            continue
+        if kind in ('title', 'heading'):
+            paragraph = doc.add_heading(text.strip(), level=1 if kind == 'title' else 2)
+            for run in paragraph.runs:
+                run.font.color.rgb = navy
+            continue
+
+        if kind == 'bullet':
+            paragraph = doc.add_paragraph(style='List Bullet')
+        else:
+            paragraph = doc.add_paragraph()
+            if kind == 'numbered':
+                paragraph.paragraph_format.left_indent = Pt(18)
+
+        # Odd pieces of the split are the **bold** spans
+        for index, piece in enumerate(BOLD_PATTERN.split(text.strip())):
+            if piece:
+                run = paragraph.add_run(piece)
+                run.bold = index % 2 == 1 or kind == 'bold'
+                run.font.size = Pt(10.5)
+
+    with atomic_path(output_path) as temp_path:
+        doc.save(temp_path)
+
+
+def write_report_format(report, output_base, fmt):
+    """
+    Write every document of the report in one of the md, html or docx formats.
+
+    Returns:
+        List of written file paths
+    """
+    paths = []
+    for key, title, blocks in report.documents():
+        path = f"{output_base}_{key}.{fmt}"
+        if fmt == 'md':
+            content = render_markdown(blocks)
+        elif fmt == 'html':
+            content = render_html(blocks, title, report.policy_name)
+        elif fmt == 'docx':
+            write_docx(blocks, path, title, report.policy_name)
+            paths.append(path)
+            continue
+        else:
+            raise ValueError(f"No document writer for format: {fmt}")
+
+        save_output(content, path)
+        paths.append(path)
+    return paths
+
+
+def write_reports(report, output_base, formats=DEFAULT_FORMATS, pdf_workers=None, log=print, pdf_pool=None):
+    """
+    Write the report in every requested format.
+
+    A failing PDF or document writer is reported and skipped so the text
+    reports are always kept.
+
+    Args:
+        report: ReportModel of the analysis
+        output_base: Output path prefix shared by all files
+        formats: Report formats to write (txt, pdf, md, html, docx)
+        pdf_workers: Processes rendering the PDFs; None uses one per CPU
+        log: Callable receiving each progress line
+        pdf_pool: Optional process pool shared across analyses for the
+            PDFs (see pdf_generator.render_pool()); overrides pdf_workers
+
+    Returns:
+        List of written file paths
+    """
+    files = []
+    if 'txt' in formats:
+        with timed_stage('save_reports'):
+            for key in REPORT_KEYS:
+                content = (report.comprehensive_text() if key == 'comprehensive_report'
+                           else report.sections[key])
+                save_output(content, f"{output_base}_{key}.txt")
+                log(f"  ✓ {TXT_SAVED[key]}")
+        files += [f"{output_base}_{key}.txt" for key in REPORT_KEYS]
+
+    if 'pdf' in formats:
+        log("Generating PDF reports with formatted output...")
+        try:
+            # Imported here so runs without PDF output never load ReportLab
+            from pdf_generator import generate_all_pdfs
+            with timed_stage('pdf_generation'):
+                pdf_files = generate_all_pdfs(report, output_base, workers=pdf_workers, pool=pdf_pool)
+            for pdf_file in pdf_files:
+                log(f"  ✓ PDF saved: {Path(pdf_file).name}")
+            files += pdf_files
+        except Exception as e:
+            log(f"  ⚠ PDF generation failed: {e}")
+            log(f"  Note: Text reports are still available")
+
+    for fmt in formats:
+        if fmt in ('txt', 'pdf'):
+            continue
+        try:
+            with timed_stage(f'{fmt}_generation'):
+                written = write_report_format(report, output_base, fmt)
+            log(f"  ✓ {fmt.upper()} reports saved: {len(written)} files")
+            files += written
+        except Exception as e:
+            log(f"  ⚠ {fmt.upper()} generation failed: {e}")
+
+    return files
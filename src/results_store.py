@@ -0,0 +1,228 @@
+"""SQLite store of analysis runs, structured gaps, timings and output files."""
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from gap_analyzer import extract_gaps_structured
+
+DB_NAME = 'results.db'
+
+# NIST CSF references in gap text: function.category with optional -NN subcategory
+GAP_CONTROL_PATTERN = re.compile(r'\b([A-Z]{2})\.([A-Z]{2})(?:-(\d{2}))?\b')
+SEVERITIES = ('critical', 'significant', 'minor')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    output_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS policies (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT REFERENCES runs(run_id),
+    policy_name TEXT NOT NULL,
+    policy_path TEXT NOT NULL,
+    analyzed TEXT NOT NULL,
+    output_base TEXT,
+    total_time REAL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    policy_id INTEGER NOT NULL REFERENCES policies(id),
+    stage TEXT NOT NULL,
+    document TEXT,
+    wall_time REAL
+);
+CREATE TABLE IF NOT EXISTS llm_calls (
+    policy_id INTEGER NOT NULL REFERENCES policies(id),
+    stage TEXT,
+    model TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    wall_time REAL,
+    time_to_first_token REAL,
+    tokens_per_second REAL
+);
+CREATE TABLE IF NOT EXISTS gaps (
+    id INTEGER PRIMARY KEY,
+    policy_id INTEGER NOT NULL REFERENCES policies(id),
+    severity TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gap_controls (
+    gap_id INTEGER NOT NULL REFERENCES gaps(id),
+    control_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    function TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    policy_id INTEGER NOT NULL REFERENCES policies(id),
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_policies_name ON policies(policy_name, analyzed);
+CREATE INDEX IF NOT EXISTS idx_policies_run ON policies(run_id);
+CREATE INDEX IF NOT EXISTS idx_stages_policy ON stages(policy_id);
+CREATE INDEX IF NOT EXISTS idx_stages_stage ON stages(stage);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_policy ON llm_calls(policy_id);
+CREATE INDEX IF NOT EXISTS idx_gaps_policy ON gaps(policy_id);
+CREATE INDEX IF NOT EXISTS idx_gaps_severity ON gaps(severity, policy_id);
+CREATE INDEX IF NOT EXISTS idx_gap_controls_gap ON gap_controls(gap_id);
+CREATE INDEX IF NOT EXISTS idx_gap_controls_control ON gap_controls(control_id);
+CREATE INDEX IF NOT EXISTS idx_gap_controls_category ON gap_controls(category);
+CREATE INDEX IF NOT EXISTS idx_gap_controls_function ON gap_controls(function);
+CREATE INDEX IF NOT EXISTS idx_files_policy ON files(policy_id);
+"""
+
+# Most recent analysis of every policy
+LATEST_POLICIES = """
+SELECT p.* FROM policies p
+WHERE p.id = (SELECT id FROM policies latest WHERE latest.policy_name = p.policy_name
+              ORDER BY analyzed DESC, id DESC LIMIT 1)
+"""
+
+
+def extract_gap_controls(description):
+    """
+    NIST CSF references in a gap description.
+
+    Returns:
+        List of (control_id, category, function) tuples, e.g.
+        ('PR.AA-03', 'PR.AA', 'PR'); a bare category is its own control_id
+    """
+    controls = []
+    for function, category, number in GAP_CONTROL_PATTERN.findall(description):
+        category_id = f"{function}.{category}"
+        control = (f"{category_id}-{number}" if number else category_id, category_id, function)
+        if control not in controls:
+            controls.append(control)
+    return controls
+
+
+class ResultsStore:
+    """Indexed SQLite database of every analysis written by analyze_policy()."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Shared by the serve-mode worker threads; writes are serialized by the lock
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.row_factory = sqlite3.Row
+        # WAL lets concurrent batch processes write while queries read
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record_run(self, run_id, output_dir):
+        """Register a run; repeated calls (resumed runs) are ignored."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO runs (run_id, created, output_dir) VALUES (?, ?, ?)',
+                (run_id, datetime.now().isoformat(timespec='seconds'), output_dir))
+
+    def record_policy(self, results, policy_path, run_id=None):
+        """
+        Store one analysis: its gaps with control references, timings and files.
+
+        Args:
+            results: Dictionary returned by analyze_policy() including metrics
+            policy_path: Analyzed policy document
+            run_id: Run the analysis belongs to, if any
+
+        Returns:
+            Row ID of the stored policy analysis
+        """
+        metrics = results.get('metrics') or {}
+        gaps = extract_gaps_structured(results['gap_analysis'])
+
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO policies (run_id, policy_name, policy_path, analyzed, output_base, '
+                'total_time, summary) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (run_id, results['policy_name'], str(policy_path),
+                 metrics.get('started') or datetime.now().isoformat(timespec='seconds'),
+                 results.get('output_base'), metrics.get('total_time'), gaps['summary'].strip()))
+            policy_id = cursor.lastrowid
+
+            for severity in SEVERITIES:
+                for description in gaps[severity]:
+                    gap_id = self.connection.execute(
+                        'INSERT INTO gaps (policy_id, severity, description) VALUES (?, ?, ?)',
+                        (policy_id, severity, description)).lastrowid
+                    self.connection.executemany(
+                        'INSERT INTO gap_controls (gap_id, control_id, category, function) VALUES (?, ?, ?, ?)',
+                        [(gap_id, *control) for control in extract_gap_controls(description)])
+
+            self.connection.executemany(
+                'INSERT INTO stages (policy_id, stage, document, wall_time) VALUES (?, ?, ?, ?)',
+                [(policy_id, stage['stage'], stage.get('document'), stage['wall_time'])
+                 for stage in metrics.get('stages', [])])
+            self.connection.executemany(
+                'INSERT INTO llm_calls (policy_id, stage, model, prompt_tokens, completion_tokens, '
+                'wall_time, time_to_first_token, tokens_per_second) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(policy_id, call['stage'], call['model'], call['prompt_tokens'], call['completion_tokens'],
+                  call['wall_time'], call['time_to_first_token'], call['tokens_per_second'])
+                 for call in metrics.get('llm_calls', [])])
+            self.connection.executemany(
+                'INSERT INTO files (policy_id, format, path, bytes) VALUES (?, ?, ?, ?)',
+                [(policy_id, os.path.splitext(path)[1].lstrip('.'), path,
+                  os.path.getsize(path) if os.path.exists(path) else None)
+                 for path in results.get('files', [])])
+
+        return policy_id
+
+    def query(self, sql, params=()):
+        """Run a read query and return the rows."""
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def find_gaps(self, control=None, severity=None, policy=None, latest=True):
+        """
+        Gaps matching a control (PR, PR.AA or PR.AA-03), severity and/or policy.
+
+        Args:
+            latest: Only consider the most recent analysis of each policy
+        """
+        conditions, params = [], []
+        if control:
+            column = 'function' if '.' not in control else 'category' if '-' not in control else 'control_id'
+            conditions.append(f"g.id IN (SELECT gap_id FROM gap_controls WHERE {column} = ?)")
+            params.append(control.upper())
+        if severity:
+            conditions.append('g.severity = ?')
+            params.append(severity.lower())
+        if policy:
+            conditions.append('p.policy_name = ?')
+            params.append(policy)
+
+        source = f"({LATEST_POLICIES})" if latest else 'policies'
+        sql = (f"SELECT p.policy_name, p.analyzed, p.run_id, g.severity, g.description "
+               f"FROM {source} p JOIN gaps g ON g.policy_id = p.id")
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += " ORDER BY p.policy_name, CASE g.severity WHEN 'critical' THEN 0 " \
+               "WHEN 'significant' THEN 1 ELSE 2 END"
+        return self.query(sql, params)
+
+    def policy_summary(self):
+        """Latest analysis of every policy with its gap counts by severity."""
+        return self.query(
+            f"SELECT p.policy_name, p.analyzed, p.run_id, p.total_time, "
+            f"SUM(g.severity = 'critical') AS critical, SUM(g.severity = 'significant') AS significant, "
+            f"SUM(g.severity = 'minor') AS minor "
+            f"FROM ({LATEST_POLICIES}) p LEFT JOIN gaps g ON g.policy_id = p.id "
+            f"GROUP BY p.id ORDER BY p.policy_name")
+
+    def stage_timings(self):
+        """Mean, min and max wall time of each stage across all stored analyses."""
+        return self.query(
+            "SELECT stage || COALESCE(':' || document, '') AS stage, COUNT(*) AS count, "
+            "AVG(wall_time) AS mean, MIN(wall_time) AS min, MAX(wall_time) AS max "
+            "FROM stages GROUP BY stage, document ORDER BY mean DESC")
@@ -3,8 +3,8 @@
 from gap_analyzer import call_local_llm
 
 
-def generate_improvement_roadmap(gap_analysis, policy_type):
-    """Generate structured improvement roadmap aligned with NIST framework."""
+def build_roadmap_prompt(gap_analysis, policy_type):
+    """Build the improvement roadmap prompt."""
     
     prompt = f"""You are a cybersecurity implementation strategist. Based on the gap analysis below, create a detailed implementation roadmap for improving the {policy_type} policy aligned with the NIST Cybersecurity Framework.
 
@@ -64,11 +64,16 @@ SUCCESS METRICS
 
 Be specific and actionable in all recommendations."""
 
-    return call_local_llm(prompt)
+    return prompt
 
 
-def generate_executive_summary(gap_analysis, roadmap):
-    """Generate executive summary for leadership."""
+def generate_improvement_roadmap(gap_analysis, policy_type):
+    """Generate structured improvement roadmap aligned with NIST framework."""
+    return call_local_llm(build_roadmap_prompt(gap_analysis, policy_type), stage='roadmap')
+
+
+def build_executive_summary_prompt(gap_analysis, roadmap):
+    """Build the executive summary prompt."""
     
     prompt = f"""Create a concise executive summary for senior management based on the gap analysis and improvement roadmap below.
 
@@ -108,4 +113,9 @@ TIMELINE:
 
 Keep it concise and business-focused for executive audience."""
 
-    return call_local_llm(prompt)
+    return prompt
+
+
+def generate_executive_summary(gap_analysis, roadmap):
+    """Generate executive summary for leadership."""
+    return call_local_llm(build_executive_summary_prompt(gap_analysis, roadmap), stage='executive_summary')
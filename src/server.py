@@ -0,0 +1,303 @@
+"""Long-running analysis service with a local HTTP job API."""
+
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs, unquote
+
+from checkpoint import RunCheckpoint
+from gap_analyzer import load_nist_framework
+from utils import MAX_FILE_SIZE, atomic_write, new_run_id
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 16
+# Finished jobs kept for status and downloads; older ones are forgotten
+MAX_FINISHED_JOBS = 256
+
+# Uploaded policies are kept under the output directory
+UPLOADS_DIR = 'uploads'
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+JOB_PATH = re.compile(r'^/jobs/([\w-]+)(?:/files/([^/]+))?$')
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue is at capacity."""
+
+
+class AnalysisService:
+    """Bounded job queue drained by worker threads running analyze_policy()."""
+
+    def __init__(self, analyze, output_dir='output', workers=1, queue_size=DEFAULT_QUEUE_SIZE,
+                 store=None, policy_root=None, **options):
+        self.analyze = analyze
+        self.output_dir = output_dir
+        self.store = store
+        # Directory whose policies may be submitted by path; None accepts uploads only
+        self.policy_root = os.path.realpath(policy_root) if policy_root else None
+        self.options = options
+        self.jobs = {}
+        self.lock = threading.Lock()
+        # Serializes submissions so a capacity check still holds when the job is queued
+        self.submit_lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = [threading.Thread(target=self._work, name=f"analysis-worker-{index}", daemon=True)
+                        for index in range(workers)]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        """Let running jobs finish, then stop the workers; queued jobs are dropped."""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def local_policy(self, policy_path):
+        """
+        Resolve a policy submitted by path.
+
+        Raises:
+            PermissionError: If paths are not accepted or lie outside policy_root
+            ValueError: If the file does not exist
+        """
+        if self.policy_root is None:
+            raise PermissionError("Submitting policies by path is disabled; upload the policy file instead")
+        resolved = os.path.realpath(os.path.join(self.policy_root, policy_path or ''))
+        if os.path.commonpath([resolved, self.policy_root]) != self.policy_root:
+            raise PermissionError(f"Policy path is outside the served directory: {policy_path}")
+        if not os.path.isfile(resolved):
+            raise ValueError(f"Policy file not found: {policy_path}")
+        return resolved
+
+    def full(self):
+        return self.queue.full()
+
+    def submit(self, policy_path):
+        """
+        Queue a policy for analysis.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        with self.submit_lock:
+            # Only submitters add to the queue, so a free slot now is still free below
+            if self.queue.full():
+                raise QueueFullError(f"Job queue is full ({self.queue.maxsize} jobs)")
+            run = RunCheckpoint.create(self.output_dir, [policy_path])
+            job = {
+                'id': run.run_id,
+                'policy': Path(policy_path).name,
+                'status': 'queued',
+                'submitted': datetime.now().isoformat(timespec='seconds'),
+                'started': None,
+                'finished': None,
+                'error': None,
+                'files': [],
+                'total_time': None
+            }
+            with self.lock:
+                self.jobs[job['id']] = (job, run, str(policy_path))
+            self.queue.put_nowait(job['id'])
+        return dict(job)
+
+    def _evict_finished(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS; call with the lock held."""
+        finished = [job_id for job_id, (job, _, _) in self.jobs.items() if job['finished']]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job_id]
+
+    def job(self, job_id):
+        """Snapshot of a job's status, or None."""
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            return dict(entry[0]) if entry else None
+
+    def list_jobs(self):
+        with self.lock:
+            return [dict(job) for job, _, _ in self.jobs.values()]
+
+    def artifact(self, job_id, name):
+        """Path of a job output file by its file name, or None."""
+        with self.lock:
+            entry = self.jobs.get(job_id)
+            files = list(entry[0]['files']) if entry else []
+        return next((path for path in files if os.path.basename(path) == name), None)
+
+    def _work(self):
+        while True:
+            job_id = self.queue.get()
+            if job_id is None:
+                return
+            with self.lock:
+                job, run, policy_path = self.jobs[job_id]
+                job['status'] = 'running'
+                job['started'] = datetime.now().isoformat(timespec='seconds')
+            try:
+                if self.store is not None:
+                    self.store.record_run(run.run_id, self.output_dir)
+                results = self.analyze(policy_path, self.output_dir, checkpoint=run.policy(policy_path),
+                                       store=self.store, **self.options)
+                update = {'status': 'complete', 'files': results['files'],
+                          'total_time': results['metrics']['total_time']}
+            except Exception as e:
+                update = {'status': 'failed', 'error': str(e)}
+            with self.lock:
+                job.update(update, finished=datetime.now().isoformat(timespec='seconds'))
+                self._evict_finished()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Job API:
+        POST /jobs                    The policy file as the body with ?filename=name.ext,
+                                      or JSON {"path": "..."} relative to the served
+                                      policy directory (--serve-root)
+        GET  /jobs                    All jobs
+        GET  /jobs/<id>               Job status
+        GET  /jobs/<id>/files/<name>  Download a report produced by the job
+        GET  /health                  Queue and worker status
+    """
+
+    server_version = 'PolicyAnalyzer/1.0'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {'error': message}, headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip('/')
+        if path == '/health':
+            self._send_json(200, {'status': 'ok', 'queued': self.service.queue.qsize(),
+                                  'queue_size': self.service.queue.maxsize,
+                                  'workers': len(self.service.workers)})
+            return
+        if path == '/jobs':
+            self._send_json(200, {'jobs': self.service.list_jobs()})
+            return
+
+        match = JOB_PATH.match(path)
+        if not match:
+            self._error(404, f"Not found: {path}")
+            return
+        job_id, name = match.groups()
+        job = self.service.job(job_id)
+        if job is None:
+            self._error(404, f"Unknown job: {job_id}")
+        elif name is None:
+            self._send_json(200, job)
+        else:
+            self._send_file(self.service.artifact(job_id, unquote(name)))
+
+    def _send_file(self, file_path):
+        if file_path is None or not os.path.exists(file_path):
+            self._error(404, "No such file for this job")
+            return
+        content_types = {'.pdf': 'application/pdf', '.json': 'application/json', '.html': 'text/html',
+                         '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'}
+        self.send_response(200)
+        self.send_header('Content-Type', content_types.get(Path(file_path).suffix, 'text/plain; charset=utf-8'))
+        self.send_header('Content-Length', str(os.path.getsize(file_path)))
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(file_path)}"')
+        self.end_headers()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                self.wfile.write(chunk)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            self._error(404, f"Not found: {url.path}")
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_FILE_SIZE:
+            self._error(413, f"Policy too large: {length} bytes (max: {MAX_FILE_SIZE})")
+            return
+        if self.service.full():
+            self._error(503, f"Job queue is full ({self.service.queue.maxsize} jobs)", {'Retry-After': '30'})
+            return
+        body = self.rfile.read(length)
+
+        upload_dir = None
+        try:
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                policy_path = self.service.local_policy(json.loads(body or b'{}').get('path'))
+            else:
+                filename = os.path.basename(parse_qs(url.query).get('filename', [''])[0])
+                if not filename:
+                    raise ValueError("Upload requires ?filename=<name>.txt|.pdf|.docx")
+                if Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                    raise ValueError(f"Unsupported file format. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+                upload_dir = os.path.join(self.service.output_dir, UPLOADS_DIR, new_run_id())
+                policy_path = os.path.join(upload_dir, filename)
+                atomic_write(body, policy_path)
+            if Path(policy_path).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                raise ValueError(f"Unsupported file format. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+            job = self.service.submit(policy_path)
+        except (QueueFullError, PermissionError, ValueError) as e:
+            if upload_dir is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            if isinstance(e, QueueFullError):
+                self._error(503, str(e), {'Retry-After': '30'})
+            else:
+                self._error(403 if isinstance(e, PermissionError) else 400, str(e))
+            return
+
+        self._send_json(202, job, {'Location': f"/jobs/{job['id']}"})
+
+
+def serve(analyze, host=DEFAULT_HOST, port=DEFAULT_PORT, output_dir='output', workers=1,
+          queue_size=DEFAULT_QUEUE_SIZE, store=None, policy_root=None, **options):
+    """
+    Run the analysis service until interrupted.
+
+    The NIST framework is parsed once at startup and every job reuses it;
+    jobs run through `analyze` (analyze_policy) on `workers` threads.
+    Policies are uploaded, or submitted by path only from `policy_root`.
+    """
+    print("Loading NIST Cybersecurity Framework standards...")
+    framework = load_nist_framework(os.path.join('data', 'reference'))
+    print(f"  Framework loaded: {len(framework)} characters")
+
+    service = AnalysisService(analyze, output_dir, workers, queue_size, store, policy_root, **options)
+    service.start()
+
+    httpd = ThreadingHTTPServer((host, port), JobRequestHandler)
+    httpd.service = service
+    print(f"Serving policy analysis on http://{host}:{httpd.server_port} "
+          f"({workers} worker(s), queue of {queue_size}). Press Ctrl+C to stop.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down: waiting for running jobs...")
+    finally:
+        httpd.server_close()
+        service.stop()
@@ -1,6 +1,15 @@
 """Utility functions for document processing and text extraction."""
 
+import asyncio
+import contextvars
+import functools
 import os
+import re
+import stat
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 import PyPDF2
 from docx import Document
@@ -71,7 +80,98 @@ def read_policy_document(file_path):
 
 
 def save_output(content, output_path):
-    """Save output to file."""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    """Save output to file atomically."""
+    atomic_write(content, output_path)
+
+
+async def to_thread(func, *args):
+    """
+    Run func(*args) in the loop's default executor with the caller's context.
+
+    Equivalent of asyncio.to_thread(), which needs Python 3.9; the context
+    carries the current metrics, stage and deadline into the thread.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(context.run, func, *args))
+
+
+def new_run_id():
+    """Timestamped ID with a random suffix so concurrent runs never collide."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _read_umask():
+    """The process umask; reading it means setting it, so this runs once at import."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+# Read before any worker threads exist; os.umask() is process-wide
+_UMASK = _read_umask()
+
+
+def _replacement_mode(output_path):
+    """Permissions for a file replacing output_path: the existing file's, else what open() would give."""
+    try:
+        return stat.S_IMODE(os.stat(output_path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_path(output_path):
+    """Yield a temporary path next to output_path that replaces it once the block succeeds."""
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    os.close(fd)
+    try:
+        # mkstemp creates 0600 files, which os.replace() would otherwise keep;
+        # os.chmod() rather than os.fchmod(), which Windows lacks before Python 3.13
+        os.chmod(temp_path, _replacement_mode(output_path))
+        yield temp_path
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def atomic_write(content, output_path):
+    """Write text or bytes via a temporary file and rename so readers never see partial content."""
+    binary = isinstance(content, bytes)
+    with atomic_path(output_path) as temp_path:
+        with open(temp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def split_policy_sections(content):
+    """Split policy text into (heading, text) sections on numbered or all-caps headings."""
+    sections = []
+    heading = 'PREAMBLE'
+    current = []
+    
+    for line in content.split('\n'):
+        stripped = re.sub(r'^#+\s*|\*\*', '', line.strip())
+        is_heading = len(stripped) < 80 and not stripped.endswith(('.', ',', ';')) and (
+            re.match(r'^\d+(\.\d+)*[.)]?\s+[A-Za-z]', stripped) or
+            (stripped.isupper() and len(stripped) > 3 and not stripped.startswith(('-', '*', '•')))
+        )
+        if is_heading and current:
+            text = '\n'.join(current).strip()
+            if text:
+                sections.append((heading, text))
+            current = []
+        if is_heading:
+            heading = stripped
+        current.append(line)
+    
+    text = '\n'.join(current).strip()
+    if text:
+        sections.append((heading, text))
+    
+    return sections
@@ -0,0 +1,95 @@
+"""Structural validation of LLM output against each stage's report template."""
+
+import re
+
+# Section headings each template asks for, in template order
+REQUIRED_SECTIONS = {
+    'gap_analysis': ('CRITICAL GAPS', 'SIGNIFICANT GAPS', 'MINOR GAPS', 'SUMMARY'),
+    'roadmap': ('PHASE 1', 'PHASE 2', 'PHASE 3', 'NIST FRAMEWORK ALIGNMENT', 'KEY MILESTONES',
+                'RESOURCE REQUIREMENTS', 'SUCCESS METRICS'),
+    'executive_summary': ('CURRENT STATE', 'KEY FINDINGS', 'RISK EXPOSURE', 'RECOMMENDED ACTIONS',
+                          'INVESTMENT REQUIRED', 'EXPECTED OUTCOMES', 'TIMELINE'),
+}
+
+# Stages whose output keeps the policy's own headings end with a closing line instead,
+# so truncated or abandoned output is detected and escalated
+END_MARKERS = {
+    'revised_policy': 'END OF REVISED POLICY',
+}
+REQUIRED_SECTIONS.update({stage: (marker,) for stage, marker in END_MARKERS.items()})
+
+# A heading starts its line, after optional numbering or Markdown markers ("2.", "##", "**");
+# bullets are list items, not headings
+_section_patterns = {
+    stage: {section: re.compile(r'^[ \t#*]*(?:\d+[.)][ \t]*)?[ \t#*]*' + re.escape(section) + r'\b',
+                                re.IGNORECASE | re.MULTILINE)
+            for section in sections}
+    for stage, sections in REQUIRED_SECTIONS.items()
+}
+
+
+def missing_sections(stage, text):
+    """
+    Required sections of a stage's template absent from its output.
+
+    Stages without a fixed template only need non-empty output.
+
+    Returns:
+        List of missing section headings, in template order
+    """
+    if not text or not text.strip():
+        return list(REQUIRED_SECTIONS.get(stage, ('content',)))
+    patterns = _section_patterns.get(stage, {})
+    return [section for section, pattern in patterns.items() if not pattern.search(text)]
+
+
+def strip_end_marker(stage, text):
+    """Output without its stage's closing line (see END_MARKERS), once it has been validated."""
+    if stage not in END_MARKERS:
+        return text
+    return re.sub(r'^.*' + re.escape(END_MARKERS[stage]) + r'.*$', '', text,
+                  flags=re.IGNORECASE | re.MULTILINE).strip()
+
+
+def is_valid(stage, text):
+    """True if the output contains every section its template requires."""
+    return not missing_sections(stage, text)
+
+
+def split_sections(stage, text):
+    """
+    Split output at the first heading of each required section.
+
+    Returns:
+        Tuple (preamble, sections) where sections maps each heading found
+        to its text, from the heading line up to the next required heading
+    """
+    starts = []
+    for section, pattern in _section_patterns.get(stage, {}).items():
+        match = pattern.search(text)
+        if match:
+            starts.append((match.start(), section))
+    starts.sort()
+    preamble = text[:starts[0][0]] if starts else text
+    sections = {}
+    for index, (start, section) in enumerate(starts):
+        end = starts[index + 1][0] if index + 1 < len(starts) else len(text)
+        sections[section] = text[start:end].strip('\n')
+    return preamble.strip('\n'), sections
+
+
+def splice_sections(stage, text, additions):
+    """
+    Insert sections from a follow-up response into output missing them.
+
+    Sections already present are kept as written; the result lists every
+    section in template order.
+    """
+    preamble, sections = split_sections(stage, text)
+    _, added = split_sections(stage, additions)
+    parts = [preamble] if preamble else []
+    for section in REQUIRED_SECTIONS[stage]:
+        content = sections.get(section) or added.get(section)
+        if content:
+            parts.append(content)
+    return '\n\n'.join(parts)
@@ -0,0 +1,171 @@
+"""Watch-folder ingestion: analyze new or changed policies as they arrive."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint import RunCheckpoint
+from incremental import STATE_DIR
+from utils import atomic_write
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # not installed or not Linux: fall back to polling
+    INotify = None
+
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+WATCH_STATE_NAME = 'watch_state.json'
+
+DEFAULT_DEBOUNCE = 2.0  # seconds a file must stay unchanged before it is analyzed
+DEFAULT_POLL_INTERVAL = 5.0
+READ_RETRIES = 3  # debounce windows an unreadable file is retried before it is skipped
+
+
+def _is_policy(path):
+    name = os.path.basename(path)
+    # Skip hidden, temporary and Office lock files
+    return (Path(name).suffix.lower() in SUPPORTED_EXTENSIONS
+            and not name.startswith(('.', '~$')) and os.path.isfile(path))
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PolicyWatcher:
+    """Debounce file events in a directory and analyze each new file content once."""
+
+    def __init__(self, directory, analyze, output_dir='output', workers=1, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, store=None, **options):
+        self.directory = directory
+        self.analyze = analyze
+        self.output_dir = output_dir
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.store = store
+        self.options = options
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='watch-worker')
+        self.state_path = os.path.join(output_dir, STATE_DIR, WATCH_STATE_NAME)
+        self.state = self._load_state()
+        self.lock = threading.Lock()
+        self.in_flight = set()
+        # path -> (size, mtime_ns, time of last change)
+        self.pending = {}
+        self.seen = {}
+        # path -> failed reads of a file that is still locked or unreadable
+        self.read_failures = {}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _touch(self, path, now):
+        """Record activity on a file; its debounce window restarts on every change."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.seen.get(path) == signature and path not in self.pending:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[:2] != signature:
+            self.pending[path] = (*signature, now)
+        self.seen[path] = signature
+
+    def _scan(self, now):
+        for entry in os.scandir(self.directory):
+            if _is_policy(entry.path):
+                self._touch(entry.path, now)
+
+    def _dispatch(self, now):
+        """Hash settled files and queue those whose content has not been analyzed."""
+        for path, (_, _, changed) in list(self.pending.items()):
+            if now - changed < self.debounce:
+                continue
+            del self.pending[path]
+            if not _is_policy(path):
+                continue
+            try:
+                digest = _file_hash(path)
+            except OSError as e:
+                # Still being written, locked or unreadable; try again after another window
+                failures = self.read_failures.get(path, 0) + 1
+                if failures < READ_RETRIES and os.path.exists(path):
+                    self.read_failures[path] = failures
+                    self.pending[path] = (*self.seen.get(path, (None, None)), now)
+                    print(f"Cannot read {os.path.basename(path)} yet ({e}); retrying")
+                else:
+                    self.read_failures.pop(path, None)
+                    print(f"Skipping {os.path.basename(path)}: {e}")
+                continue
+            self.read_failures.pop(path, None)
+            with self.lock:
+                if digest in self.state or digest in self.in_flight:
+                    print(f"Skipping {os.path.basename(path)}: content already analyzed")
+                    continue
+                self.in_flight.add(digest)
+            print(f"Queued {os.path.basename(path)} for analysis")
+            self.executor.submit(self._run, path, digest)
+
+    def _run(self, path, digest):
+        try:
+            run = RunCheckpoint.create(self.output_dir, [path])
+            if self.store is not None:
+                self.store.record_run(run.run_id, self.output_dir)
+            results = self.analyze(path, self.output_dir, checkpoint=run.policy(path),
+                                   store=self.store, **self.options)
+        except Exception as e:
+            print(f"ERROR analyzing {os.path.basename(path)}: {e}")
+            with self.lock:
+                self.in_flight.discard(digest)
+            return
+        with self.lock:
+            self.in_flight.discard(digest)
+            self.state[digest] = {
+                'path': path,
+                'analyzed': datetime.now().isoformat(timespec='seconds'),
+                'output_base': results['output_base']
+            }
+            atomic_write(json.dumps(self.state, indent=2), self.state_path)
+
+    def watch(self, stop_event=None):
+        """Process the directory's current policies, then follow changes until stopped."""
+        stop_event = stop_event or threading.Event()
+        notifier = None
+        if INotify is not None:
+            notifier = INotify()
+            notifier.add_watch(self.directory, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        mode = 'inotify' if notifier else f"polling every {self.poll_interval:g}s"
+        print(f"Watching {self.directory} ({mode}, debounce {self.debounce:g}s). Press Ctrl+C to stop.")
+
+        self._scan(time.monotonic())
+        try:
+            while not stop_event.is_set():
+                if notifier is not None:
+                    # Wake up at least once per debounce window to dispatch settled files
+                    timeout = self.debounce if self.pending else self.poll_interval
+                    for event in notifier.read(timeout=int(timeout * 1000)):
+                        self._touch(os.path.join(self.directory, event.name), time.monotonic())
+                else:
+                    stop_event.wait(min(self.poll_interval, self.debounce) if self.pending
+                                    else self.poll_interval)
+                    self._scan(time.monotonic())
+                self._dispatch(time.monotonic())
+        finally:
+            if notifier is not None:
+                notifier.close()
+            self.executor.shutdown(wait=True)
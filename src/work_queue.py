@@ -0,0 +1,310 @@
+"""Shared-directory work queue letting several worker processes split a policy library."""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint import RunCheckpoint
+from utils import atomic_write
+
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+# Queue bookkeeping lives next to the policies so every node sees the same state
+QUEUE_DIR = '.queue'
+LEASES_DIR = 'leases'
+STATUS_DIR = 'status'
+
+DEFAULT_LEASE_TIMEOUT = 120.0  # seconds without a heartbeat before a lease is reclaimed
+HEARTBEAT_INTERVAL = 15.0  # seconds between lease heartbeats
+DEFAULT_POLL_INTERVAL = 10.0  # seconds between scans while other workers hold leases
+MAX_ATTEMPTS = 3  # failed analyses of a policy before it is given up
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_lease(path):
+    """A lease file's info, or None if it is not valid JSON."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return None
+
+
+class Lease:
+    """An exclusively created lease file kept alive by touching its mtime."""
+
+    def __init__(self, path, info, run, heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.path = path
+        self.info = info
+        self.run = run
+        self.heartbeat_interval = heartbeat_interval
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._heartbeat, name='lease-heartbeat', daemon=True)
+
+    def _heartbeat(self):
+        while not self.stop.wait(self.heartbeat_interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                # Possibly moved aside for a moment by a reclaiming worker that
+                # gives fresh leases back; owned() tells whether it is still ours
+                continue
+
+    def owned(self):
+        """True if the lease file is still ours (not reclaimed by another worker)."""
+        try:
+            return (_read_lease(self.path) or {}).get('worker') == self.info['worker']
+        except OSError:
+            return False
+
+    def release(self):
+        self.stop.set()
+        self.thread.join()
+        if self.owned():
+            os.remove(self.path)
+
+
+class WorkQueue:
+    """
+    Policies in a shared directory claimed through atomic lease files.
+
+    A worker claims a policy by creating <dir>/.queue/leases/<name>.lease
+    with O_CREAT | O_EXCL, which succeeds for exactly one worker, and keeps
+    it alive by touching it every HEARTBEAT_INTERVAL seconds. A lease not
+    touched for `lease_timeout` seconds belongs to a dead worker and is
+    reclaimed. Finished policies get a status file recording the content
+    hash, so a policy is analyzed again only after it changes.
+    """
+
+    def __init__(self, directory, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        self.directory = directory
+        self.lease_timeout = lease_timeout
+        self.leases_dir = os.path.join(directory, QUEUE_DIR, LEASES_DIR)
+        self.status_dir = os.path.join(directory, QUEUE_DIR, STATUS_DIR)
+        os.makedirs(self.leases_dir, exist_ok=True)
+        os.makedirs(self.status_dir, exist_ok=True)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def policies(self):
+        """Policy files in the queue directory, in name order."""
+        return sorted(entry.path for entry in os.scandir(self.directory)
+                      if entry.is_file() and Path(entry.name).suffix.lower() in SUPPORTED_EXTENSIONS
+                      and not entry.name.startswith('.'))
+
+    def _status_path(self, policy_path):
+        return os.path.join(self.status_dir, f"{os.path.basename(policy_path)}.json")
+
+    def _lease_path(self, policy_path):
+        return os.path.join(self.leases_dir, f"{os.path.basename(policy_path)}.lease")
+
+    def _load_status(self, policy_path):
+        try:
+            with open(self._status_path(policy_path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except PermissionError:
+            raise
+        except (OSError, ValueError):
+            return None
+
+    def status(self, policy_path):
+        """The policy's status file contents, or None if absent or unreadable."""
+        try:
+            return self._load_status(policy_path)
+        except PermissionError:
+            return None
+
+    def is_finished(self, policy_path, digest):
+        """True if this content was analyzed, or failed MAX_ATTEMPTS times."""
+        try:
+            status = self._load_status(policy_path)
+        except PermissionError:
+            # Written by a worker under another user without read access for
+            # us; trust it when it was written after the policy last changed
+            try:
+                return os.path.getmtime(self._status_path(policy_path)) >= os.path.getmtime(policy_path)
+            except OSError:
+                return False
+        if status is None or status.get('sha256') != digest:
+            return False
+        return status['status'] == 'complete' or status.get('attempts', 0) >= MAX_ATTEMPTS
+
+    def _reclaim_stale(self, lease_path):
+        """
+        Remove a lease whose heartbeat stopped.
+
+        The lease is renamed to a name unique to this attempt, which is
+        atomic, then checked again: a lease that changed or was touched
+        since it was found stale (a late heartbeat, or another worker that
+        reclaimed it first and leased the policy anew) is given back.
+
+        Returns:
+            The stale lease's info (for resuming its run), or None if the
+            lease is alive or another worker reclaimed it first
+        """
+        try:
+            if self._fresh(os.stat(lease_path)):
+                return None
+            info = _read_lease(lease_path)
+            tombstone = f"{lease_path}.stale-{uuid.uuid4().hex}"
+            os.rename(lease_path, tombstone)
+        except FileNotFoundError:
+            return None
+
+        try:
+            moved_fresh = self._fresh(os.stat(tombstone))
+        except FileNotFoundError:
+            return None
+        if moved_fresh or _read_lease(tombstone) != info:
+            try:
+                # Linking never replaces a lease created in the meantime
+                os.link(tombstone, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(tombstone)
+            return None
+
+        os.remove(tombstone)
+        info = info or {}
+        print(f"Reclaimed stale lease on {os.path.basename(lease_path)[:-6]} "
+              f"from {info.get('worker', 'unknown worker')}")
+        return info
+
+    def _fresh(self, stat):
+        return time.time() - stat.st_mtime < self.lease_timeout
+
+    def claim(self, policy_path, output_dir):
+        """
+        Try to lease a policy.
+
+        Returns:
+            Lease whose info holds the run to analyze it in, or None if
+            another worker holds it
+        """
+        lease_path = self._lease_path(policy_path)
+        previous = self._reclaim_stale(lease_path) if os.path.exists(lease_path) else None
+
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+
+        # Resume the dead worker's checkpointed stages when its run is still there
+        run = None
+        if previous and previous.get('run_id'):
+            try:
+                run = RunCheckpoint.load(previous['run_id'], output_dir)
+                run.policy(policy_path)
+            except (FileNotFoundError, KeyError):
+                run = None
+        if run is None:
+            run = RunCheckpoint.create(output_dir, [policy_path])
+
+        info = {
+            'worker': self.worker_id,
+            'policy': os.path.basename(policy_path),
+            'run_id': run.run_id,
+            'claimed': datetime.now().isoformat(timespec='seconds')
+        }
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        # Several heartbeats fit in one timeout even when the timeout is short
+        lease = Lease(lease_path, info, run, min(HEARTBEAT_INTERVAL, self.lease_timeout / 4))
+        lease.thread.start()
+        return lease
+
+    def finish(self, policy_path, digest, error=None, output_base=None):
+        """Record the outcome of an analysis in the policy's status file."""
+        status = self.status(policy_path) or {}
+        attempts = status.get('attempts', 0) + 1 if status.get('sha256') == digest else 1
+        atomic_write(json.dumps({
+            'status': 'failed' if error else 'complete',
+            'sha256': digest,
+            'attempts': attempts,
+            'worker': self.worker_id,
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'output_base': output_base,
+            'error': error
+        }, indent=2), self._status_path(policy_path))
+
+
+def run_worker(directory, analyze, output_dir='output', lease_timeout=DEFAULT_LEASE_TIMEOUT,
+               poll_interval=None, store=None, **options):
+    """
+    Analyze policies from a shared directory until every one is finished.
+
+    Several workers, on one host or on many sharing the directory and the
+    output tree, can run at once; each policy is analyzed by one of them.
+    While other workers hold leases this worker waits and rescans, so it
+    can take over the leases of workers that die.
+
+    Returns:
+        Number of policies this worker analyzed
+    """
+    work_queue = WorkQueue(directory, lease_timeout)
+    # Rescan often enough to take over a dead worker's lease soon after it expires
+    poll_interval = poll_interval or min(DEFAULT_POLL_INTERVAL, lease_timeout / 2)
+    print(f"Worker {work_queue.worker_id} processing {directory}")
+    analyzed = 0
+
+    while True:
+        claimed_any = False
+        waiting = 0
+        for policy_path in work_queue.policies():
+            try:
+                digest = _file_hash(policy_path)
+                if work_queue.is_finished(policy_path, digest):
+                    continue
+                lease = work_queue.claim(policy_path, output_dir)
+            except OSError as e:
+                # Deleted or renamed since the scan; the next pass sees the directory as it is
+                print(f"Skipping {os.path.basename(policy_path)} this pass: {e}")
+                continue
+            if lease is None:
+                waiting += 1
+                continue
+            # Another worker may have finished it between our check and claim
+            if work_queue.is_finished(policy_path, digest):
+                lease.release()
+                continue
+
+            claimed_any = True
+            run = lease.run
+            try:
+                if store is not None:
+                    store.record_run(run.run_id, output_dir)
+                results = analyze(policy_path, output_dir, checkpoint=run.policy(policy_path),
+                                  store=store, **options)
+            except Exception as e:
+                print(f"ERROR analyzing {os.path.basename(policy_path)}: {e}")
+                if lease.owned():
+                    work_queue.finish(policy_path, digest, error=str(e))
+            else:
+                # The worker that reclaimed the lease records the outcome
+                if lease.owned():
+                    work_queue.finish(policy_path, digest, output_base=results['output_base'])
+                    analyzed += 1
+                else:
+                    print(f"WARNING: lease on {os.path.basename(policy_path)} was reclaimed "
+                          f"during analysis; its heartbeat stalled. Discarding these results")
+            finally:
+                lease.release()
+
+        if not claimed_any:
+            if not waiting:
+                print(f"Worker {work_queue.worker_id} done: {analyzed} policies analyzed")
+                return analyzed
+            print(f"{waiting} policies leased by other workers; checking again in {poll_interval:g}s")
+            time.sleep(poll_interval)
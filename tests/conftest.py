@@ -0,0 +1,133 @@
+"""Shared fixtures: src on the import path and a stand-in for the Ollama backend."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from metrics import current_stage
+
+GAP_ANALYSIS = """GAP ANALYSIS REPORT
+===================
+
+1. CRITICAL GAPS (High Priority)
+- Section 7 Access Control lacks multi-factor authentication (PR.AA-03)
+- No incident classification or escalation (RS.MA-02)
+
+2. SIGNIFICANT GAPS (Medium Priority)
+- Training program limited to onboarding (PR.AT-01)
+
+3. MINOR GAPS (Low Priority)
+- Policy review cadence undefined (GV.PO-02)
+
+4. SUMMARY
+The policy covers basics but misses key NIST controls."""
+
+REVISED_POLICY = """REVISED POLICY
+
+1. PURPOSE
+Revised purpose.
+
+7. ACCESS CONTROL
+- MFA required for all users
+
+END OF REVISED POLICY"""
+
+ROADMAP = """POLICY IMPROVEMENT ROADMAP
+==========================
+PHASE 1: IMMEDIATE ACTIONS (0-3 months)
+- Action 1: Deploy MFA
+PHASE 2: SHORT-TERM IMPROVEMENTS (3-6 months)
+- Action 1: Incident classification
+PHASE 3: LONG-TERM ENHANCEMENTS (6-12 months)
+- Action 1: Continuous training
+NIST FRAMEWORK ALIGNMENT
+- Protect (PR): MFA
+KEY MILESTONES
+- Month 1: MFA pilot
+RESOURCE REQUIREMENTS
+- Personnel: 1 engineer
+SUCCESS METRICS
+- MFA coverage: 100%"""
+
+EXECUTIVE_SUMMARY = """EXECUTIVE SUMMARY
+=================
+CURRENT STATE:
+Basic policy.
+KEY FINDINGS:
+- No MFA
+RISK EXPOSURE:
+High.
+RECOMMENDED ACTIONS:
+Deploy MFA.
+INVESTMENT REQUIRED:
+Low.
+EXPECTED OUTCOMES:
+Better security.
+TIMELINE:
+12 months."""
+
+# Canned response per pipeline stage; other stages get the gap analysis
+RESPONSES = {
+    'gap_analysis': GAP_ANALYSIS,
+    'revised_policy': REVISED_POLICY,
+    'roadmap': ROADMAP,
+    'executive_summary': EXECUTIVE_SUMMARY
+}
+
+FRAMEWORK = """NIST CSF 2.0
+PR.AA-03 Users, services, and hardware are authenticated with multi-factor authentication
+RS.MA-02 Incident reports are triaged, classified and escalated
+PR.AT-01 Personnel are provided awareness and training on cybersecurity
+GV.PO-02 Cybersecurity policy is reviewed, updated and communicated
+"""
+
+
+class FakeLLM:
+    """Backend with run_ollama()'s signature answering each stage with a canned report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+        # Optional callable(prompt, model, timeout, host) overriding the canned response
+        self.respond = None
+
+    def __call__(self, prompt, model, timeout, host=None):
+        stage = current_stage()
+        with self.lock:
+            self.calls.append({'stage': stage, 'model': model, 'timeout': timeout, 'host': host,
+                               'prompt': prompt})
+        if self.respond is not None:
+            response = self.respond(prompt, model, timeout, host)
+        else:
+            response = RESPONSES.get(stage, GAP_ANALYSIS)
+        return response, {'wall_time': 0.01, 'time_to_first_token': 0.001}
+
+    async def call_async(self, prompt, model, timeout, host=None):
+        """Coroutine backend with run_ollama_async()'s signature."""
+        return self(prompt, model, timeout, host)
+
+
+@pytest.fixture
+def fake_llm():
+    """Install a FakeLLM as the synchronous and asyncio LLM backend for the test."""
+    from gap_analyzer import set_llm_backend, set_stage_models, set_llm_endpoints
+    backend = FakeLLM()
+    set_llm_backend(backend, backend.call_async)
+    yield backend
+    set_llm_backend()
+    set_stage_models()
+    set_llm_endpoints()
+
+
+@pytest.fixture
+def framework_dir(tmp_path, monkeypatch):
+    """Run from a directory whose data/reference holds a small framework text."""
+    reference = tmp_path / 'data' / 'reference'
+    reference.mkdir(parents=True)
+    (reference / 'nist_framework.txt').write_text(FRAMEWORK, encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,69 @@
+"""Asyncio pipeline API."""
+
+import asyncio
+import logging
+
+import endpoints
+from async_pipeline import analyze_policies_async, analyze_policy_async
+from conftest import RESPONSES
+from gap_analyzer import set_llm_backend, set_llm_endpoints
+from metrics import current_stage
+
+
+def _write_policies(directory, count):
+    paths = []
+    for n in range(count):
+        path = directory / f"policy{n}.txt"
+        path.write_text(f"1. PURPOSE\nSecurity requirements of business unit {n}.\n", encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+def test_async_calls_balanced_across_endpoints(fake_llm, framework_dir, monkeypatch):
+    monkeypatch.setattr(endpoints, 'check_endpoint', lambda host: True)
+    set_llm_endpoints(['alpha:11434', 'beta:11434'])
+    events = []
+
+    async def generate(prompt, model, timeout, host=None):
+        # Calls that overlap find the first endpoint busy
+        await asyncio.sleep(0.01)
+        return fake_llm(prompt, model, timeout, host)
+
+    set_llm_backend(fake_llm, generate)
+
+    results = asyncio.run(analyze_policies_async(_write_policies(framework_dir, 4), 'out',
+                                                 max_concurrent_llm=2, progress=events.append))
+
+    assert all(isinstance(result, dict) for result in results)
+    hosts = {call['host'] for call in fake_llm.calls}
+    assert hosts == {'alpha:11434', 'beta:11434'}
+    recorded = {call['endpoint'] for result in results for call in result['metrics']['llm_calls']}
+    assert recorded == hosts
+    assert sum(event['event'] == 'completed' for event in events) == 4
+
+
+def test_repairs_logged_not_printed(fake_llm, framework_dir, caplog, capsys):
+    partial_roadmap = RESPONSES['roadmap'].split('KEY MILESTONES')[0]
+
+    def respond(prompt, model, timeout, host):
+        if current_stage() == 'roadmap' and 'YOUR RESPONSE SO FAR' not in prompt:
+            return partial_roadmap
+        return RESPONSES[current_stage()]
+
+    fake_llm.respond = respond
+    with caplog.at_level(logging.WARNING, logger='gap_analyzer'):
+        result = asyncio.run(analyze_policy_async(_write_policies(framework_dir, 1)[0], 'out'))
+
+    assert any('roadmap output is missing' in record.getMessage() for record in caplog.records)
+    assert capsys.readouterr().out == ''
+    assert [repair['stage'] for repair in result['metrics']['repairs']] == ['roadmap']
+
+
+def test_runs_without_asyncio_to_thread(fake_llm, framework_dir, monkeypatch):
+    # asyncio.to_thread() is missing on Python 3.8
+    monkeypatch.delattr(asyncio, 'to_thread')
+
+    result = asyncio.run(analyze_policy_async(_write_policies(framework_dir, 1)[0], 'out'))
+
+    # Report writers run in a thread and still record into the analysis' metrics
+    assert 'save_reports' in {stage['stage'] for stage in result['metrics']['stages']}
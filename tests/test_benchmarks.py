@@ -0,0 +1,43 @@
+"""Benchmark stand-in LLM and baseline comparison."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_system import RESPONSES, StandInLLM, compare_to_baseline
+from metrics import timed_stage
+from validation import missing_sections
+
+
+def test_stand_in_answers_by_stage_not_prompt_text():
+    llm = StandInLLM(0)
+    # A policy quoting another template's heading must not change the routing
+    prompt = "EXECUTIVE SUMMARY\nPOLICY IMPROVEMENT ROADMAP\nGAP ANALYSIS REPORT"
+
+    with timed_stage('gap_analysis'):
+        assert llm(prompt, 'model', 10)[0] == RESPONSES['gap_analysis']
+    with timed_stage('executive_summary'):
+        assert llm(prompt, 'model', 10)[0] == RESPONSES['executive_summary']
+    with timed_stage('revised_policy'):
+        assert 'INFORMATION SECURITY POLICY' in llm(prompt, 'model', 10)[0]
+
+
+def test_stand_in_answers_pass_validation():
+    """Incomplete answers would make the batch benchmark measure repair calls."""
+    llm = StandInLLM(0)
+    for stage in ('gap_analysis', 'revised_policy', 'roadmap', 'executive_summary'):
+        with timed_stage(stage):
+            assert missing_sections(stage, llm('prompt', 'model', 10)[0]) == []
+
+
+def test_regressions_beyond_tolerance_reported():
+    baseline = {'fast': 1.0, 'slow': 1.0, 'noise': 0.001}
+    results = {'fast': 1.1, 'slow': 1.5, 'noise': 0.004, 'new': 2.0}
+
+    assert compare_to_baseline(results, baseline, 0.25) == ['slow']
+
+
+def test_baseline_committed():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert os.path.exists(os.path.join(root, 'benchmarks', 'baseline.json'))
@@ -0,0 +1,39 @@
+"""Run bundles with a hashed manifest."""
+
+import json
+import zipfile
+
+from bundle import BUNDLE_MANIFEST, verify_bundle, write_run_bundle
+from checkpoint import RunCheckpoint
+from main import analyze_policy
+
+
+def _tamper(bundle_path, name):
+    """Rewrite the bundle with one member's contents changed."""
+    with zipfile.ZipFile(bundle_path) as bundle:
+        members = {info.filename: bundle.read(info) for info in bundle.infolist()}
+    members[name] += b"tampered"
+    with zipfile.ZipFile(bundle_path, 'w') as bundle:
+        for member, data in members.items():
+            bundle.writestr(member, data)
+
+
+def test_bundle_manifest_hashes_every_file(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text("1. PURPOSE\nSecurity requirements.\n", encoding='utf-8')
+    run = RunCheckpoint.create('out', ['policy.txt'])
+    analyze_policy('policy.txt', 'out', incremental=False, checkpoint=run.policy('policy.txt'),
+                   formats=('txt', 'md'))
+
+    bundle_path = write_run_bundle(RunCheckpoint.load(run.run_id, 'out'))
+
+    with zipfile.ZipFile(bundle_path) as bundle:
+        manifest = json.loads(bundle.read(BUNDLE_MANIFEST))
+        names = set(bundle.namelist()) - {BUNDLE_MANIFEST}
+    listed = manifest['files'] + [item for policy in manifest['policies'] for item in policy['files']]
+    assert names and {item['name'] for item in listed} == names
+    assert all(len(item['sha256']) == 64 for item in listed)
+    assert verify_bundle(bundle_path) == []
+
+    tampered = sorted(names)[0]
+    _tamper(bundle_path, tampered)
+    assert verify_bundle(bundle_path) == [tampered]
@@ -0,0 +1,38 @@
+"""Checkpointed runs resumed after a failed stage."""
+
+import pytest
+
+from checkpoint import RunCheckpoint
+from conftest import RESPONSES
+from main import analyze_policy
+from metrics import current_stage
+
+POLICY = "1. PURPOSE\nThis policy defines the security requirements.\n"
+
+
+def _fail_roadmap(prompt, model, timeout, host):
+    if current_stage() == 'roadmap':
+        raise RuntimeError("Ollama crashed")
+    return RESPONSES[current_stage()]
+
+
+def test_resume_restores_completed_stages(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text(POLICY, encoding='utf-8')
+    run = RunCheckpoint.create('out', ['policy.txt'])
+
+    fake_llm.respond = _fail_roadmap
+    with pytest.raises(RuntimeError, match='Ollama crashed'):
+        analyze_policy('policy.txt', 'out', incremental=False, checkpoint=run.policy('policy.txt'),
+                       formats=('txt',))
+    assert run.pending() == ['policy.txt']
+
+    fake_llm.respond = None
+    fake_llm.calls.clear()
+    resumed = RunCheckpoint.load(run.run_id, 'out')
+    results = analyze_policy('policy.txt', 'out', incremental=False, checkpoint=resumed.policy('policy.txt'),
+                             formats=('txt',))
+
+    assert [call['stage'] for call in fake_llm.calls] == ['roadmap', 'executive_summary']
+    assert results['metrics']['cache_hits'].get('checkpoint') == 2
+    assert RunCheckpoint.load(run.run_id, 'out').pending() == []
+    assert results['output_base'] == resumed.policy('policy.txt').output_base
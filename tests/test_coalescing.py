@@ -0,0 +1,116 @@
+"""Single-flight coalescing of identical LLM calls."""
+
+import asyncio
+import subprocess
+import threading
+import time
+
+import pytest
+
+from coalescing import FlightTimeout, SingleFlight
+from conftest import GAP_ANALYSIS
+from deadlines import Deadline, DeadlineExceeded, within_deadline
+from gap_analyzer import call_local_llm
+
+
+def _leader_in_flight(flight, release, outcome):
+    """Start a leader thread for key 'k' blocked until `release` is set."""
+    started = threading.Event()
+
+    def call():
+        started.set()
+        release.wait(5)
+        return outcome()
+
+    def lead():
+        try:
+            flight.do('k', call)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    started.wait(5)
+    return thread
+
+
+def test_follower_waits_at_most_its_own_timeout():
+    flight, release = SingleFlight(), threading.Event()
+    leader = _leader_in_flight(flight, release, lambda: 'shared')
+
+    with pytest.raises(FlightTimeout):
+        flight.do('k', lambda: 'own', timeout=0.05)
+    release.set()
+    leader.join()
+
+
+def test_follower_reruns_call_after_leader_deadline():
+    flight, release = SingleFlight(), threading.Event()
+
+    def fail():
+        raise DeadlineExceeded('gap_analysis', 1, 1)
+
+    leader = _leader_in_flight(flight, release, fail)
+    follower = {}
+    thread = threading.Thread(target=lambda: follower.update(result=flight.do(
+        'k', lambda: 'own', retry=lambda error: isinstance(error, DeadlineExceeded))))
+    thread.start()
+    time.sleep(0.1)  # let the follower join the flight
+    release.set()
+    thread.join()
+    leader.join()
+
+    assert follower['result'] == ('own', False)
+
+
+def test_async_follower_timeout_leaves_leader_running():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return 'shared'
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async('k', slow))
+        await asyncio.sleep(0)
+        with pytest.raises(FlightTimeout):
+            await flight.do_async('k', slow, timeout=0.05)
+        return await leader
+
+    assert asyncio.run(run()) == ('shared', False)
+
+
+def test_caller_without_deadline_not_failed_by_leader_deadline(fake_llm):
+    started, release = threading.Event(), threading.Event()
+
+    def respond(prompt, model, timeout, host):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+            raise subprocess.TimeoutExpired('ollama', timeout)
+        return GAP_ANALYSIS
+
+    fake_llm.respond = respond
+    outcomes = {}
+
+    def lead():
+        try:
+            with within_deadline(Deadline(60)):
+                call_local_llm('same prompt', model='gemma3:4b')
+        except DeadlineExceeded as e:
+            outcomes['leader'] = e
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: outcomes.update(
+        follower=call_local_llm('same prompt', model='gemma3:4b')))
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert isinstance(outcomes['leader'], DeadlineExceeded)
+    assert outcomes['follower'] == GAP_ANALYSIS
+    assert len(fake_llm.calls) == 2
@@ -0,0 +1,39 @@
+"""Incremental conversion of text reports to PDF."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conftest import GAP_ANALYSIS
+from convert_to_pdf import STATE_FILE, convert_existing_reports
+
+
+def _state(directory):
+    with open(directory / STATE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_only_new_or_changed_reports_converted(tmp_path):
+    (tmp_path / 'a_gap_analysis.txt').write_text(GAP_ANALYSIS, encoding='utf-8')
+    (tmp_path / 'b_roadmap.txt').write_text(GAP_ANALYSIS, encoding='utf-8')
+    assert convert_existing_reports(tmp_path, workers=1)['converted'] == 2
+
+    # Touched but unchanged reports keep their PDF
+    os.utime(tmp_path / 'a_gap_analysis.txt')
+    (tmp_path / 'b_roadmap.txt').write_text(GAP_ANALYSIS + "\nEdited.", encoding='utf-8')
+
+    assert convert_existing_reports(tmp_path, workers=1) == {'converted': 1, 'skipped': 1, 'failed': 0}
+
+
+def test_non_recursive_run_keeps_subdirectory_state(tmp_path):
+    (tmp_path / 'top_gap_analysis.txt').write_text(GAP_ANALYSIS, encoding='utf-8')
+    (tmp_path / 'archive').mkdir()
+    (tmp_path / 'archive' / 'old_gap_analysis.txt').write_text(GAP_ANALYSIS, encoding='utf-8')
+    convert_existing_reports(tmp_path, recursive=True, workers=1)
+
+    convert_existing_reports(tmp_path, workers=1)
+
+    assert sorted(_state(tmp_path)) == ['archive/old_gap_analysis.txt', 'top_gap_analysis.txt']
+    assert convert_existing_reports(tmp_path, recursive=True, workers=1)['converted'] == 0
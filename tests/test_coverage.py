@@ -0,0 +1,46 @@
+"""Control coverage matrix."""
+
+import numpy as np
+
+from conftest import FRAMEWORK
+from coverage import compute_coverage, load_policy_library, format_coverage_report
+
+
+def test_covered_control_found_in_best_policy():
+    policies = {
+        'access.txt': "1. ACCESS\nUsers are authenticated with multi-factor authentication.",
+        'training.txt': "1. TRAINING\nPersonnel receive cybersecurity awareness training yearly."
+    }
+    coverage = compute_coverage(policies, FRAMEWORK)
+
+    assert coverage['matrix'].shape == (2, 4)
+    by_control = {item['control']: item for item in coverage['per_control']}
+    assert by_control['PR.AA-03']['best_policy'] == 'access.txt'
+    assert by_control['PR.AT-01']['best_policy'] == 'training.txt'
+    assert by_control['PR.AA-03']['status'] != 'uncovered'
+
+
+def test_empty_library_is_all_uncovered():
+    coverage = compute_coverage({}, FRAMEWORK)
+
+    assert coverage['matrix'].shape == (0, 4)
+    assert {item['status'] for item in coverage['per_control']} == {'uncovered'}
+    assert 'Uncovered: 4' in format_coverage_report(coverage)
+
+
+def test_same_stem_policies_stay_distinct(tmp_path):
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / 'isms.txt').write_text(f"Policy from {folder}", encoding='utf-8')
+
+    policies = load_policy_library([tmp_path / 'a' / 'isms.txt', tmp_path / 'b' / 'isms.txt'])
+
+    assert sorted(policies) == ['a/isms.txt', 'b/isms.txt']
+    assert load_policy_library([]) == {}
+    assert isinstance(compute_coverage(policies, FRAMEWORK)['matrix'], np.ndarray)
+
+
+def test_coverage_report_skipped_without_policies(tmp_path):
+    from main import generate_coverage_report
+
+    assert generate_coverage_report([tmp_path / 'missing.txt'], str(tmp_path)) is None
@@ -0,0 +1,83 @@
+"""Deadline budgets: killed calls, partial results and coalesced callers."""
+
+import asyncio
+import json
+import subprocess
+import threading
+
+import pytest
+
+from async_pipeline import analyze_policy_async
+from conftest import RESPONSES
+from deadlines import Deadline, DeadlineExceeded, within_deadline
+from gap_analyzer import call_local_llm
+from main import analyze_policy
+from metrics import current_stage
+
+POLICY = "1. PURPOSE\nThis policy defines the security requirements.\n"
+
+
+def _kill_roadmap(prompt, model, timeout, host):
+    if current_stage() == 'roadmap':
+        raise subprocess.TimeoutExpired('ollama', timeout)
+    return RESPONSES[current_stage()]
+
+
+def _partial(directory):
+    [path] = directory.glob('out/*_partial.json')
+    with open(path, encoding='utf-8') as f:
+        partial = json.load(f)
+    with open(str(path).replace('_partial.json', '_metrics.json'), encoding='utf-8') as f:
+        return partial, json.load(f)
+
+
+def test_sync_deadline_saves_partial_results(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text(POLICY, encoding='utf-8')
+    fake_llm.respond = _kill_roadmap
+
+    with pytest.raises(DeadlineExceeded):
+        analyze_policy('policy.txt', 'out', incremental=False, formats=('txt',), deadline=300)
+
+    partial, metrics = _partial(framework_dir)
+    assert partial['status'] == 'deadline_exceeded' and partial['stage'] == 'roadmap'
+    assert partial['completed_stages'] == ['gap_analysis', 'revised_policy']
+    assert metrics['deadline']['exceeded'] is True
+
+
+def test_async_deadline_saves_partial_results(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text(POLICY, encoding='utf-8')
+    fake_llm.respond = _kill_roadmap
+    events = []
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(analyze_policy_async('policy.txt', 'out', progress=events.append, deadline=300))
+
+    partial, metrics = _partial(framework_dir)
+    assert partial['status'] == 'deadline_exceeded' and partial['stage'] == 'roadmap'
+    assert partial['completed_stages'] == ['gap_analysis', 'revised_policy']
+    assert partial['results']['revised_policy'] == RESPONSES['revised_policy'].replace(
+        '\n\nEND OF REVISED POLICY', '')
+    assert metrics['deadline'] == {'budget': 300, 'elapsed': metrics['deadline']['elapsed'],
+                                   'exceeded': True, 'stage': 'roadmap'}
+    assert events[-1]['event'] == 'failed' and events[-1]['partial'].endswith('_partial.json')
+
+
+def test_coalesced_caller_bounded_by_its_own_deadline(fake_llm):
+    started, release = threading.Event(), threading.Event()
+
+    def respond(prompt, model, timeout, host):
+        started.set()
+        release.wait(5)
+        return RESPONSES['gap_analysis']
+
+    fake_llm.respond = respond
+    leader = threading.Thread(target=lambda: call_local_llm('same prompt', model='gemma3:4b'))
+    leader.start()
+    started.wait(5)
+    try:
+        with pytest.raises(DeadlineExceeded), within_deadline(Deadline(0.1)):
+            call_local_llm('same prompt', model='gemma3:4b')
+    finally:
+        release.set()
+        leader.join()
+    assert len(fake_llm.calls) == 1
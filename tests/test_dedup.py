@@ -0,0 +1,62 @@
+"""Exact and near-duplicate policy reuse."""
+
+import threading
+
+from dedup import DuplicateIndex, fingerprint_text
+from main import analyze_policy
+
+BASE = '\n'.join(f"{n}. SECTION {n}\nEmployees must follow control number {n} of the security program "
+                 f"and report deviations to the security office within {n} days." for n in range(1, 21))
+
+
+def test_find_exact_near_and_unrelated():
+    index = DuplicateIndex()
+    index.add('base', BASE, {'result': 1})
+
+    assert fingerprint_text(BASE.upper()) == fingerprint_text("  " + BASE)
+    assert index.find(BASE.replace('\n', '\n\n'))[:2] == ('exact', 'base')
+
+    kind, key, payload, similarity = index.find(BASE.replace('within 20 days', 'within 30 days'))
+    assert (kind, key, payload) == ('near', 'base', {'result': 1})
+    assert similarity >= index.threshold
+
+    assert index.find("A completely different acceptable use policy about laptops.")[0] is None
+
+
+def test_batch_duplicate_reuses_analysis(fake_llm, framework_dir):
+    (framework_dir / 'first.txt').write_text(BASE, encoding='utf-8')
+    (framework_dir / 'copy.txt').write_text(BASE + '\n', encoding='utf-8')
+    index = DuplicateIndex()
+
+    first = analyze_policy('first.txt', 'out', index, incremental=False, formats=('txt',))
+    calls = len(fake_llm.calls)
+    copy = analyze_policy('copy.txt', 'out', index, incremental=False, formats=('txt',))
+
+    assert calls == 4
+    assert len(fake_llm.calls) == calls
+    assert copy['gap_analysis'] == first['gap_analysis']
+    assert copy['metrics']['cache_hits'].get('duplicate') == 4
+
+
+def test_concurrent_add_remove_and_find():
+    index = DuplicateIndex(max_entries=8)
+    texts = [BASE.replace('within 1 days', f'within {n} weeks') for n in range(40)]
+    errors = []
+
+    def churn(offset):
+        try:
+            for n in range(offset, len(texts), 4):
+                index.add(f"policy{n}", texts[n], n)
+                index.find(texts[(n + 1) % len(texts)])
+                index.remove(f"policy{n - 4}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=churn, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(index.payloads) == len(index.signatures) == len(index.fingerprints) <= 8
@@ -0,0 +1,103 @@
+"""Load balancing and failover across Ollama endpoints."""
+
+import inspect
+import subprocess
+
+import pytest
+
+import endpoints
+from endpoints import LAST_ENDPOINT_RETRIES, EndpointScheduler
+from gap_analyzer import call_local_llm, call_local_llm_async
+from llm_backend import OllamaConnectionError, _run_error
+
+
+@pytest.fixture(autouse=True)
+def reachable(monkeypatch):
+    monkeypatch.setattr(endpoints, 'check_endpoint', lambda host: True)
+
+
+class Backend:
+    """Records hosts; `errors` maps host -> exceptions raised by its next calls."""
+
+    def __init__(self, errors=None):
+        self.hosts = []
+        self.errors = errors or {}
+
+    def __call__(self, prompt, model, timeout, host=None):
+        self.hosts.append(host)
+        pending = self.errors.get(host)
+        if pending:
+            raise pending.pop(0)
+        return 'response', {}
+
+
+def _states(scheduler):
+    return {endpoint['host']: endpoint for endpoint in scheduler.status()}
+
+
+def test_connection_error_strings_classified():
+    assert isinstance(_run_error("Error: could not connect to ollama app, is it running?"),
+                      OllamaConnectionError)
+    error = _run_error("Error: model 'missing' not found")
+    assert type(error) is RuntimeError
+
+
+def test_unreachable_endpoint_fails_over_and_is_marked_down():
+    scheduler = EndpointScheduler(['a', 'b'], backoff=0)
+    backend = Backend({'a': [OllamaConnectionError('refused')]})
+
+    assert scheduler.call(backend, 'p', 'm', 10) == ('response', {'endpoint': 'b'})
+    assert backend.hosts == ['a', 'b']
+    assert not _states(scheduler)['a']['healthy'] and _states(scheduler)['b']['healthy']
+
+
+def test_generation_errors_do_not_mark_endpoint_down():
+    scheduler = EndpointScheduler(['a', 'b'], backoff=0)
+    backend = Backend({'a': [RuntimeError("model 'm' not found")]})
+
+    with pytest.raises(RuntimeError, match='not found'):
+        scheduler.call(backend, 'p', 'm', 10)
+    assert backend.hosts == ['a']
+    assert _states(scheduler)['a']['healthy']
+
+
+def test_budgeted_timeout_raised_without_failover():
+    scheduler = EndpointScheduler(['a', 'b'], backoff=0)
+    backend = Backend({'a': [subprocess.TimeoutExpired('ollama', 5)]})
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        scheduler.call(backend, 'p', 'm', 5, failover_on_timeout=False)
+    assert backend.hosts == ['a'] and _states(scheduler)['a']['healthy']
+
+
+def test_last_endpoint_backed_off_and_retried():
+    scheduler = EndpointScheduler(['a'], backoff=0)
+    backend = Backend({'a': [OllamaConnectionError('refused'), subprocess.TimeoutExpired('ollama', 5)]})
+
+    assert scheduler.call(backend, 'p', 'm', 5)[0] == 'response'
+    assert backend.hosts == ['a', 'a', 'a']
+    state = _states(scheduler)['a']
+    assert state['healthy'] and not state['backing_off'] and state['failures'] == 2
+
+
+def test_last_endpoint_error_raised_after_retries():
+    scheduler = EndpointScheduler(['a', 'b'], backoff=0)
+    backend = Backend({'a': [ConnectionError('down')] * 10, 'b': [ConnectionError('down')] * 10})
+
+    with pytest.raises(ConnectionError):
+        scheduler.call(backend, 'p', 'm', 5)
+    # b was taken out of rotation while a was usable; a is the last and was retried
+    assert backend.hosts.count('a') + backend.hosts.count('b') == 2 + LAST_ENDPOINT_RETRIES
+    assert sum(state['backing_off'] for state in _states(scheduler).values()) == 1
+
+    backend.errors = {}
+    assert scheduler.call(backend, 'p', 'm', 5)[0] == 'response'
+
+
+def test_sync_and_async_calls_take_the_same_parameters():
+    sync_parameters = inspect.signature(call_local_llm).parameters
+    async_parameters = inspect.signature(call_local_llm_async).parameters
+
+    assert list(sync_parameters.items()) == list(async_parameters.items())
+    assert [name for name, parameter in sync_parameters.items()
+            if parameter.kind is inspect.Parameter.KEYWORD_ONLY] == ['endpoints', 'stage']
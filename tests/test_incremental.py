@@ -0,0 +1,109 @@
+"""Incremental re-analysis from stored section state."""
+
+from conftest import RESPONSES
+from gap_analyzer import set_stage_models
+from main import analyze_policy
+from metrics import current_stage
+
+POLICY = """1. PURPOSE
+This policy defines the security requirements of the company.
+
+2. TRAINING
+Staff receive security training during onboarding.
+
+3. ACCESS CONTROL
+Passwords are required for every account.
+
+4. INCIDENTS
+Incidents are reported to the help desk.
+"""
+
+ORIGINAL_REPORT = """GAP ANALYSIS REPORT
+===================
+
+1. CRITICAL GAPS (High Priority)
+Findings were reviewed by the analyst against CSF 2.0.
+- Section 3 lacks multi-factor authentication (PR.AA-03)
+
+2. SIGNIFICANT GAPS (Medium Priority)
+- Section 2 training is limited to onboarding (PR.AT-01)
+
+3. MINOR GAPS (Low Priority)
+- Section 4 incidents are not classified (RS.MA-02)
+
+4. SUMMARY
+Original assessment."""
+
+SECTION_REPORT = """GAP ANALYSIS REPORT
+
+1. CRITICAL GAPS (High Priority)
+- Section 3 passwords have no minimum length (PR.AA-01)
+
+2. SIGNIFICANT GAPS (Medium Priority)
+
+3. MINOR GAPS (Low Priority)
+
+4. SUMMARY
+Edited assessment."""
+
+
+def _respond(prompt, model, timeout, host):
+    if current_stage() == 'gap_analysis':
+        return SECTION_REPORT if 'THESE SECTIONS ONLY' in prompt else ORIGINAL_REPORT
+    return RESPONSES[current_stage()]
+
+
+def _analyze(tmp_path, content):
+    (tmp_path / 'access.txt').write_text(content, encoding='utf-8')
+    return analyze_policy('access.txt', 'out', formats=('txt',))
+
+
+def test_unchanged_policy_reuses_stored_results(fake_llm, framework_dir):
+    _analyze(framework_dir, POLICY)
+    calls = len(fake_llm.calls)
+
+    again = _analyze(framework_dir, POLICY)
+
+    assert len(fake_llm.calls) == calls
+    assert again['metrics']['cache_hits'].get('stored_state') == 4
+
+
+def test_model_change_invalidates_stored_results(fake_llm, framework_dir):
+    _analyze(framework_dir, POLICY)
+    calls = len(fake_llm.calls)
+
+    set_stage_models('llama3:8b')
+    _analyze(framework_dir, POLICY)
+
+    assert len(fake_llm.calls) == calls + 4
+    assert fake_llm.calls[-1]['model'] == 'llama3:8b'
+
+
+def test_framework_change_invalidates_stored_results(fake_llm, framework_dir):
+    _analyze(framework_dir, POLICY)
+    calls = len(fake_llm.calls)
+
+    framework = framework_dir / 'data' / 'reference' / 'nist_framework.txt'
+    framework.write_text(framework.read_text() + "DE.CM-01 Networks are monitored\n")
+    _analyze(framework_dir, POLICY)
+
+    assert len(fake_llm.calls) == calls + 4
+
+
+def test_edit_splices_changed_findings_into_previous_report(fake_llm, framework_dir):
+    fake_llm.respond = _respond
+    _analyze(framework_dir, POLICY)
+
+    edited = _analyze(framework_dir, POLICY.replace('Passwords are required', 'Passphrases are required'))
+    report = edited['gap_analysis']
+
+    assert 'Findings were reviewed by the analyst against CSF 2.0.' in report
+    assert 'Section 2 training is limited to onboarding' in report
+    assert 'passwords have no minimum length' in report
+    assert 'lacks multi-factor authentication' not in report
+    assert 'Edited assessment.' in report and 'Original assessment.' not in report
+
+    # The summary is replaced on each edit rather than growing
+    edited_again = _analyze(framework_dir, POLICY.replace('Passwords are required', 'Tokens are required'))
+    assert edited_again['gap_analysis'].count('Edited assessment.') == 1
+    assert len(edited_again['gap_analysis']) == len(report)
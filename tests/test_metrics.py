@@ -0,0 +1,34 @@
+"""Per-stage and per-call metrics written as JSON."""
+
+import json
+
+from main import analyze_policy
+from metrics import RunMetrics, aggregate_metrics, collect_metrics, record_cache_hit, timed_stage
+
+
+def test_stages_and_cache_hits_recorded():
+    metrics = RunMetrics('policy')
+    with collect_metrics(metrics):
+        with timed_stage('pdf', document='gap'):
+            record_cache_hit('checkpoint')
+        with timed_stage('pdf', document='gap'):
+            pass
+
+    assert [stage['stage'] for stage in metrics.stages] == ['pdf', 'pdf']
+    assert metrics.cache_hits == {'checkpoint': 1}
+    report = aggregate_metrics([metrics.to_dict(), metrics.to_dict()])
+    assert report['stages']['pdf:gap']['count'] == 4
+    assert report['cache_hits'] == {'checkpoint': 2}
+
+
+def test_analysis_writes_metrics_json(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text("1. PURPOSE\nSecurity requirements.\n", encoding='utf-8')
+
+    results = analyze_policy('policy.txt', 'out', incremental=False, formats=('txt',))
+
+    with open(f"{results['output_base']}_metrics.json", encoding='utf-8') as f:
+        saved = json.load(f)
+    assert [call['stage'] for call in saved['llm_calls']] == [
+        'gap_analysis', 'revised_policy', 'roadmap', 'executive_summary']
+    assert all(call['prompt_chars'] > 0 and call['wall_time'] == 0.01 for call in saved['llm_calls'])
+    assert saved['total_time'] > 0
@@ -0,0 +1,41 @@
+"""Several small policies per gap analysis prompt."""
+
+import main
+from checkpoint import RunCheckpoint
+from conftest import GAP_ANALYSIS
+from main import pack_gap_analyses
+from packing import PACK_MAX_POLICY_SIZE, split_packed_response
+
+
+def _packed_response(prompt, model, timeout, host):
+    return '\n\n'.join(f"===== GAP ANALYSIS {number}: policy =====\n{GAP_ANALYSIS}\nPolicy {number}."
+                       for number in (1, 2))
+
+
+def test_split_keeps_complete_reports_only():
+    response = (f"GAP ANALYSIS 1: a\n{GAP_ANALYSIS}\n"
+                "## GAP ANALYSIS 2: b\n1. CRITICAL GAPS\n- truncated\n"
+                f"GAP ANALYSIS 7: c\n{GAP_ANALYSIS}")
+
+    assert split_packed_response(response, 2) == {1: GAP_ANALYSIS}
+
+
+def test_small_policies_packed_and_large_ones_never_read(fake_llm, framework_dir, monkeypatch):
+    (framework_dir / 'a.txt').write_text("1. PURPOSE\nPolicy A.\n", encoding='utf-8')
+    (framework_dir / 'b.txt').write_text("1. PURPOSE\nPolicy B.\n", encoding='utf-8')
+    (framework_dir / 'copy.txt').write_text("1. PURPOSE\nPolicy A.\n", encoding='utf-8')
+    (framework_dir / 'large.txt').write_text("x" * (PACK_MAX_POLICY_SIZE * 5), encoding='utf-8')
+    policies = ['a.txt', 'b.txt', 'copy.txt', 'large.txt']
+    run = RunCheckpoint.create('out', policies)
+
+    read = []
+    read_policy_document = main.read_policy_document
+    monkeypatch.setattr(main, 'read_policy_document', lambda path: read.append(path) or read_policy_document(path))
+    fake_llm.respond = _packed_response
+    packed = pack_gap_analyses(run, policies, 'out', incremental=False)
+
+    assert 'large.txt' not in read
+    assert len(fake_llm.calls) == 1
+    assert sorted(packed) == ['a.txt', 'b.txt', 'copy.txt']
+    assert packed['a.txt'] == packed['copy.txt'] != packed['b.txt']
+    assert packed['b.txt'].endswith('Policy 2.')
@@ -0,0 +1,67 @@
+"""PDF rendering in a process pool shared across analyses."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import RESPONSES
+from metrics import RunMetrics, collect_metrics
+from pdf_generator import generate_all_pdfs, render_pool
+from report_model import ReportModel
+
+
+def _render(pool, output_base):
+    metrics = RunMetrics('policy')
+    with collect_metrics(metrics):
+        files = generate_all_pdfs(ReportModel('policy', dict(RESPONSES)), output_base, pool=pool)
+    return files, metrics
+
+
+def test_concurrent_analyses_share_one_pool(tmp_path):
+    pool = render_pool(2)
+    try:
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+        with ThreadPoolExecutor(max_workers=3) as analyses:
+            rendered = list(analyses.map(lambda n: _render(pool, str(tmp_path / f"p{n}")), range(3)))
+    finally:
+        pool.shutdown()
+
+    for files, metrics in rendered:
+        assert len(files) == 5
+        assert all(os.path.getsize(path) > 0 for path in files)
+        assert all(stage['worker'] for stage in metrics.stages)
+
+
+def test_single_worker_renders_in_process(tmp_path):
+    metrics = RunMetrics('policy')
+    with collect_metrics(metrics):
+        generate_all_pdfs(ReportModel('policy', dict(RESPONSES)), str(tmp_path / 'p'), workers=1)
+
+    assert metrics.stages and not any(stage.get('worker') for stage in metrics.stages)
+
+
+def test_styles_built_once_per_process():
+    from pdf_generator import get_styles
+
+    assert get_styles() is get_styles()
+    assert 'CustomBullet' in get_styles()
+
+
+def test_large_reports_drawn_directly_on_canvas(tmp_path, monkeypatch):
+    import pdf_generator
+    from PyPDF2 import PdfReader
+    from report_model import parse_blocks
+
+    drawn = []
+    write_canvas = pdf_generator.write_pdf_canvas
+    monkeypatch.setattr(pdf_generator, 'write_pdf_canvas', lambda *args: drawn.append(args) or write_canvas(*args))
+    monkeypatch.setattr(pdf_generator, 'STREAMING_THRESHOLD', 20000)
+    lines = [f"{n}. Requirement {n} applies to every system owner and every supplier." for n in range(1000)]
+    path = str(tmp_path / 'large.pdf')
+
+    pdf_generator.write_pdf(parse_blocks("LARGE REVISED POLICY\n" + '\n'.join(lines)), path)
+
+    assert len(drawn) == 1
+    reader = PdfReader(path)
+    assert len(reader.pages) > 10
+    assert 'Requirement 999 applies' in reader.pages[-1].extract_text()
+    assert os.listdir(tmp_path) == ['large.pdf']
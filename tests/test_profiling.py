@@ -0,0 +1,52 @@
+"""Per-stage cProfile and tracemalloc hooks."""
+
+import os
+import tracemalloc
+
+from metrics import RunMetrics, collect_metrics, timed_stage
+from profiling import ProfileCollector, collect_profiles
+
+
+def test_nested_stages_profiled_and_written(tmp_path):
+    collector = ProfileCollector(cpu=True, memory=True)
+    with collect_metrics(RunMetrics('policy')), collect_profiles(collector):
+        with timed_stage('gap_analysis'):
+            with timed_stage('pdf', document='gap'):
+                data = [str(n) for n in range(20000)]
+            del data
+
+    assert not tracemalloc.is_tracing()
+    labels = sorted(entry['label'] for entry in collector.stages)
+    assert labels == ['00_gap_analysis', '01_pdf_gap']
+    assert all(entry['peak'] > 0 for entry in collector.stages)
+
+    collector.write(str(tmp_path / 'policy'))
+    written = sorted(os.listdir(tmp_path / 'policy_profile'))
+    assert written == ['00_gap_analysis.pstats', '00_gap_analysis_memory.txt',
+                       '01_pdf_gap.pstats', '01_pdf_gap_memory.txt']
+
+
+def test_stages_outside_a_collector_are_not_profiled():
+    collector = ProfileCollector()
+    with collect_profiles(collector):
+        pass
+    with timed_stage('gap_analysis'):
+        pass
+
+    assert collector.stages == []
+
+
+def test_peaks_relative_to_stage_start_without_reset_peak(monkeypatch):
+    # tracemalloc.reset_peak() is missing on Python 3.8
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    collector = ProfileCollector(cpu=False, memory=True)
+    with collect_metrics(RunMetrics('policy')), collect_profiles(collector):
+        with timed_stage('gap_analysis'):
+            data = [str(n) for n in range(50000)]
+            del data
+        with timed_stage('roadmap'):
+            kept = [str(n) for n in range(5000)]
+
+    gap_analysis, roadmap = collector.stages
+    assert gap_analysis['peak'] > roadmap['peak'] > 0
+    assert len(kept) == 5000
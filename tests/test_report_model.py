@@ -0,0 +1,37 @@
+"""Parse-once report model shared by every output format."""
+
+from conftest import RESPONSES
+from report_model import ReportModel
+
+
+def test_sections_parsed_once_and_reused_by_comprehensive_report():
+    report = ReportModel('policy', dict(RESPONSES))
+    gap_blocks = report.blocks('gap_analysis')
+
+    assert report.blocks('gap_analysis') is gap_blocks
+    comprehensive = report.comprehensive_blocks()
+    assert any(comprehensive[i:i + len(gap_blocks)] == gap_blocks for i in range(len(comprehensive)))
+
+    keys = [key for key, _, _ in report.documents()]
+    assert keys == ['gap_analysis', 'revised_policy', 'roadmap', 'executive_summary', 'comprehensive_report']
+
+
+def test_comprehensive_text_orders_sections():
+    text = ReportModel('policy', dict(RESPONSES)).comprehensive_text()
+
+    positions = [text.index(marker) for marker in ('EXECUTIVE SUMMARY', 'DETAILED GAP ANALYSIS',
+                                                   'REVISED POLICY DOCUMENT', 'IMPLEMENTATION ROADMAP',
+                                                   'END OF REPORT')]
+    assert positions == sorted(positions)
+    assert 'Policy: policy' in text
+
+
+def test_markup_classified_in_priority_order():
+    from report_model import parse_blocks
+
+    blocks = parse_blocks("GAP ANALYSIS REPORT\n=====\n\nKey findings:\n**Bold** line\n- bullet\n"
+                          "  * nested\n1. numbered\nbody text\n  INDENTED UPPERCASE")
+
+    assert [kind for kind, _ in blocks] == ['title', 'separator', 'blank', 'heading', 'bold', 'bullet',
+                                            'bullet', 'numbered', 'body', 'body']
+    assert blocks[5].text == 'bullet' and blocks[6].text == 'nested'
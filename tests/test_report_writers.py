@@ -0,0 +1,31 @@
+"""Markdown, HTML and DOCX report writers."""
+
+import os
+
+import pytest
+
+from conftest import RESPONSES
+from report_model import ReportModel
+from report_writers import parse_formats, write_reports
+
+
+def test_parse_formats_rejects_unknown_and_deduplicates():
+    assert parse_formats('txt, MD,md') == ['txt', 'md']
+    with pytest.raises(ValueError, match='rtf'):
+        parse_formats('txt,rtf')
+
+
+def test_each_format_written_from_one_model(tmp_path):
+    from docx import Document
+
+    base = str(tmp_path / 'policy')
+    files = write_reports(ReportModel('policy', dict(RESPONSES)), base, ('md', 'html', 'docx'),
+                          log=lambda message: None)
+
+    assert len(files) == 15 and all(os.path.exists(path) for path in files)
+    with open(f"{base}_gap_analysis.md", encoding='utf-8') as f:
+        assert '- Training program limited to onboarding (PR.AT-01)' in f.read()
+    with open(f"{base}_roadmap.html", encoding='utf-8') as f:
+        assert '<li>Action 1: Deploy MFA</li>' in f.read()
+    paragraphs = [p.text for p in Document(f"{base}_executive_summary.docx").paragraphs]
+    assert 'No MFA' in paragraphs
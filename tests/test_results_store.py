@@ -0,0 +1,26 @@
+"""SQLite results store."""
+
+from main import analyze_policy
+from results_store import ResultsStore, extract_gap_controls
+
+
+def test_control_references_extracted():
+    assert extract_gap_controls("Missing MFA (PR.AA-03, PR.AA-03) and logging (DE.CM)") == [
+        ('PR.AA-03', 'PR.AA', 'PR'), ('DE.CM', 'DE.CM', 'DE')]
+
+
+def test_analyses_queryable_by_control_and_latest(fake_llm, framework_dir):
+    (framework_dir / 'policy.txt').write_text("1. PURPOSE\nSecurity requirements.\n", encoding='utf-8')
+    store = ResultsStore(str(framework_dir / 'results.db'))
+    try:
+        analyze_policy('policy.txt', 'out', incremental=False, formats=('txt',), store=store)
+        analyze_policy('policy.txt', 'out', incremental=False, formats=('txt',), store=store)
+
+        gaps = store.find_gaps(control='PR.AA-03')
+        assert [(row['policy_name'], row['severity']) for row in gaps] == [('policy', 'critical')]
+        assert len(store.find_gaps(control='PR', latest=False)) == 4
+        summary = store.policy_summary()
+        assert [(row['critical'], row['significant'], row['minor']) for row in summary] == [(2, 1, 1)]
+        assert {row['stage'] for row in store.stage_timings()} >= {'gap_analysis', 'save_reports'}
+    finally:
+        store.close()
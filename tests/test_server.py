@@ -0,0 +1,113 @@
+"""Analysis service job API."""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import server
+from dedup import DuplicateIndex
+from server import AnalysisService, JobRequestHandler
+
+
+@pytest.fixture
+def start_service(tmp_path):
+    servers = []
+
+    def start(analyze=None, workers=0, queue_size=4, policy_root=None):
+        service = AnalysisService(analyze, str(tmp_path / 'out'), workers, queue_size, policy_root=policy_root)
+        service.start()
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), JobRequestHandler)
+        httpd.service = service
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append((httpd, service))
+        return service, f"http://127.0.0.1:{httpd.server_port}"
+
+    yield start
+    for httpd, service in servers:
+        httpd.shutdown()
+        httpd.server_close()
+        service.stop()
+
+
+def _post(url, data, headers):
+    request = urllib.request.Request(f"{url}/jobs", data=data, headers=headers, method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def _post_path(url, path):
+    return _post(url, json.dumps({'path': path}).encode(), {'Content-Type': 'application/json'})
+
+
+def test_paths_only_accepted_inside_policy_root(tmp_path, start_service):
+    root = tmp_path / 'policies'
+    root.mkdir()
+    (root / 'isms.txt').write_text("policy")
+    (tmp_path / 'secret.txt').write_text("secret")
+
+    _, uploads_only = start_service()
+    assert _post_path(uploads_only, str(root / 'isms.txt'))[0] == 403
+
+    _, url = start_service(policy_root=str(root))
+    assert _post_path(url, 'isms.txt')[0] == 202
+    assert _post_path(url, '../secret.txt')[0] == 403
+    assert _post_path(url, str(tmp_path / 'secret.txt'))[0] == 403
+    assert _post_path(url, 'missing.txt')[0] == 400
+
+
+def test_full_queue_leaves_no_run_or_upload(tmp_path, start_service):
+    _, url = start_service(queue_size=1)
+
+    assert _post(url, b"policy", {})[0] == 400
+    status, job = _post_url(url + '/jobs?filename=a.txt')
+    assert status == 202
+    assert _post_url(url + '/jobs?filename=b.txt')[0] == 503
+
+    out = tmp_path / 'out'
+    assert os.listdir(out / 'runs') == [job['id']]
+    assert len(os.listdir(out / 'uploads')) == 1
+
+
+def _post_url(url):
+    request = urllib.request.Request(url, data=b"policy", method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_finished_jobs_evicted(tmp_path, monkeypatch, start_service):
+    monkeypatch.setattr(server, 'MAX_FINISHED_JOBS', 2)
+    done = threading.Semaphore(0)
+
+    def analyze(policy_path, output_dir, **options):
+        done.release()
+        return {'files': [], 'metrics': {'total_time': 0.0}}
+
+    service, url = start_service(analyze, workers=1)
+    ids = [_post_url(url + f'/jobs?filename=p{n}.txt')[1]['id'] for n in range(4)]
+    for _ in ids:
+        done.acquire(timeout=5)
+    service.stop()
+    service.workers = []
+
+    assert [job['id'] for job in service.list_jobs()] == ids[2:]
+
+
+def test_dedup_index_bounded():
+    index = DuplicateIndex(max_entries=2)
+    for n in range(3):
+        index.add(f"p{n}", f"policy number {n} " * 20, n)
+
+    assert sorted(index.payloads) == ['p1', 'p2']
+    assert index.find("policy number 0 " * 20)[0] is None
+    assert index.find("policy number 2 " * 20)[:2] == ('exact', 'p2')
@@ -0,0 +1,54 @@
+"""Atomic report writes."""
+
+import os
+import stat
+
+import pytest
+
+import utils
+from utils import atomic_path, atomic_write
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_follow_the_umask(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, '_UMASK', 0o027)
+    atomic_write("report", str(tmp_path / 'report.txt'))
+
+    assert _mode(tmp_path / 'report.txt') == 0o640
+    assert os.listdir(tmp_path) == ['report.txt']
+
+
+def test_replaced_files_keep_their_mode(tmp_path):
+    path = tmp_path / 'report.txt'
+    path.write_text("old")
+    os.chmod(path, 0o604)
+
+    atomic_write(b"new", str(path))
+
+    assert path.read_bytes() == b"new"
+    assert _mode(path) == 0o604
+
+
+def test_failed_write_leaves_target_untouched(tmp_path):
+    path = tmp_path / 'report.pdf'
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_path(str(path)) as temp_path:
+            with open(temp_path, 'w') as f:
+                f.write("partial")
+            raise RuntimeError("renderer crashed")
+
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ['report.pdf']
+
+
+def test_write_without_fchmod(tmp_path, monkeypatch):
+    # Windows has no os.fchmod() before Python 3.13
+    monkeypatch.delattr(os, 'fchmod', raising=False)
+    atomic_write("report", str(tmp_path / 'report.txt'))
+
+    assert (tmp_path / 'report.txt').read_text() == "report"
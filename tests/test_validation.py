@@ -0,0 +1,79 @@
+"""Template validation, targeted repairs and model escalation."""
+
+from conftest import GAP_ANALYSIS, RESPONSES, REVISED_POLICY, ROADMAP
+from gap_analyzer import _repair_prompt, set_stage_models
+from main import analyze_policy
+from metrics import current_stage
+from validation import missing_sections, strip_end_marker
+
+
+def test_truncated_revised_policy_detected_and_marker_stripped():
+    truncated = REVISED_POLICY.split('END OF')[0]
+
+    assert missing_sections('revised_policy', truncated) == ['END OF REVISED POLICY']
+    assert missing_sections('revised_policy', REVISED_POLICY) == []
+    assert strip_end_marker('revised_policy', REVISED_POLICY) == truncated.strip()
+    # A wholly truncated output is the cascade's job, not a repair's
+    assert _repair_prompt('revised_policy', 'prompt', truncated) == (None, None)
+
+
+def test_repair_prompt_resends_prefix_and_asks_only_for_missing():
+    partial = ROADMAP.split('KEY MILESTONES')[0]
+
+    follow_up, missing = _repair_prompt('roadmap', 'ORIGINAL PROMPT', partial)
+
+    assert missing == ['KEY MILESTONES', 'RESOURCE REQUIREMENTS', 'SUCCESS METRICS']
+    assert follow_up.startswith('ORIGINAL PROMPT\n\nYOUR RESPONSE SO FAR:\n' + partial)
+    assert 'PHASE 1' not in follow_up.split(partial)[1]
+
+
+def test_truncated_revision_escalates_to_larger_model(fake_llm, framework_dir):
+    set_stage_models('small', {'revised_policy': ('small', 'large')})
+
+    def respond(prompt, model, timeout, host):
+        if current_stage() == 'revised_policy' and model == 'small':
+            return REVISED_POLICY.split('END OF')[0]
+        return RESPONSES.get(current_stage(), GAP_ANALYSIS)
+
+    fake_llm.respond = respond
+    (framework_dir / 'policy.txt').write_text("1. PURPOSE\nSecurity requirements.\n", encoding='utf-8')
+    results = analyze_policy('policy.txt', 'out', incremental=False, formats=('txt',))
+
+    assert [call['model'] for call in fake_llm.calls if call['stage'] == 'revised_policy'] == ['small', 'large']
+    assert results['metrics']['escalations'][0]['missing'] == ['END OF REVISED POLICY']
+    assert 'END OF REVISED POLICY' not in results['revised_policy']
+    assert results['revised_policy'].endswith('- MFA required for all users')
+
+
+def test_missing_sections_spliced_in_template_order():
+    from validation import splice_sections
+
+    partial = GAP_ANALYSIS.replace("3. MINOR GAPS (Low Priority)\n- Policy review cadence undefined (GV.PO-02)\n\n", "")
+    addition = "Here you go:\n3. MINOR GAPS (Low Priority)\n- Logging retention undefined (DE.CM-01)\n\n" \
+               "1. CRITICAL GAPS (High Priority)\n- Rewritten critical gap"
+
+    spliced = splice_sections('gap_analysis', partial, addition)
+
+    assert missing_sections('gap_analysis', spliced) == []
+    assert spliced.index('SIGNIFICANT GAPS') < spliced.index('MINOR GAPS') < spliced.index('4. SUMMARY')
+    assert 'Logging retention undefined' in spliced and 'Here you go' not in spliced
+    # Sections the first response already had are kept as written
+    assert 'Rewritten critical gap' not in spliced and 'lacks multi-factor authentication' in spliced
+
+
+def test_partial_output_repaired_with_one_follow_up(fake_llm):
+    from gap_analyzer import call_local_llm
+    from metrics import RunMetrics, collect_metrics
+
+    partial = ROADMAP.split('RESOURCE REQUIREMENTS')[0]
+    fake_llm.respond = lambda prompt, model, timeout, host: (
+        "RESOURCE REQUIREMENTS\n- Budget\nSUCCESS METRICS\n- Coverage" if 'YOUR RESPONSE SO FAR' in prompt
+        else partial)
+    metrics = RunMetrics('policy')
+    with collect_metrics(metrics):
+        roadmap = call_local_llm('roadmap prompt', stage='roadmap')
+
+    assert len(fake_llm.calls) == 2
+    assert missing_sections('roadmap', roadmap) == []
+    assert metrics.repairs == [{'stage': 'roadmap', 'model': 'gemma3:4b',
+                                'missing': ['RESOURCE REQUIREMENTS', 'SUCCESS METRICS'], 'still_missing': []}]
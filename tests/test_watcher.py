@@ -0,0 +1,68 @@
+"""Watch-folder ingestion."""
+
+import threading
+
+import watcher
+from watcher import PolicyWatcher
+
+
+def _watcher(tmp_path, analyzed):
+    def analyze(path, output_dir, **options):
+        analyzed.append(path)
+        return {'output_base': str(tmp_path / 'out' / 'policy')}
+
+    return PolicyWatcher(str(tmp_path / 'in'), analyze, str(tmp_path / 'out'), debounce=0, poll_interval=0.01)
+
+
+def test_unreadable_file_retried_then_skipped(tmp_path, monkeypatch):
+    (tmp_path / 'in').mkdir()
+    policy = tmp_path / 'in' / 'isms.txt'
+    policy.write_text("policy")
+    analyzed = []
+    policy_watcher = _watcher(tmp_path, analyzed)
+    failures = []
+
+    def locked(path):
+        failures.append(path)
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr(watcher, '_file_hash', locked)
+    policy_watcher._scan(0)
+    for now in range(1, 5):
+        policy_watcher._dispatch(now)
+
+    assert len(failures) == watcher.READ_RETRIES
+    assert policy_watcher.pending == {} and analyzed == []
+
+
+def test_file_readable_on_retry_is_analyzed_once(tmp_path, monkeypatch):
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'in' / 'isms.txt').write_text("policy")
+    (tmp_path / 'in' / 'copy.txt').write_text("policy")
+    analyzed = []
+    policy_watcher = _watcher(tmp_path, analyzed)
+    file_hash = watcher._file_hash
+    calls = []
+
+    def flaky(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise OSError("sharing violation")
+        return file_hash(path)
+
+    monkeypatch.setattr(watcher, '_file_hash', flaky)
+    monkeypatch.setattr(watcher, 'INotify', None)
+    stop = threading.Event()
+    thread = threading.Thread(target=policy_watcher.watch, args=(stop,))
+    thread.start()
+    try:
+        for _ in range(200):
+            if analyzed and not policy_watcher.pending:
+                break
+            stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join(5)
+
+    assert len(analyzed) == 1
+    assert not thread.is_alive()
@@ -0,0 +1,150 @@
+"""Shared-directory work queue with leases, reclaiming and several worker processes."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import work_queue
+from work_queue import WorkQueue, run_worker
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Worker process analyzing with a stand-in that logs which process took each policy
+WORKER = """
+import os, sys, time
+sys.path.insert(0, sys.argv[1])
+from work_queue import run_worker
+
+def analyze(policy_path, output_dir, checkpoint=None, store=None):
+    with open(os.path.join(output_dir, 'analyzed.log'), 'a') as f:
+        f.write(f"{os.path.basename(policy_path)} {os.getpid()}\\n")
+    time.sleep(0.05)
+    return {'output_base': checkpoint.output_base}
+
+run_worker(sys.argv[2], analyze, sys.argv[3], lease_timeout=5)
+"""
+
+
+def _policies(directory, count):
+    for number in range(count):
+        (directory / f"policy{number}.txt").write_text(f"Policy {number}", encoding='utf-8')
+
+
+def _age(path, seconds):
+    stale = time.time() - seconds
+    os.utime(path, (stale, stale))
+
+
+def test_worker_processes_split_the_library(tmp_path):
+    queue_dir, output_dir = tmp_path / 'policies', tmp_path / 'out'
+    queue_dir.mkdir()
+    output_dir.mkdir()
+    _policies(queue_dir, 12)
+
+    workers = [subprocess.Popen([sys.executable, '-c', WORKER, SRC, str(queue_dir), str(output_dir)],
+                                stdout=subprocess.DEVNULL) for _ in range(3)]
+    assert [worker.wait(60) for worker in workers] == [0, 0, 0]
+
+    analyzed = [line.split()[0] for line in (output_dir / 'analyzed.log').read_text().splitlines()]
+    assert sorted(analyzed) == sorted(f"policy{number}.txt" for number in range(12))
+    queue = WorkQueue(str(queue_dir))
+    assert all(queue.status(str(path))['status'] == 'complete' for path in queue_dir.glob('*.txt'))
+    assert os.listdir(queue.leases_dir) == []
+
+
+def test_stale_lease_reclaimed_and_resumed(tmp_path):
+    _policies(tmp_path, 1)
+    policy = str(tmp_path / 'policy0.txt')
+    dead = WorkQueue(str(tmp_path), lease_timeout=1).claim(policy, str(tmp_path / 'out'))
+    dead.stop.set()
+    _age(dead.path, 10)
+
+    analyzed = []
+    run_worker(str(tmp_path), lambda path, output_dir, checkpoint, store: analyzed.append(checkpoint)
+               or {'output_base': checkpoint.output_base}, str(tmp_path / 'out'), lease_timeout=1)
+
+    assert analyzed[0].output_base == dead.run.policy(policy).output_base
+    assert WorkQueue(str(tmp_path)).status(policy)['status'] == 'complete'
+
+
+def test_lease_renewed_during_reclaim_given_back(tmp_path, monkeypatch):
+    _policies(tmp_path, 1)
+    policy = str(tmp_path / 'policy0.txt')
+    queue = WorkQueue(str(tmp_path), lease_timeout=1)
+    lease_path = queue._lease_path(policy)
+    with open(lease_path, 'w') as f:
+        json.dump({'worker': 'dead'}, f)
+    _age(lease_path, 10)
+
+    rename = os.rename
+
+    def rename_after_release(src, dst):
+        # Another worker reclaims the stale lease and leases the policy anew first
+        with open(src, 'w') as f:
+            json.dump({'worker': 'other'}, f)
+        rename(src, dst)
+
+    monkeypatch.setattr(work_queue.os, 'rename', rename_after_release)
+    assert queue.claim(policy, str(tmp_path / 'out')) is None
+
+    with open(lease_path) as f:
+        assert json.load(f) == {'worker': 'other'}
+    assert os.listdir(queue.leases_dir) == ['policy0.txt.lease']
+
+
+class _StopWorker(Exception):
+    pass
+
+
+def test_results_of_a_reclaimed_lease_discarded(tmp_path, monkeypatch):
+    _policies(tmp_path, 1)
+    policy = str(tmp_path / 'policy0.txt')
+
+    def analyze(path, output_dir, checkpoint, store):
+        with open(WorkQueue(str(tmp_path))._lease_path(path), 'w') as f:
+            json.dump({'worker': 'other'}, f)
+        return {'output_base': checkpoint.output_base}
+
+    def stop(seconds):
+        raise _StopWorker()
+
+    # The other worker's lease stays, so this worker would wait for it
+    monkeypatch.setattr(work_queue.time, 'sleep', stop)
+    try:
+        run_worker(str(tmp_path), analyze, str(tmp_path / 'out'), lease_timeout=60)
+    except _StopWorker:
+        pass
+
+    assert WorkQueue(str(tmp_path)).status(policy) is None
+
+
+def test_unreadable_status_trusted_when_newer_than_policy(tmp_path, monkeypatch):
+    _policies(tmp_path, 1)
+    policy = str(tmp_path / 'policy0.txt')
+    queue = WorkQueue(str(tmp_path))
+    queue.finish(policy, 'digest')
+    _age(policy, 10)
+
+    def unreadable(path, *args, **kwargs):
+        raise PermissionError(13, 'Permission denied', path)
+
+    monkeypatch.setattr(work_queue, 'open', unreadable, raising=False)
+    assert queue.is_finished(policy, 'other digest')
+    assert queue.status(policy) is None
+
+    _age(queue._status_path(policy), 20)
+    assert not queue.is_finished(policy, 'other digest')
+
+
+def test_policy_removed_after_scan_skipped(tmp_path, monkeypatch):
+    _policies(tmp_path, 1)
+    scan = WorkQueue.policies
+    monkeypatch.setattr(WorkQueue, 'policies', lambda queue: [str(tmp_path / 'renamed.txt')] + scan(queue))
+
+    analyzed = []
+    run_worker(str(tmp_path), lambda path, output_dir, checkpoint, store: analyzed.append(path)
+               or {'output_base': checkpoint.output_base}, str(tmp_path / 'out'))
+
+    assert analyzed == [str(tmp_path / 'policy0.txt')]